@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.assistant_context import build_planner_snapshot
+from core.assistant_events import log_assistant_event
+from core.crewai_cache import checkout_agent
+from core.crewai_env import load_crewai
+from core.planner_version import get_planner_version
+from core.response_cache import BRIEFING_CACHE_TTL_SECONDS, response_cache_key, store_cached_response
+from core.timezone import local_today
+from models.briefing_schedule import BriefingSchedule
+from models.models import Model
+from models.user import User
+
+# Daily briefing generation, shared by the assistant endpoints and the briefing
+# scheduler so both write the same response-cache entry.
+
+
+def run_crewai_assistant(system_prompt: str, user_prompt: str, model: Model) -> str:
+    crewai = load_crewai()
+    with checkout_agent(
+        model,
+        role="Personal Productivity Assistant",
+        goal="Give practical, accurate planning help based on the user's request.",
+        backstory=(
+            "You are a concise assistant focused on actionable productivity plans, "
+            "task prioritization, and time management."
+        ),
+    ) as assistant_agent:
+        assistant_task = crewai.Task(
+            description=("System instructions:\n{system_prompt}\n\n{user_prompt}"),
+            expected_output=(
+                "Markdown with sections: Situation, Priorities, Next 3 actions, and Timeboxing. "
+                "Reference real task IDs/project names when possible."
+            ),
+            agent=assistant_agent,
+        )
+
+        crew = crewai.Crew(
+            agents=[assistant_agent],
+            tasks=[assistant_task],
+            process=crewai.Process.sequential,
+            verbose=False,
+        )
+
+        result = crew.kickoff(
+            inputs={
+                "system_prompt": system_prompt,
+                "user_prompt": user_prompt,
+            }
+        )
+
+    return getattr(result, "raw", str(result))
+
+
+def planner_cache_key(
+    db: Session,
+    kind: str,
+    user: User,
+    model_api_key: str,
+    horizon: str,
+    project_mode: str = "auto",
+    focus_project_id: Optional[int] = None,
+) -> str:
+    return response_cache_key(
+        kind,
+        user.id,
+        planner_version=get_planner_version(db, user.id),
+        day=local_today(user.timezone).isoformat(),
+        horizon=horizon,
+        project_mode=project_mode,
+        focus_project_id=focus_project_id,
+        model_api_key=model_api_key,
+    )
+
+
+def daily_briefing_request(
+    db: Session,
+    user_id: int,
+    horizon: str,
+    project_mode: str = "auto",
+    focus_project_id: Optional[int] = None,
+) -> Tuple[str, str, Dict[str, object]]:
+    snapshot = build_planner_snapshot(
+        db=db,
+        user_id=user_id,
+        user_prompt="",
+        project_mode=project_mode,
+        focus_project_id=focus_project_id,
+    )
+
+    hours = 24 if horizon == "today" else 72
+    prompt = (
+        f"{snapshot['context_block']}\n\n"
+        f"Build a concise {horizon} command-center briefing for the next {hours} hours. "
+        "Use exact task IDs and project names from the context. "
+        "Include: 1) mission statement, 2) top priorities, 3) risk alerts, "
+        "4) a timeboxed execution plan. "
+        "Be explicit about what the user should do in the next 90 minutes."
+    )
+    system = (
+        "You are the planning command center for a smart productivity app. "
+        "Your briefings must be specific, realistic, and immediately executable. "
+        "Avoid generic advice and tie all recommendations to planner entities."
+    )
+    meta = {
+        "horizon": horizon,
+        "focused_projects": len(snapshot.get("focused_projects", [])),
+        "urgent_open_tasks": snapshot.get("metrics", {}).get("urgent_open_tasks", 0),
+        "project_mode": snapshot.get("project_mode", "auto"),
+    }
+    return system, prompt, meta
+
+
+def generate_daily_briefing(
+    db: Session,
+    user: User,
+    model: Model,
+    horizon: str = "today",
+    project_mode: str = "auto",
+    focus_project_id: Optional[int] = None,
+    source: str = "daily_briefing",
+    ttl_seconds: int = BRIEFING_CACHE_TTL_SECONDS,
+) -> Dict[str, object]:
+    """Generate a briefing, log it and store it in the response cache. Does not check the cache first."""
+    cache_key = planner_cache_key(db, "daily_briefing", user, model.api_key, horizon, project_mode, focus_project_id)
+    system, prompt, meta = daily_briefing_request(db, user.id, horizon, project_mode, focus_project_id)
+    response_text = run_crewai_assistant(system_prompt=system, user_prompt=prompt, model=model)
+    log_assistant_event(
+        db=db,
+        user_id=user.id,
+        event_type="briefing_generated",
+        source=source,
+        status="success",
+        metadata={"horizon": horizon, "cached": False},
+    )
+    store_cached_response(db, user.id, "daily_briefing", cache_key, response_text, meta, ttl_seconds)
+    db.commit()
+    return {
+        "briefing": response_text,
+        "meta": {**meta, "cached": False, "generated_at": datetime.utcnow().isoformat()},
+    }
+
+
+def remember_briefing_model(db: Session, user_id: int, model_api_key: str) -> None:
+    """
+    Give a briefing schedule without a model the one the user just asked a
+    briefing from, so pre-generation warms the cache key the UI will read.
+    Does not commit.
+    """
+    db.query(BriefingSchedule).filter(
+        BriefingSchedule.owner == user_id,
+        BriefingSchedule.model_api_key.is_(None),
+    ).update({"model_api_key": model_api_key}, synchronize_session=False)
@@ -1,32 +1,58 @@
-import json
+import hashlib
+import os
 import re
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, insert, literal, select, union_all
 from sqlalchemy.orm import Session
 
+from core.entity_index import rank_tasks_for_prompt
+from core.planner_version import get_planner_version
+from core.task_graph import get_open_blockers
+from core.tokenizer import count_tokens
 from models.activity import Activity
-from models.assistant_memory import AssistantMemory
+from models.assistant_memory import AssistantMemorySummary, AssistantTurn
 from models.projects import Project
 from models.reminders import Reminder
 from models.tasks import Task as DbTask
 
 MAX_HISTORY_ITEMS = 14
-MAX_CONTEXT_CHARS = 14000
-COMPACT_TARGET_CHARS = 9500
-
-
-def _safe_json_loads(raw: str, fallback: Any) -> Any:
-    try:
-        return json.loads(raw)
-    except Exception:
-        return fallback
-
-
-def _estimate_tokens(text: str) -> int:
-    # Rough estimate used only for guardrails; no tokenizer dependency required.
-    return max(1, len(text) // 4)
+MATCH_CANDIDATE_LIMIT = 40
+# Prompt budget when the model's context window is unknown (~the old 14k-char cap).
+DEFAULT_CONTEXT_TOKENS = 3500
+MIN_CONTEXT_TOKENS = 768
+RESPONSE_TOKEN_RESERVE = 1024
+SYSTEM_PROMPT_TOKEN_RESERVE = 128
+# Smallest context window that still leaves MIN_CONTEXT_TOKENS after the reserves.
+MIN_MODEL_CONTEXT_WINDOW = MIN_CONTEXT_TOKENS + RESPONSE_TOKEN_RESERVE + SYSTEM_PROMPT_TOKEN_RESERVE
+
+# "stable" orders the prompt from least to most volatile (instruction, snapshot,
+# memory, recent turns, prompt-specific matches, request) so model servers with
+# prefix/KV caching can reuse most of it between turns.
+PROMPT_LAYOUTS = ("default", "stable")
+DEFAULT_PROMPT_LAYOUT = os.environ.get("ASSISTANT_PROMPT_LAYOUT", "default")
+STABLE_SNAPSHOT_KEYS = ("active_projects", "reminders", "urgent_tasks", "recent_activity")
+# The execution strategy follows the prompt's project focus, so it travels with the request.
+PROMPT_SCOPED_KEYS = ("focused_projects", "matched_entities", "smart_actions")
+
+
+def context_token_budget(context_window: int | None) -> int:
+    """Prompt-token budget for a model with the given context window (None = unknown)."""
+    if not context_window:
+        return DEFAULT_CONTEXT_TOKENS
+    return max(MIN_CONTEXT_TOKENS, context_window - RESPONSE_TOKEN_RESERVE - SYSTEM_PROMPT_TOKEN_RESERVE)
+
+
+def _format_turn(item: Dict[str, str]) -> str:
+    role = (item.get("role") or "user").strip().lower()
+    content = " ".join((item.get("content") or "").split())
+    if not content:
+        return ""
+    label = "U" if role == "user" else "A"
+    return f"{label}: {content[:220]}"
 
 
 def _summarize_turns(turns: List[Dict[str, str]], max_chars: int = 1800) -> str:
@@ -35,12 +61,10 @@ def _summarize_turns(turns: List[Dict[str, str]], max_chars: int = 1800) -> str:
 
     lines: List[str] = []
     for item in turns:
-        role = item.get("role", "user").strip().lower()
-        content = " ".join((item.get("content") or "").split())
-        if not content:
+        line = _format_turn(item)
+        if not line:
             continue
-        label = "U" if role == "user" else "A"
-        lines.append(f"{label}: {content[:220]}")
+        lines.append(line)
         if sum(len(x) for x in lines) > max_chars:
             break
 
@@ -48,13 +72,16 @@ def _summarize_turns(turns: List[Dict[str, str]], max_chars: int = 1800) -> str:
     return result[:max_chars]
 
 
-def _compact_prompt(prompt: str, max_chars: int = 6000) -> str:
+def _compact_prompt(prompt: str, max_tokens: int = 1500) -> str:
     clean = prompt.strip()
-    if len(clean) <= max_chars:
+    tokens = count_tokens(clean)
+    if tokens <= max_tokens:
         return clean
 
-    head = clean[:2200]
-    tail = clean[-3200:]
+    # Keep the opening (task framing) and the larger tail (the actual ask).
+    keep_chars = int(len(clean) * max_tokens / tokens)
+    head = clean[: int(keep_chars * 0.4)]
+    tail = clean[len(clean) - int(keep_chars * 0.6):]
     omitted = len(clean) - len(head) - len(tail)
     return (
         f"{head}\n\n[...prompt compacted due to context size, {omitted} chars omitted...]\n\n{tail}"
@@ -197,6 +224,12 @@ def _build_smart_actions(
     return actions[:4]
 
 
+def render_snapshot_section(section: Dict[str, Any], items: List[str]) -> str:
+    if section["key"] == "smart_actions":
+        return f"- {section['label']}: " + " | ".join(items)
+    return f"- {section['label']}: " + "; ".join(items) + "."
+
+
 def _serialize_task(task: DbTask, project_name: str | None = None) -> Dict[str, Any]:
     return {
         "id": task.id,
@@ -209,62 +242,88 @@ def _serialize_task(task: DbTask, project_name: str | None = None) -> Dict[str,
     }
 
 
-def get_or_create_memory(db: Session, user_id: int, mode: str) -> AssistantMemory:
-    row = (
-        db.query(AssistantMemory)
-        .filter(AssistantMemory.owner == user_id, AssistantMemory.mode == mode)
+def load_memory_state(db: Session, user_id: int, mode: str) -> Dict[str, Any]:
+    latest_summary = (
+        db.query(AssistantMemorySummary)
+        .filter(AssistantMemorySummary.owner == user_id, AssistantMemorySummary.mode == mode)
+        .order_by(AssistantMemorySummary.version.desc())
         .first()
     )
-    if row:
-        return row
+    recent_rows = (
+        db.query(AssistantTurn.seq, AssistantTurn.role, AssistantTurn.content)
+        .filter(AssistantTurn.owner == user_id, AssistantTurn.mode == mode)
+        .order_by(AssistantTurn.seq.desc())
+        .limit(MAX_HISTORY_ITEMS)
+        .all()
+    )
+    recent_rows.reverse()
+    return {
+        "owner": user_id,
+        "mode": mode,
+        "summary": latest_summary.summary if latest_summary else "",
+        "summary_version": latest_summary.version if latest_summary else 0,
+        "summarized_through_seq": latest_summary.covers_through_seq if latest_summary else 0,
+        "last_seq": recent_rows[-1].seq if recent_rows else 0,
+        "recent_history": [{"role": row.role, "content": row.content} for row in recent_rows],
+    }
 
-    row = AssistantMemory(owner=user_id, mode=mode, summary="", recent_history="[]")
-    db.add(row)
-    db.flush()
-    return row
 
+# Prompt-independent snapshot data (project catalog, totals, urgent/upcoming tasks,
+# reminders, activity) is kept briefly per user and reused while the planner
+# version is unchanged. /assistant/context warms it when the assistant page
+# opens, so the first prompt skips those queries.
+SNAPSHOT_CACHE_TTL_SECONDS = 120
+MAX_SNAPSHOT_CACHE_USERS = 256
 
-def build_planner_snapshot(
+_snapshot_lock = threading.Lock()
+_snapshot_cache: Dict[int, Dict[str, Any]] = {}
+_snapshot_stats = {"hits": 0, "misses": 0}
+
+
+def _cached_snapshot_entry(db: Session, user_id: int) -> Dict[str, Any]:
+    version = get_planner_version(db, user_id)
+    now = time.monotonic()
+    with _snapshot_lock:
+        entry = _snapshot_cache.get(user_id)
+        if entry is None or entry["version"] != version or entry["expires_at"] <= now:
+            if entry is None and len(_snapshot_cache) >= MAX_SNAPSHOT_CACHE_USERS:
+                _snapshot_cache.pop(min(_snapshot_cache, key=lambda uid: _snapshot_cache[uid]["expires_at"]))
+            entry = {
+                "version": version,
+                "expires_at": now + SNAPSHOT_CACHE_TTL_SECONDS,
+                "catalog": None,
+                "scopes": {},
+            }
+            _snapshot_cache[user_id] = entry
+        return entry
+
+
+def invalidate_snapshot_cache(user_id: Optional[int] = None) -> None:
+    with _snapshot_lock:
+        if user_id is None:
+            _snapshot_cache.clear()
+        else:
+            _snapshot_cache.pop(user_id, None)
+
+
+def snapshot_cache_stats() -> Dict[str, int]:
+    with _snapshot_lock:
+        return {**_snapshot_stats, "users": len(_snapshot_cache)}
+
+
+def _load_scope_data(
     db: Session,
     user_id: int,
-    user_prompt: str,
-    project_mode: str = "auto",
-    focus_project_id: int | None = None,
-    task_limit: int = 8,
+    scoped_project_ids: set[int],
+    task_limit: int,
+    now: datetime,
+    open_states: set[str],
 ) -> Dict[str, Any]:
-    open_states = {"open", "todo", "doing"}
-    mode = (project_mode or "auto").strip().lower()
-    if mode not in {"auto", "strict", "cross"}:
-        mode = "auto"
-
-    now = datetime.utcnow()
-    project_catalog_rows = (
-        db.query(Project.id, Project.name)
-        .filter(Project.owner == user_id)
-        .order_by(Project.name.asc())
-        .all()
-    )
-    project_catalog = [
-        {"id": project_id, "name": project_name}
-        for project_id, project_name in project_catalog_rows
-    ]
-    detected_focused_projects = _find_target_projects(project_catalog, user_prompt)
-    scoped_project_ids: set[int] = set()
-    if mode == "strict":
-        if focus_project_id:
-            scoped_project_ids = {focus_project_id}
-        elif detected_focused_projects:
-            scoped_project_ids = {p["id"] for p in detected_focused_projects[:1]}
-    elif mode == "auto" and detected_focused_projects:
-        scoped_project_ids = {p["id"] for p in detected_focused_projects}
-
-    project_count = len(scoped_project_ids) if scoped_project_ids else len(project_catalog)
     tasks_base_query = db.query(DbTask).filter(DbTask.owner == user_id)
     if scoped_project_ids:
         tasks_base_query = tasks_base_query.filter(DbTask.proj_id.in_(scoped_project_ids))
 
     totals = {
-        "projects": project_count,
         "tasks": tasks_base_query.with_entities(func.count(DbTask.id)).scalar() or 0,
         "done_tasks": tasks_base_query.filter(DbTask.state == "done").with_entities(func.count(DbTask.id)).scalar() or 0,
         "open_tasks": tasks_base_query.filter(DbTask.state.in_(open_states)).with_entities(func.count(DbTask.id)).scalar() or 0,
@@ -336,22 +395,141 @@ def build_planner_snapshot(
         .limit(7)
         .all()
     )
+
+    urgent_tasks = [_serialize_task(task, project_name) for task, project_name in urgent_rows]
+    upcoming_tasks = [_serialize_task(task, project_name) for task, project_name in deadline_rows]
+    blockers = get_open_blockers(db, user_id, [item["id"] for item in urgent_tasks + upcoming_tasks])
+    for item in urgent_tasks + upcoming_tasks:
+        if item["id"] in blockers:
+            item["blocked_by"] = blockers[item["id"]]
+
+    return {
+        "totals": totals,
+        "urgent_tasks": urgent_tasks,
+        "upcoming_tasks": upcoming_tasks,
+        "reminders": [
+            {
+                "id": reminder.id,
+                "note": reminder.note,
+                "when": reminder.when.isoformat(),
+            }
+            for reminder in upcoming_reminders
+        ],
+        "recent_activity": [
+            {
+                "id": activity.id,
+                "task_title": task_title,
+                "status": activity.status,
+                "clock_in": activity.clock_in.isoformat() if activity.clock_in else None,
+                "clock_out": activity.clock_out.isoformat() if activity.clock_out else None,
+                "description": (activity.description or "").strip()[:120],
+            }
+            for activity, task_title in activity_rows
+        ],
+        "active_projects": [
+            {
+                "id": project_id,
+                "name": project_name,
+                "open_task_count": int(task_count or 0),
+            }
+            for project_id, project_name, task_count in project_rows
+        ],
+    }
+
+
+def build_planner_snapshot(
+    db: Session,
+    user_id: int,
+    user_prompt: str,
+    project_mode: str = "auto",
+    focus_project_id: int | None = None,
+    task_limit: int = 8,
+) -> Dict[str, Any]:
+    open_states = {"open", "todo", "doing"}
+    mode = (project_mode or "auto").strip().lower()
+    if mode not in {"auto", "strict", "cross"}:
+        mode = "auto"
+
+    now = datetime.utcnow()
+    entry = _cached_snapshot_entry(db, user_id)
+    project_catalog = entry["catalog"]
+    if project_catalog is None:
+        project_catalog_rows = (
+            db.query(Project.id, Project.name)
+            .filter(Project.owner == user_id)
+            .order_by(Project.name.asc())
+            .all()
+        )
+        project_catalog = [
+            {"id": project_id, "name": project_name}
+            for project_id, project_name in project_catalog_rows
+        ]
+        entry["catalog"] = project_catalog
+    detected_focused_projects = _find_target_projects(project_catalog, user_prompt)
+    scoped_project_ids: set[int] = set()
+    if mode == "strict":
+        if focus_project_id:
+            scoped_project_ids = {focus_project_id}
+        elif detected_focused_projects:
+            scoped_project_ids = {p["id"] for p in detected_focused_projects[:1]}
+    elif mode == "auto" and detected_focused_projects:
+        scoped_project_ids = {p["id"] for p in detected_focused_projects}
+
+    scope_key = (tuple(sorted(scoped_project_ids)), task_limit)
+    scope_data = entry["scopes"].get(scope_key)
+    snapshot_cached = scope_data is not None
+    if scope_data is None:
+        scope_data = _load_scope_data(db, user_id, scoped_project_ids, task_limit, now, open_states)
+        entry["scopes"][scope_key] = scope_data
+    with _snapshot_lock:
+        _snapshot_stats["hits" if snapshot_cached else "misses"] += 1
+
+    project_count = len(scoped_project_ids) if scoped_project_ids else len(project_catalog)
+    totals = {"projects": project_count, **scope_data["totals"]}
+    urgent_tasks = list(scope_data["urgent_tasks"])
+    upcoming_tasks = list(scope_data["upcoming_tasks"])
+    reminders = list(scope_data["reminders"])
+    recent_activity = list(scope_data["recent_activity"])
+    active_projects = list(scope_data["active_projects"])
+
+    tasks_with_projects_query = (
+        db.query(DbTask, Project.name)
+        .join(Project, DbTask.proj_id == Project.id)
+        .filter(DbTask.owner == user_id)
+    )
+    if scoped_project_ids:
+        tasks_with_projects_query = tasks_with_projects_query.filter(DbTask.proj_id.in_(scoped_project_ids))
+
     focused_projects = detected_focused_projects
     if mode == "strict" and scoped_project_ids:
         focused_projects = [p for p in project_catalog if p["id"] in scoped_project_ids]
     focused_project_ids = scoped_project_ids or {item["id"] for item in focused_projects}
 
-    candidate_rows = (
-        tasks_with_projects_query
-        .order_by(DbTask.deadline.is_(None), DbTask.deadline.asc(), DbTask.id.desc())
-        .limit(180)
-        .all()
-    )
-
     keywords = _extract_keywords(user_prompt)
     scored_matches: List[tuple[int, Dict[str, Any]]] = []
     if keywords or focused_project_ids:
+        # Candidates come from the in-memory entity index (task titles + note text)
+        # plus the nearest-deadline tasks of focused projects, not a fixed DB slice.
+        relevance = rank_tasks_for_prompt(db, user_id, user_prompt, k=MATCH_CANDIDATE_LIMIT) if keywords else {}
+        candidate_rows = []
+        if relevance:
+            candidate_rows.extend(
+                tasks_with_projects_query.filter(DbTask.id.in_(list(relevance))).all()
+            )
+        if focused_project_ids:
+            candidate_rows.extend(
+                tasks_with_projects_query
+                .filter(DbTask.proj_id.in_(focused_project_ids))
+                .order_by(DbTask.deadline.is_(None), DbTask.deadline.asc(), DbTask.id.desc())
+                .limit(MATCH_CANDIDATE_LIMIT)
+                .all()
+            )
+        best_relevance = max(relevance.values(), default=0.0)
+        seen_task_ids: set[int] = set()
         for task, project_name in candidate_rows:
+            if task.id in seen_task_ids:
+                continue
+            seen_task_ids.add(task.id)
             score = _task_match_score(
                 task=task,
                 project_name=project_name or "",
@@ -359,6 +537,8 @@ def build_planner_snapshot(
                 focused_project_ids=focused_project_ids,
                 now=now,
             )
+            if best_relevance:
+                score += round(6 * relevance.get(task.id, 0.0) / best_relevance)
             if score <= 0:
                 continue
             scored_matches.append((score, _serialize_task(task, project_name)))
@@ -373,39 +553,6 @@ def build_planner_snapshot(
     )
     matched_entities = [entity for _, entity in scored_matches[:8]]
 
-    urgent_tasks = [_serialize_task(task, project_name) for task, project_name in urgent_rows]
-    upcoming_tasks = [_serialize_task(task, project_name) for task, project_name in deadline_rows]
-
-    reminders = [
-        {
-            "id": reminder.id,
-            "note": reminder.note,
-            "when": reminder.when.isoformat(),
-        }
-        for reminder in upcoming_reminders
-    ]
-
-    recent_activity = [
-        {
-            "id": activity.id,
-            "task_title": task_title,
-            "status": activity.status,
-            "clock_in": activity.clock_in.isoformat() if activity.clock_in else None,
-            "clock_out": activity.clock_out.isoformat() if activity.clock_out else None,
-            "description": (activity.description or "").strip()[:120],
-        }
-        for activity, task_title in activity_rows
-    ]
-
-    active_projects = [
-        {
-            "id": project_id,
-            "name": project_name,
-            "open_task_count": int(task_count or 0),
-        }
-        for project_id, project_name, task_count in project_rows
-    ]
-
     focus_score = 0
     if totals["tasks"]:
         focus_score = round((totals["done_tasks"] / totals["tasks"]) * 100)
@@ -418,7 +565,7 @@ def build_planner_snapshot(
         focus_score=focus_score,
     )
 
-    sections: List[str] = [
+    header_lines: List[str] = [
         "Planner snapshot:",
         (
             f"- Totals: {totals['projects']} projects, {totals['tasks']} tasks "
@@ -426,65 +573,68 @@ def build_planner_snapshot(
         ),
         f"- Focus score: {focus_score}%.",
     ]
-    if focused_projects:
-        sections.append(
-            f"- Project mode: {mode}. Project focus detected in prompt: "
-            + "; ".join(project["name"] for project in focused_projects)
-            + "."
-        )
-
-    if active_projects:
-        sections.append(
-            "- Active projects: "
-            + "; ".join(
-                f"{project['name']} ({project['open_task_count']} open)" for project in active_projects[:5]
-            )
-            + "."
-        )
-
-    if matched_entities:
-        sections.append(
-            "- Prompt-matched tasks: "
-            + "; ".join(
-                f"#{item['id']} {item['title'][:48]}" for item in matched_entities[:5]
-            )
-            + "."
-        )
-
-    if urgent_tasks:
-        sections.append(
-            "- Urgent tasks: "
-            + "; ".join(
+    # Each section keeps every candidate item; display_limit applies to the full
+    # context_block, while the token packer in build_compact_context may use more or fewer.
+    snapshot_sections: List[Dict[str, Any]] = [
+        {
+            "key": "focused_projects",
+            "label": f"Project mode: {mode}. Project focus detected in prompt",
+            "items": [project["name"] for project in focused_projects],
+            "display_limit": len(focused_projects),
+        },
+        {
+            "key": "active_projects",
+            "label": "Active projects",
+            "items": [
+                f"{project['name']} ({project['open_task_count']} open)" for project in active_projects
+            ],
+            "display_limit": 5,
+        },
+        {
+            "key": "matched_entities",
+            "label": "Prompt-matched tasks",
+            "items": [f"#{item['id']} {item['title'][:48]}" for item in matched_entities],
+            "display_limit": 5,
+        },
+        {
+            "key": "urgent_tasks",
+            "label": "Urgent tasks",
+            "items": [
                 f"#{item['id']} {item['title'][:45]} (due {_format_dt(datetime.fromisoformat(item['deadline'])) if item['deadline'] else 'No deadline'})"
-                for item in urgent_tasks[:5]
-            )
-            + "."
-        )
-
-    if reminders:
-        sections.append(
-            "- Upcoming reminders: "
-            + "; ".join(
+                + (f" blocked by {', '.join(f'#{blocker}' for blocker in item['blocked_by'])}" if item.get("blocked_by") else "")
+                for item in urgent_tasks
+            ],
+            "display_limit": 5,
+        },
+        {
+            "key": "reminders",
+            "label": "Upcoming reminders",
+            "items": [
                 f"{item['note'][:40]} at {_format_dt(datetime.fromisoformat(item['when']))}"
-                for item in reminders[:4]
-            )
-            + "."
-        )
+                for item in reminders
+            ],
+            "display_limit": 4,
+        },
+        {
+            "key": "recent_activity",
+            "label": "Recent activity",
+            "items": [
+                f"{item['task_title'][:36]} ({item['status']})" for item in recent_activity
+            ],
+            "display_limit": 4,
+        },
+        {
+            "key": "smart_actions",
+            "label": "Suggested execution strategy",
+            "items": list(smart_actions),
+            "display_limit": 3,
+        },
+    ]
 
-    if recent_activity:
-        sections.append(
-            "- Recent activity: "
-            + "; ".join(
-                f"{item['task_title'][:36]} ({item['status']})"
-                for item in recent_activity[:4]
-            )
-            + "."
-        )
-    if smart_actions:
-        sections.append(
-            "- Suggested execution strategy: "
-            + " | ".join(smart_actions[:3])
-        )
+    sections: List[str] = list(header_lines)
+    for section in snapshot_sections:
+        if section["items"]:
+            sections.append(render_snapshot_section(section, section["items"][: section["display_limit"]]))
 
     context_block = "\n".join(sections)
 
@@ -506,10 +656,38 @@ def build_planner_snapshot(
         "keywords": keywords,
         "smart_actions": smart_actions,
         "context_block": context_block,
+        "context_header": "\n".join(header_lines),
+        "context_sections": snapshot_sections,
         "matched_entities_count": len(matched_entities),
+        "snapshot_cached": snapshot_cached,
     }
 
 
+def _pack_items(items: List[str], budget: int, label: str = "") -> tuple[List[str], int]:
+    """Greedily keep whole items in priority order until the token budget is spent."""
+    used = count_tokens(label) if label else 0
+    if used >= budget:
+        return [], 0
+    kept: List[str] = []
+    for item in items:
+        cost = count_tokens(item) + 1  # +1 for the separator
+        if used + cost > budget:
+            break
+        kept.append(item)
+        used += cost
+    return kept, (used if kept else 0)
+
+
+def resolve_prompt_layout(layout: str | None) -> str:
+    layout = (layout or DEFAULT_PROMPT_LAYOUT or "default").strip().lower()
+    return layout if layout in PROMPT_LAYOUTS else "default"
+
+
+def prompt_prefix_fingerprint(*parts: str) -> str:
+    """Short hash of the leading prompt text; equal values mean a reusable cached prefix."""
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
 def build_compact_context(
     db: Session,
     user_id: int,
@@ -518,13 +696,17 @@ def build_compact_context(
     incoming_history: List[Dict[str, str]] | None = None,
     project_mode: str = "auto",
     focus_project_id: int | None = None,
+    token_budget: int | None = None,
+    layout: str | None = None,
 ) -> Dict[str, Any]:
-    memory = get_or_create_memory(db, user_id, mode)
-    stored_history = _safe_json_loads(memory.recent_history or "[]", [])
+    layout = resolve_prompt_layout(layout)
+    budget = token_budget or DEFAULT_CONTEXT_TOKENS
+    memory = load_memory_state(db, user_id, mode)
+    stored_history = memory["recent_history"]
     incoming_history = incoming_history or []
 
     merged: List[Dict[str, str]] = (stored_history + incoming_history)[-MAX_HISTORY_ITEMS:]
-    compact_prompt = _compact_prompt(user_prompt)
+    compact_prompt = _compact_prompt(user_prompt, max_tokens=budget // 2)
     planner_snapshot = build_planner_snapshot(
         db=db,
         user_id=user_id,
@@ -533,63 +715,122 @@ def build_compact_context(
         focus_project_id=focus_project_id,
     )
 
-    conversation_blob = _summarize_turns(merged, max_chars=3200)
-    summary_blob = (memory.summary or "").strip()
-
-    context = (
-        f"Long-term memory summary:\n{summary_blob or 'No long-term memory yet.'}\n\n"
-        f"Recent conversation (compact):\n{conversation_blob or 'No recent turns.'}\n\n"
-        f"{planner_snapshot['context_block']}\n\n"
+    instruction = (
         "Instruction: Ground every recommendation in the planner snapshot. "
         "When possible, cite task IDs and project names explicitly. "
-        "Structure the answer as: Situation, Priorities, Next 3 actions, and Timeboxing.\n\n"
+        "Structure the answer as: Situation, Priorities, Next 3 actions, and Timeboxing."
+    )
+    # The request, instruction and snapshot totals are always sent; everything else
+    # is packed by whole items in priority order into what is left of the budget.
+    remaining = budget - count_tokens(
+        "Long-term memory summary:\n\nRecent conversation (compact):\n\n"
+        f"{planner_snapshot['context_header']}\n\n{instruction}\n\n"
         f"Current user request:\n{compact_prompt}"
     )
+    sections = {section["key"]: section for section in planner_snapshot["context_sections"]}
+    packed: Dict[str, List[str]] = {}
+    dropped = compact_prompt != user_prompt.strip()
+
+    def _pack_section(key: str) -> None:
+        nonlocal remaining, dropped
+        section = sections.get(key)
+        if not section or not section["items"]:
+            return
+        kept, used = _pack_items(section["items"], remaining, label=f"- {section['label']}: ")
+        packed[key] = kept
+        remaining -= used
+        dropped = dropped or len(kept) < len(section["items"])
+
+    for key in ("urgent_tasks", "matched_entities"):
+        _pack_section(key)
+
+    # Newest turns first so the most recent exchange survives a tight budget.
+    turn_lines = [_format_turn(item) for item in merged]
+    turn_lines = [line for line in turn_lines if line]
+    kept_turns, used = _pack_items(list(reversed(turn_lines)), remaining)
+    remaining -= used
+    dropped = dropped or len(kept_turns) < len(turn_lines)
+    conversation_blob = "\n".join(reversed(kept_turns))
+
+    summary_lines = [line for line in (memory["summary"] or "").strip().splitlines() if line.strip()]
+    kept_summary, used = _pack_items(summary_lines, remaining)
+    remaining -= used
+    dropped = dropped or len(kept_summary) < len(summary_lines)
+    summary_blob = "\n".join(kept_summary)
+
+    for key in ("focused_projects", "active_projects", "reminders", "recent_activity", "smart_actions"):
+        _pack_section(key)
+
+    summary_text = f"Long-term memory summary:\n{summary_blob or 'No long-term memory yet.'}"
+    conversation_text = f"Recent conversation (compact):\n{conversation_blob or 'No recent turns.'}"
+    request_text = f"Current user request:\n{compact_prompt}"
+
+    def _rendered(keys) -> List[str]:
+        return [
+            render_snapshot_section(sections[key], packed[key]) for key in keys if packed.get(key)
+        ]
+
+    if layout == "stable":
+        snapshot_text = "\n".join([planner_snapshot["context_header"]] + _rendered(STABLE_SNAPSHOT_KEYS))
+        stable_prefix = f"{instruction}\n\n{snapshot_text}\n\n{summary_text}"
+        scoped_lines = _rendered(PROMPT_SCOPED_KEYS)
+        scoped_text = ("Relevant to this request:\n" + "\n".join(scoped_lines) + "\n\n") if scoped_lines else ""
+        context = f"{stable_prefix}\n\n{conversation_text}\n\n{scoped_text}{request_text}"
+    else:
+        ordered_keys = [section["key"] for section in planner_snapshot["context_sections"]]
+        snapshot_text = "\n".join([planner_snapshot["context_header"]] + _rendered(ordered_keys))
+        stable_prefix = summary_text
+        context = f"{summary_text}\n\n{conversation_text}\n\n{snapshot_text}\n\n{instruction}\n\n{request_text}"
 
-    if len(context) > MAX_CONTEXT_CHARS:
-        # Reduce aggressively while preserving latest request and highest-value planner info.
-        short_conversation = _summarize_turns(merged[-6:], max_chars=1300)
-        short_summary = summary_blob[:900]
-        compact_snapshot = planner_snapshot["context_block"][:2600]
-        context = (
-            f"Memory summary:\n{short_summary or 'No memory summary.'}\n\n"
-            f"Recent conversation:\n{short_conversation or 'No recent turns.'}\n\n"
-            f"Planner snapshot:\n{compact_snapshot}\n\n"
-            f"Current request:\n{compact_prompt}"
-        )
-
-    estimated_tokens = _estimate_tokens(context)
     return {
         "context_text": context,
-        "memory_row": memory,
+        "layout": layout,
+        "snapshot_cached": planner_snapshot["snapshot_cached"],
+        "stable_prefix": stable_prefix,
+        "prefix_tokens": count_tokens(stable_prefix),
+        "memory": memory,
         "merged_history": merged,
-        "estimated_tokens": estimated_tokens,
-        "compacted": len(context) >= COMPACT_TARGET_CHARS,
+        "estimated_tokens": count_tokens(context),
+        "token_budget": budget,
+        "compacted": dropped,
         "planner_snapshot": planner_snapshot,
     }
 
 
 def update_memory_after_response(
     db: Session,
-    memory: AssistantMemory,
-    merged_history: List[Dict[str, str]],
+    memory: Dict[str, Any],
     user_prompt: str,
     assistant_response: str,
+    model_api_key: str | None = None,
 ) -> None:
-    updated_history = (
-        merged_history
-        + [{"role": "user", "content": user_prompt}]
-        + [{"role": "assistant", "content": assistant_response}]
-    )[-MAX_HISTORY_ITEMS:]
-
-    previous_summary = (memory.summary or "").strip()
-    recent_summary = _summarize_turns(updated_history[-8:], max_chars=1400)
-    memory.summary = (
-        f"{previous_summary}\n{recent_summary}".strip()[-2600:]
-        if previous_summary
-        else recent_summary
+    # Summaries are folded by the background summarizer (core.assistant_summarizer), never here.
+    # Both turns take their seq from max(seq) inside one INSERT ... SELECT, which SQLite
+    # runs under the write lock, so overlapping requests for the same user append one
+    # pair after the other instead of colliding on uq_assistant_turns_owner_mode_seq.
+    last_seq = func.coalesce(
+        select(func.max(AssistantTurn.seq))
+        .where(AssistantTurn.owner == memory["owner"], AssistantTurn.mode == memory["mode"])
+        .scalar_subquery(),
+        0,
+    )
+    now = datetime.utcnow()
+
+    def turn(offset: int, role: str, content: str):
+        return select(
+            literal(memory["owner"]),
+            literal(memory["mode"]),
+            last_seq + offset,
+            literal(role),
+            literal(content),
+            literal(model_api_key),
+            literal(now),
+        )
+
+    db.execute(
+        insert(AssistantTurn).from_select(
+            ["owner", "mode", "seq", "role", "content", "model_api_key", "created_at"],
+            union_all(turn(1, "user", user_prompt), turn(2, "assistant", assistant_response)),
+        )
     )
-    memory.recent_history = json.dumps(updated_history, ensure_ascii=True)
-    memory.updated_at = datetime.utcnow()
-    db.add(memory)
     db.commit()
@@ -0,0 +1,48 @@
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models.assistant_events import AssistantEvent
+
+
+def assistant_event_values(
+    user_id: int,
+    event_type: str,
+    source: str = "assistant",
+    action_type: Optional[str] = None,
+    status: Optional[str] = None,
+    metadata: Optional[Dict[str, object]] = None,
+) -> Dict[str, object]:
+    return {
+        "owner": user_id,
+        "event_type": (event_type or "unknown").strip().lower(),
+        "source": (source or "assistant").strip().lower(),
+        "action_type": (action_type.strip().lower() if action_type else None),
+        "status": (status.strip().lower() if status else None),
+        "payload": json.dumps(metadata or {}, ensure_ascii=True),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def log_assistant_event(
+    db: Session,
+    user_id: int,
+    event_type: str,
+    source: str = "assistant",
+    action_type: Optional[str] = None,
+    status: Optional[str] = None,
+    metadata: Optional[Dict[str, object]] = None,
+) -> None:
+    event = AssistantEvent(
+        **assistant_event_values(
+            user_id=user_id,
+            event_type=event_type,
+            source=source,
+            action_type=action_type,
+            status=status,
+            metadata=metadata,
+        )
+    )
+    db.add(event)
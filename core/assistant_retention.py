@@ -0,0 +1,105 @@
+import os
+from datetime import datetime, time, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.assistant_event_rollups import AssistantEventDaily
+from models.assistant_events import AssistantEvent
+
+# Raw events older than this many days are folded into daily rollups and deleted.
+ASSISTANT_EVENT_RETENTION_DAYS = max(1, int(os.environ.get("ASSISTANT_EVENT_RETENTION_DAYS", "30")))
+ASSISTANT_EVENT_COMPACTION_INTERVAL_SECONDS = 6 * 3600
+
+EventKey = Tuple[str, str, str]
+
+
+def _retention_cutoff(now: datetime, retention_days: int) -> datetime:
+    # Only whole days are compacted so a day is either fully raw or fully rolled up.
+    return datetime.combine((now - timedelta(days=max(1, retention_days))).date(), time.min)
+
+
+def compact_assistant_events(
+    db: Session,
+    retention_days: int = ASSISTANT_EVENT_RETENTION_DAYS,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """
+    Fold raw events from before the retention cutoff into daily rollups and
+    delete them. The upsert reads and folds the rows in one INSERT ... SELECT and
+    the delete runs in the same write transaction, so an overlapping run waits
+    for this one and then finds nothing left to fold.
+    """
+    cutoff = _retention_cutoff(now or datetime.utcnow(), retention_days)
+    day_expr = func.date(AssistantEvent.created_at)
+    action_expr = func.coalesce(AssistantEvent.action_type, "")
+    status_expr = func.coalesce(AssistantEvent.status, "")
+
+    grouped = (
+        select(
+            AssistantEvent.owner,
+            day_expr,
+            AssistantEvent.event_type,
+            action_expr,
+            status_expr,
+            func.count(AssistantEvent.id),
+        )
+        .where(AssistantEvent.created_at < cutoff)
+        .group_by(AssistantEvent.owner, day_expr, AssistantEvent.event_type, action_expr, status_expr)
+    )
+    stmt = sqlite_insert(AssistantEventDaily).from_select(
+        ["owner", "day", "event_type", "action_type", "status", "count"], grouped
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner", "day", "event_type", "action_type", "status"],
+        set_={"count": AssistantEventDaily.count + stmt.excluded.count},
+    )
+    rolled_up = db.execute(stmt).rowcount
+
+    deleted = (
+        db.query(AssistantEvent)
+        .filter(AssistantEvent.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return {"rolled_up_groups": int(rolled_up or 0), "deleted_events": int(deleted or 0)}
+
+
+def count_assistant_events(db: Session, user_id: int, since: datetime) -> Dict[EventKey, int]:
+    """
+    Event counts keyed by (event_type, action_type, status) since the start of
+    the day ``since`` falls on, merging raw rows with daily rollups of
+    already-compacted days. Rollups only hold whole days, so both sources start
+    at the same midnight and a partly compacted window is never double-counted.
+    """
+    since = datetime.combine(since.date(), time.min)
+    counts: Dict[EventKey, int] = {}
+
+    raw_rows = (
+        db.query(
+            AssistantEvent.event_type,
+            AssistantEvent.action_type,
+            AssistantEvent.status,
+            func.count(AssistantEvent.id),
+        )
+        .filter(AssistantEvent.owner == user_id, AssistantEvent.created_at >= since)
+        .group_by(AssistantEvent.event_type, AssistantEvent.action_type, AssistantEvent.status)
+        .all()
+    )
+    rollup_rows = (
+        db.query(
+            AssistantEventDaily.event_type,
+            AssistantEventDaily.action_type,
+            AssistantEventDaily.status,
+            func.sum(AssistantEventDaily.count),
+        )
+        .filter(AssistantEventDaily.owner == user_id, AssistantEventDaily.day >= since.date())
+        .group_by(AssistantEventDaily.event_type, AssistantEventDaily.action_type, AssistantEventDaily.status)
+        .all()
+    )
+    for event_type, action_type, status, count in list(raw_rows) + list(rollup_rows):
+        key = (event_type, action_type or "", status or "")
+        counts[key] = counts.get(key, 0) + int(count or 0)
+    return counts
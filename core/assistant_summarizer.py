@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from core.assistant_context import MAX_HISTORY_ITEMS, _summarize_turns
+from core.llm_stream import stream_openai_compatible_completion
+from models.assistant_memory import AssistantMemorySummary, AssistantTurn
+from models.models import Model
+
+logger = logging.getLogger(__name__)
+
+# Fold once at least this many turns have aged out of the recent window.
+SUMMARY_FOLD_TURNS = 8
+MAX_SUMMARY_CHARS = 2600
+MAX_FOLDS_PER_RUN = 20
+SUMMARY_JOB_INTERVAL_SECONDS = 120
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain the long-term memory of a personal planning assistant. "
+    "Merge the existing memory with the new conversation turns into one compact summary. "
+    "Keep durable facts only: goals, commitments, preferences, decisions, named projects and task IDs. "
+    "Drop greetings, repeated advice and anything already resolved. "
+    "Answer with plain bullet points, at most 1200 characters."
+)
+
+
+def _pending_folds(db: Session) -> List[Dict[str, Any]]:
+    tails = (
+        db.query(AssistantTurn.owner, AssistantTurn.mode, func.max(AssistantTurn.seq))
+        .group_by(AssistantTurn.owner, AssistantTurn.mode)
+        .all()
+    )
+    covered = {
+        (owner, mode): int(through or 0)
+        for owner, mode, through in (
+            db.query(
+                AssistantMemorySummary.owner,
+                AssistantMemorySummary.mode,
+                func.max(AssistantMemorySummary.covers_through_seq),
+            )
+            .group_by(AssistantMemorySummary.owner, AssistantMemorySummary.mode)
+            .all()
+        )
+    }
+    pending = []
+    for owner, mode, last_seq in tails:
+        window_start = int(last_seq or 0) - MAX_HISTORY_ITEMS
+        if window_start - covered.get((owner, mode), 0) >= SUMMARY_FOLD_TURNS:
+            pending.append({"owner": owner, "mode": mode, "fold_through_seq": window_start})
+    return pending[:MAX_FOLDS_PER_RUN]
+
+
+def _generate_summary(model: Model, previous_summary: str, turns: List[Dict[str, str]]) -> str:
+    transcript = "\n".join(
+        f"{'User' if item['role'] == 'user' else 'Assistant'}: {item['content'][:1200]}"
+        for item in turns
+    )
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Existing memory:\n{previous_summary or 'None yet.'}\n\n"
+                f"New conversation turns:\n{transcript}\n\n"
+                "Updated memory:"
+            ),
+        },
+    ]
+
+    async def _collect() -> str:
+        pieces = []
+        async for piece in stream_openai_compatible_completion(model=model, messages=messages, temperature=0.0):
+            pieces.append(piece)
+        return "".join(pieces).strip()
+
+    # Runs in a background worker thread, so it owns a private event loop.
+    return asyncio.run(_collect())
+
+
+def fold_memory_summary(db: Session, owner: int, mode: str, fold_through_seq: int) -> bool:
+    latest = (
+        db.query(AssistantMemorySummary)
+        .filter(AssistantMemorySummary.owner == owner, AssistantMemorySummary.mode == mode)
+        .order_by(AssistantMemorySummary.version.desc())
+        .first()
+    )
+    summarized_through = latest.covers_through_seq if latest else 0
+    if fold_through_seq <= summarized_through:
+        return False
+
+    aged_rows = (
+        db.query(AssistantTurn.role, AssistantTurn.content, AssistantTurn.model_api_key)
+        .filter(
+            AssistantTurn.owner == owner,
+            AssistantTurn.mode == mode,
+            AssistantTurn.seq > summarized_through,
+            AssistantTurn.seq <= fold_through_seq,
+        )
+        .order_by(AssistantTurn.seq.asc())
+        .all()
+    )
+    turns = [{"role": row.role, "content": row.content or ""} for row in aged_rows]
+    previous_summary = (latest.summary if latest else "").strip()
+
+    summary = ""
+    model_api_key = next((row.model_api_key for row in reversed(aged_rows) if row.model_api_key), None)
+    model = (
+        db.query(Model).filter(Model.api_key == model_api_key, Model.owner == owner).first()
+        if model_api_key
+        else None
+    )
+    if model is not None:
+        try:
+            summary = _generate_summary(model, previous_summary, turns)[:MAX_SUMMARY_CHARS]
+        except Exception as exc:
+            logger.warning("LLM memory summary failed for user %s (%s): %s", owner, mode, getattr(exc, "detail", exc))
+
+    if not summary:
+        # Extractive fallback keeps the window moving when no model is reachable.
+        aged_summary = _summarize_turns(turns, max_chars=1400)
+        summary = (
+            f"{previous_summary}\n{aged_summary}".strip()[-MAX_SUMMARY_CHARS:]
+            if previous_summary
+            else aged_summary
+        )
+
+    db.add(
+        AssistantMemorySummary(
+            owner=owner,
+            mode=mode,
+            version=(latest.version if latest else 0) + 1,
+            summary=summary,
+            covers_through_seq=fold_through_seq,
+        )
+    )
+    db.commit()
+    return True
+
+
+def summarize_pending_memories(db: Session) -> Dict[str, int]:
+    folded = 0
+    for item in _pending_folds(db):
+        try:
+            if fold_memory_summary(db, item["owner"], item["mode"], item["fold_through_seq"]):
+                folded += 1
+        except Exception:
+            db.rollback()
+            logger.exception("Memory summary fold failed for user %s (%s)", item["owner"], item["mode"])
+    return {"folded": folded}
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from typing import Callable, List
+
+from core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_running_jobs: List[asyncio.Task] = []
+
+
+async def _run_periodic(name: str, job: Callable, interval_seconds: float, initial_delay: float) -> None:
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await asyncio.to_thread(_run_with_session, job)
+        except Exception:
+            logger.exception("Background job %s failed", name)
+        await asyncio.sleep(interval_seconds)
+
+
+def _run_with_session(job: Callable) -> None:
+    db = SessionLocal()
+    try:
+        job(db)
+    finally:
+        db.close()
+
+
+def start_periodic_job(
+    name: str,
+    job: Callable,
+    interval_seconds: float,
+    initial_delay: float = 30.0,
+) -> None:
+    """
+    Run ``job(db)`` in a worker thread every ``interval_seconds`` with its own
+    DB session. Must be called from a running event loop (app startup).
+    """
+    task = asyncio.get_running_loop().create_task(
+        _run_periodic(name, job, interval_seconds, initial_delay),
+        name=name,
+    )
+    _running_jobs.append(task)
+
+
+async def stop_background_jobs() -> None:
+    for task in _running_jobs:
+        task.cancel()
+    await asyncio.gather(*_running_jobs, return_exceptions=True)
+    _running_jobs.clear()
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.assistant_briefing import generate_daily_briefing
+from core.database import SessionLocal
+from core.response_cache import BRIEFING_CACHE_TTL_SECONDS
+from core.timezone import get_user_now
+from models.briefing_schedule import BriefingSchedule
+from models.models import Model
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Opted-in users get their "today" briefing generated ahead of their local start
+# time, each in a stable slot spread over the preceding window, so the morning
+# rush is served from the response cache instead of the model server.
+BRIEFING_SCHEDULER_INTERVAL_SECONDS = 300
+BRIEFING_PREGEN_WINDOW_MINUTES = 90
+# Past this much after the briefing time the user has most likely asked already.
+BRIEFING_PREGEN_GRACE_MINUTES = 120
+BRIEFING_PREGEN_CONCURRENCY = max(1, int(os.environ.get("BRIEFING_PREGEN_CONCURRENCY", "2")))
+MAX_PREGEN_PER_RUN = 50
+DEFAULT_BRIEFING_TIME = "07:30"
+
+PregenJob = Tuple[int, date, int]  # owner, local date, cache ttl seconds
+
+
+def parse_local_time(value: str) -> time:
+    """Parse an ``HH:MM`` briefing time; raises ValueError for anything else."""
+    hours, _, minutes = (value or "").strip().partition(":")
+    if not (hours.isdigit() and minutes.isdigit() and len(minutes) == 2):
+        raise ValueError(f"Invalid briefing time: {value!r}")
+    return time(int(hours), int(minutes))
+
+
+def _pregen_slot(owner: int, day: date, target: time) -> datetime:
+    start = datetime.combine(day, target)
+    offset = int(hashlib.sha1(str(owner).encode("ascii")).hexdigest(), 16) % BRIEFING_PREGEN_WINDOW_MINUTES
+    # Never before local midnight: the cached briefing is keyed on the local date.
+    return max(start - timedelta(minutes=BRIEFING_PREGEN_WINDOW_MINUTES - offset), datetime.combine(day, time.min))
+
+
+def _due_jobs(db: Session) -> List[PregenJob]:
+    rows = (
+        db.query(BriefingSchedule, User.timezone)
+        .join(User, User.id == BriefingSchedule.owner)
+        # The cached briefing is keyed on the model, so a schedule without one would
+        # warm an entry nobody reads; it gets its model from the next briefing request.
+        .filter(BriefingSchedule.enabled.is_(True), BriefingSchedule.model_api_key.isnot(None))
+        .all()
+    )
+    jobs: List[PregenJob] = []
+    for schedule, timezone_name in rows:
+        local_now = get_user_now(timezone_name).replace(tzinfo=None)
+        today = local_now.date()
+        if schedule.last_generated_on == today:
+            continue
+        try:
+            target = parse_local_time(schedule.local_time or DEFAULT_BRIEFING_TIME)
+        except ValueError:
+            continue
+        slot = _pregen_slot(schedule.owner, today, target)
+        if not slot <= local_now < datetime.combine(today, target) + timedelta(minutes=BRIEFING_PREGEN_GRACE_MINUTES):
+            continue
+        # Keep the briefing until the end of the local day.
+        end_of_day = datetime.combine(today + timedelta(days=1), time.min)
+        ttl = max(BRIEFING_CACHE_TTL_SECONDS, int((end_of_day - local_now).total_seconds()))
+        jobs.append((schedule.owner, today, ttl))
+    return jobs[:MAX_PREGEN_PER_RUN]
+
+
+def _resolve_model(db: Session, schedule: BriefingSchedule) -> Optional[Model]:
+    return (
+        db.query(Model)
+        .filter(Model.owner == schedule.owner, Model.api_key == schedule.model_api_key)
+        .first()
+    )
+
+
+def _pregenerate_one(job: PregenJob) -> bool:
+    owner, day, ttl = job
+    db = SessionLocal()
+    try:
+        schedule = db.query(BriefingSchedule).filter(BriefingSchedule.owner == owner).first()
+        user = db.query(User).filter(User.id == owner).first()
+        if schedule is None or user is None:
+            return False
+        model = _resolve_model(db, schedule)
+        ok = False
+        if model is not None:
+            try:
+                generate_daily_briefing(
+                    db,
+                    user,
+                    model,
+                    horizon="today",
+                    project_mode=schedule.project_mode or "auto",
+                    source="briefing_scheduler",
+                    ttl_seconds=ttl,
+                )
+                ok = True
+            except Exception as exc:
+                db.rollback()
+                logger.warning("Briefing pre-generation failed for user %s: %s", owner, getattr(exc, "detail", exc))
+        # Marked even on failure: one attempt per day, the endpoint still generates on demand.
+        schedule.last_generated_on = day
+        db.commit()
+        return ok
+    finally:
+        db.close()
+
+
+def pregenerate_due_briefings(db: Session) -> Dict[str, int]:
+    jobs = _due_jobs(db)
+    if not jobs:
+        return {"due": 0, "generated": 0}
+    with ThreadPoolExecutor(max_workers=BRIEFING_PREGEN_CONCURRENCY, thread_name_prefix="briefing-pregen") as pool:
+        results = list(pool.map(_pregenerate_one, jobs))
+    return {"due": len(jobs), "generated": sum(1 for ok in results if ok)}
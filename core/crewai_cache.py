@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from core.crewai_env import load_crewai
+from models.models import Model
+
+logger = logging.getLogger(__name__)
+
+# CrewAI LLM clients and agents are reused across requests; only the Task and
+# Crew that bind per-request inputs are built each time. Agents keep execution
+# state while a crew runs, so each is checked out by one request at a time.
+MAX_CACHED_LLMS = 32
+MAX_AGENT_KEYS = 64
+MAX_IDLE_AGENTS_PER_KEY = 4
+
+LlmKey = Tuple[str, str, str, float]
+AgentKey = Tuple[str, str, str, str, str]
+
+_lock = threading.Lock()
+_llms: "OrderedDict[LlmKey, Tuple[Any, float]]" = OrderedDict()
+_idle_agents: "OrderedDict[AgentKey, List[Any]]" = OrderedDict()
+_agent_build_seconds: Dict[AgentKey, float] = {}
+_stats = {
+    "llm_hits": 0,
+    "llm_builds": 0,
+    "agent_hits": 0,
+    "agent_builds": 0,
+    "build_seconds": 0.0,
+    "saved_seconds": 0.0,
+}
+
+
+def _llm_key(model: Model, temperature: float) -> LlmKey:
+    return (model.api_key, model.base_url, model.name, float(temperature))
+
+
+def _agent_key(model: Model, role: str, goal: str, backstory: str) -> AgentKey:
+    definition = hashlib.sha1(f"{goal}\n{backstory}".encode("utf-8")).hexdigest()
+    return (model.api_key, model.base_url, model.name, role, definition)
+
+
+def get_llm(model: Model, temperature: float = 0.2) -> Any:
+    key = _llm_key(model, temperature)
+    with _lock:
+        cached = _llms.get(key)
+        if cached is not None:
+            _llms.move_to_end(key)
+            _stats["llm_hits"] += 1
+            _stats["saved_seconds"] += cached[1]
+            return cached[0]
+
+    started = time.perf_counter()
+    llm = load_crewai().LLM(
+        model=model.name,
+        base_url=model.base_url,
+        api_key=model.api_key,
+        temperature=temperature,
+    )
+    elapsed = time.perf_counter() - started
+    with _lock:
+        _llms[key] = (llm, elapsed)
+        _llms.move_to_end(key)
+        while len(_llms) > MAX_CACHED_LLMS:
+            _llms.popitem(last=False)
+        _stats["llm_builds"] += 1
+        _stats["build_seconds"] += elapsed
+    return llm
+
+
+@contextmanager
+def checkout_agent(model: Model, role: str, goal: str, backstory: str, temperature: float = 0.2) -> Iterator[Any]:
+    """Borrow a reusable agent for (model, role); it goes back to the pool afterwards."""
+    key = _agent_key(model, role, goal, backstory)
+    agent = None
+    with _lock:
+        idle = _idle_agents.get(key)
+        if idle:
+            agent = idle.pop()
+            _idle_agents.move_to_end(key)
+            _stats["agent_hits"] += 1
+            _stats["saved_seconds"] += _agent_build_seconds.get(key, 0.0)
+
+    if agent is None:
+        started = time.perf_counter()
+        agent = load_crewai().Agent(
+            role=role,
+            goal=goal,
+            backstory=backstory,
+            allow_delegation=False,
+            llm=get_llm(model, temperature),
+            verbose=False,
+        )
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _agent_build_seconds[key] = elapsed
+            _stats["agent_builds"] += 1
+            _stats["build_seconds"] += elapsed
+        logger.info("Built CrewAI agent %r for model %s in %.1f ms", role, model.name, elapsed * 1000)
+
+    try:
+        yield agent
+    finally:
+        with _lock:
+            idle = _idle_agents.setdefault(key, [])
+            _idle_agents.move_to_end(key)
+            if len(idle) < MAX_IDLE_AGENTS_PER_KEY:
+                idle.append(agent)
+            while len(_idle_agents) > MAX_AGENT_KEYS:
+                evicted, _ = _idle_agents.popitem(last=False)
+                _agent_build_seconds.pop(evicted, None)
+
+
+def crewai_cache_stats() -> Dict[str, object]:
+    with _lock:
+        return {
+            **{name: value for name, value in _stats.items() if not name.endswith("_seconds")},
+            "build_ms": round(_stats["build_seconds"] * 1000, 1),
+            "saved_ms": round(_stats["saved_seconds"] * 1000, 1),
+            "cached_llms": len(_llms),
+            "idle_agents": sum(len(idle) for idle in _idle_agents.values()),
+        }
+
+
+def clear_crewai_cache() -> None:
+    with _lock:
+        _llms.clear()
+        _idle_agents.clear()
+        _agent_build_seconds.clear()
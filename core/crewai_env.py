@@ -1,4 +1,10 @@
 import os
+import threading
+from types import ModuleType
+from typing import Optional
+
+_crewai: Optional[ModuleType] = None
+_crewai_lock = threading.Lock()
 
 
 def disable_crewai_telemetry() -> None:
@@ -11,3 +17,19 @@ def disable_crewai_telemetry() -> None:
     os.environ["CREWAI_DISABLE_TRACKING"] = "true"
     os.environ["OTEL_TRACES_EXPORTER"] = "none"
 
+
+def load_crewai() -> ModuleType:
+    """
+    Import CrewAI on first use. It pulls in LangChain, LiteLLM and the OpenAI
+    SDK, which dominate startup time and memory, so routers must not import it
+    at module level.
+    """
+    global _crewai
+    if _crewai is None:
+        with _crewai_lock:
+            if _crewai is None:
+                disable_crewai_telemetry()
+                import crewai
+
+                _crewai = crewai
+    return _crewai
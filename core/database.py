@@ -60,3 +60,107 @@ def migrate_reminders_table_if_needed():
             conn.execute(text("CREATE INDEX IF NOT EXISTS ix_reminders_id ON reminders (id)"))
             conn.execute(text("PRAGMA foreign_keys=ON"))
 
+
+
+def migrate_models_table_if_needed():
+    with engine.begin() as conn:
+        rows = conn.execute(text("PRAGMA table_info(models)")).fetchall()
+        if rows and "context_window" not in {r[1] for r in rows}:
+            conn.execute(text("ALTER TABLE models ADD COLUMN context_window INTEGER NULL"))
+
+
+def migrate_assistant_turns_table_if_needed():
+    with engine.begin() as conn:
+        rows = conn.execute(text("PRAGMA table_info(assistant_turns)")).fetchall()
+        if rows and "model_api_key" not in {r[1] for r in rows}:
+            conn.execute(text("ALTER TABLE assistant_turns ADD COLUMN model_api_key VARCHAR NULL"))
+
+
+def migrate_assistant_memory_if_needed():
+    """Move legacy assistant_memory blobs into per-turn rows and a first summary version."""
+    import json
+    from datetime import datetime
+
+    with engine.begin() as conn:
+        legacy_rows = conn.execute(
+            text("SELECT id, owner, mode, summary, recent_history FROM assistant_memory")
+        ).fetchall()
+        for row_id, owner, mode, summary, recent_history in legacy_rows:
+            try:
+                history = json.loads(recent_history or "[]")
+            except Exception:
+                history = []
+            now = datetime.utcnow()
+            turns = [
+                {
+                    "owner": owner,
+                    "mode": mode,
+                    "seq": index,
+                    "role": str(item.get("role") or "user"),
+                    "content": str(item.get("content") or ""),
+                    "created_at": now,
+                }
+                for index, item in enumerate(
+                    (item for item in history if isinstance(item, dict)), start=1
+                )
+            ]
+            if turns:
+                conn.execute(
+                    text("""
+                        INSERT INTO assistant_turns (owner, mode, seq, role, content, created_at)
+                        VALUES (:owner, :mode, :seq, :role, :content, :created_at)
+                    """),
+                    turns,
+                )
+            if (summary or "").strip():
+                conn.execute(
+                    text("""
+                        INSERT INTO assistant_memory_summaries (owner, mode, version, summary, covers_through_seq, created_at)
+                        VALUES (:owner, :mode, 1, :summary, 0, :created_at)
+                    """),
+                    {"owner": owner, "mode": mode, "summary": summary.strip(), "created_at": now},
+                )
+            conn.execute(text("DELETE FROM assistant_memory WHERE id = :id"), {"id": row_id})
+
+
+def migrate_sync_columns_if_needed():
+    """Add the delta-sync version/updated_at columns to existing tables; run before migrate_indexes_if_needed()."""
+    with engine.begin() as conn:
+        for table in ("tasks", "projects", "activities", "reminders"):
+            cols = {r[1] for r in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+            if not cols:
+                continue
+            if "version" not in cols:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+            if "updated_at" not in cols:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME NULL"))
+        cols = {r[1] for r in conn.execute(text("PRAGMA table_info(planner_versions)")).fetchall()}
+        if cols and "sync_floor" not in cols:
+            conn.execute(text("ALTER TABLE planner_versions ADD COLUMN sync_floor INTEGER NOT NULL DEFAULT 0"))
+
+
+def migrate_indexes_if_needed():
+    """create_all() skips indexes of tables that already exist; add any missing ones for these models."""
+    from models.activity import Activity
+    from models.projects import Project
+    from models.reminders import Reminder
+    from models.tasks import Task
+
+    for model in (Task, Project, Activity, Reminder):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_task_closure_if_needed():
+    """Fill task_closure once for databases that had tasks before the table existed."""
+    from core.task_tree import rebuild_task_closure
+
+    with engine.connect() as conn:
+        has_rows = conn.execute(text("SELECT 1 FROM task_closure LIMIT 1")).first()
+        has_tasks = conn.execute(text("SELECT 1 FROM tasks LIMIT 1")).first()
+    if has_tasks and not has_rows:
+        db = SessionLocal()
+        try:
+            rebuild_task_closure(db)
+        finally:
+            db.close()
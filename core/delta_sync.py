@@ -0,0 +1,104 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+
+from models.activity import Activity
+from models.planner_version import PlannerVersion
+from models.projects import Project
+from models.reminders import Reminder
+from models.sync_tombstone import SyncTombstone
+from models.tasks import Task
+
+# Delta sync over the planner version: rows carry the version at which they last
+# changed and deletes leave tombstones, so "what changed since token N" is an
+# indexed range scan per entity type. The token is read before the rows; a write
+# landing in between is at worst sent again on the next sync.
+
+SYNC_ENTITY_TYPES = ("tasks", "projects", "activities", "reminders")
+TOMBSTONE_ENTITY = {"task": "tasks", "project": "projects", "activity": "activities", "reminder": "reminders"}
+
+# Tombstones older than this are pruned; clients whose token predates the prune
+# get a full resync instead of a delta.
+SYNC_TOMBSTONE_RETENTION_DAYS = max(1, int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", "30")))
+SYNC_TOMBSTONE_PRUNE_INTERVAL_SECONDS = 6 * 3600
+
+
+def get_changes(
+    db: Session,
+    user_id: int,
+    since: Optional[int],
+    entity_types: Iterable[str] = SYNC_ENTITY_TYPES,
+) -> Dict[str, object]:
+    """
+    Rows changed after token ``since`` plus the ids deleted since then, and the
+    token to send next time. Without a usable ``since`` (missing, pruned, or from
+    another database) every row is returned with ``full`` set.
+    """
+    wanted = [entity for entity in SYNC_ENTITY_TYPES if entity in set(entity_types)]
+    current = db.query(PlannerVersion.version, PlannerVersion.sync_floor).filter(PlannerVersion.owner == user_id).first()
+    token, floor = (int(current[0]), int(current[1] or 0)) if current else (0, 0)
+    # Rows that predate sync tracking sit at version 0, so token 0 always means a full download.
+    full = not since or since < floor or since > token
+
+    queries = {
+        "tasks": db.query(Task).options(joinedload(Task.progress)).filter(Task.owner == user_id),
+        "projects": db.query(Project).filter(Project.owner == user_id),
+        "activities": db.query(Activity).join(Task, Task.id == Activity.task_id).filter(Task.owner == user_id),
+        "reminders": db.query(Reminder).filter(Reminder.owner_id == user_id),
+    }
+    models = {"tasks": Task, "projects": Project, "activities": Activity, "reminders": Reminder}
+    result: Dict[str, object] = {"token": token, "full": full}
+    deleted: Dict[str, List[int]] = {entity: [] for entity in SYNC_ENTITY_TYPES}
+    for entity in wanted:
+        query = queries[entity]
+        if not full:
+            query = query.filter(models[entity].version > since)
+        result[entity] = query.order_by(models[entity].id.asc()).all()
+
+    if not full:
+        tombstones = db.query(SyncTombstone.entity, SyncTombstone.entity_id).filter(
+            SyncTombstone.owner == user_id,
+            SyncTombstone.version > since,
+        )
+        for entity, entity_id in tombstones:
+            key = TOMBSTONE_ENTITY.get(entity)
+            if key in wanted:
+                deleted[key].append(entity_id)
+        # A reused id that came back after its delete is a live row, not a deletion.
+        for entity in wanted:
+            live = {row.id for row in result[entity]}
+            deleted[entity] = sorted(set(entity_id for entity_id in deleted[entity] if entity_id not in live))
+    for entity in SYNC_ENTITY_TYPES:
+        result.setdefault(entity, [])
+    result["deleted"] = deleted
+    return result
+
+
+def prune_sync_tombstones(
+    db: Session,
+    retention_days: int = SYNC_TOMBSTONE_RETENTION_DAYS,
+    now: datetime | None = None,
+) -> Dict[str, int]:
+    """Delete old tombstones and raise each owner's sync floor past them."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    pruned_versions = (
+        db.query(SyncTombstone.owner, func.max(SyncTombstone.version))
+        .filter(SyncTombstone.deleted_at < cutoff)
+        .group_by(SyncTombstone.owner)
+        .all()
+    )
+    for owner, version in pruned_versions:
+        db.query(PlannerVersion).filter(
+            PlannerVersion.owner == owner,
+            PlannerVersion.sync_floor < version,
+        ).update({"sync_floor": version}, synchronize_session=False)
+    deleted = (
+        db.query(SyncTombstone)
+        .filter(SyncTombstone.deleted_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return {"owners": len(pruned_versions), "deleted": deleted}
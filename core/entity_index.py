@@ -0,0 +1,314 @@
+import html
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.notes import Note
+from models.projects import Project
+from models.tasks import Task as DbTask
+
+# In-process BM25 index over each user's task titles, project names and note text.
+# Built lazily on first search and kept current from ORM flushes; set-based
+# writes that bypass the ORM must call invalidate_entity_index().
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+NOTE_TEXT_CHARS = 4000
+NOTE_TO_TASK_WEIGHT = 0.6
+# A matching project name lifts each of its open tasks, less than a direct hit.
+PROJECT_TO_TASK_WEIGHT = 0.4
+OPEN_TASK_STATES = ("open", "todo", "doing")
+# Safety net for writes made by other processes.
+INDEX_MAX_AGE_SECONDS = 15 * 60
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TERM_RE = re.compile(r"[^\W_]{2,}", re.UNICODE)
+_STOP_TERMS = {
+    "the", "and", "for", "with", "from", "that", "this", "have", "what", "about", "make",
+    "using", "into", "more", "please", "need", "help", "show", "task", "tasks", "project",
+    "projects", "today", "tomorrow", "week", "plan", "schedule", "smart", "assistant",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [
+        term
+        for term in _TERM_RE.findall((text or "").lower())
+        if term not in _STOP_TERMS and not term.isdigit()
+    ]
+
+
+def _note_text(content: str) -> str:
+    return html.unescape(_TAG_RE.sub(" ", content or ""))[:NOTE_TEXT_CHARS]
+
+
+class _UserEntityIndex:
+    def __init__(self) -> None:
+        self.rows: Dict[Tuple[str, int], int] = {}
+        self.row_keys: List[Optional[Tuple[str, int]]] = []
+        self.row_terms: List[Dict[str, int]] = []
+        self.free_rows: List[int] = []
+        self.doc_len = np.zeros(64, dtype=np.float32)
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.total_len = 0.0
+        self.doc_count = 0
+        self.note_task: Dict[int, int] = {}
+        self.built_at = time.monotonic()
+
+    def _allocate_row(self) -> int:
+        if self.free_rows:
+            return self.free_rows.pop()
+        row = len(self.row_keys)
+        if row >= self.doc_len.shape[0]:
+            self.doc_len = np.concatenate([self.doc_len, np.zeros_like(self.doc_len)])
+        self.row_keys.append(None)
+        self.row_terms.append({})
+        return row
+
+    def remove(self, key: Tuple[str, int]) -> None:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        for term in self.row_terms[row]:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(row, None)
+                if not posting:
+                    del self.postings[term]
+            self._posting_arrays.pop(term, None)
+        self.total_len -= float(self.doc_len[row])
+        self.doc_count -= 1
+        self.doc_len[row] = 0
+        self.row_keys[row] = None
+        self.row_terms[row] = {}
+        self.free_rows.append(row)
+        if key[0] == "note":
+            self.note_task.pop(key[1], None)
+
+    def upsert(self, key: Tuple[str, int], text: str) -> None:
+        self.remove(key)
+        counts: Dict[str, int] = {}
+        for term in _terms(text):
+            counts[term] = counts.get(term, 0) + 1
+        if not counts:
+            return
+        row = self._allocate_row()
+        self.rows[key] = row
+        self.row_keys[row] = key
+        self.row_terms[row] = counts
+        length = float(sum(counts.values()))
+        self.doc_len[row] = length
+        self.total_len += length
+        self.doc_count += 1
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[row] = tf
+            self._posting_arrays.pop(term, None)
+
+    def _arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        cached = self._posting_arrays.get(term)
+        if cached is not None:
+            return cached
+        posting = self.postings.get(term)
+        if not posting:
+            return None
+        arrays = (
+            np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+            np.fromiter(posting.values(), dtype=np.float32, count=len(posting)),
+        )
+        self._posting_arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, k: int) -> List[Tuple[Tuple[str, int], float]]:
+        query_terms = set(_terms(query))
+        if not query_terms or not self.doc_count:
+            return []
+        scores = np.zeros(len(self.row_keys), dtype=np.float32)
+        avg_len = self.total_len / self.doc_count
+        for term in query_terms:
+            arrays = self._arrays(term)
+            if arrays is None:
+                continue
+            rows, tfs = arrays
+            idf = np.log1p((self.doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[rows] / avg_len)
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        hits = np.flatnonzero(scores > 0)
+        if not hits.size:
+            return []
+        if hits.size > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(self.row_keys[row], float(scores[row])) for row in hits]
+
+
+_lock = threading.RLock()
+_indexes: Dict[int, _UserEntityIndex] = {}
+# task_id -> owner for users whose index is loaded, so note writes can be routed.
+_task_owner: Dict[int, int] = {}
+# Write counters per user (None: writes whose owner is unknown). Indexes are built
+# outside the lock; a build that saw a counter move is used once but not kept.
+_changes: Dict[Optional[int], int] = {}
+
+
+def _build_index(db: Session, user_id: int) -> Tuple[_UserEntityIndex, List[int]]:
+    index = _UserEntityIndex()
+    task_ids = []
+    for task_id, title in db.query(DbTask.id, DbTask.title).filter(DbTask.owner == user_id):
+        index.upsert(("task", task_id), title)
+        task_ids.append(task_id)
+    for project_id, name in db.query(Project.id, Project.name).filter(Project.owner == user_id):
+        index.upsert(("project", project_id), name)
+    note_rows = (
+        db.query(Note.id, Note.task_id, Note.content)
+        .join(DbTask, Note.task_id == DbTask.id)
+        .filter(DbTask.owner == user_id)
+    )
+    for note_id, task_id, content in note_rows:
+        index.upsert(("note", note_id), _note_text(content))
+        index.note_task[note_id] = task_id
+    return index, task_ids
+
+
+def _get_index(db: Session, user_id: int) -> _UserEntityIndex:
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None and time.monotonic() - index.built_at <= INDEX_MAX_AGE_SECONDS:
+            return index
+        seen = (_changes.get(user_id, 0), _changes.get(None, 0))
+    index, task_ids = _build_index(db, user_id)
+    with _lock:
+        if (_changes.get(user_id, 0), _changes.get(None, 0)) == seen:
+            _indexes[user_id] = index
+            for task_id in task_ids:
+                _task_owner[task_id] = user_id
+    return index
+
+
+def _note_change(owner: Optional[int]) -> None:
+    _changes[owner] = _changes.get(owner, 0) + 1
+
+
+def invalidate_entity_index(user_id: Optional[int] = None) -> None:
+    with _lock:
+        _note_change(user_id)
+        if user_id is None:
+            _indexes.clear()
+            _task_owner.clear()
+            return
+        _indexes.pop(user_id, None)
+        for task_id in [tid for tid, owner in _task_owner.items() if owner == user_id]:
+            del _task_owner[task_id]
+
+
+def search_entities(db: Session, user_id: int, query: str, k: int = 20) -> List[Dict[str, object]]:
+    index = _get_index(db, user_id)
+    with _lock:
+        hits = index.search(query, k)
+        results = []
+        for (kind, entity_id), score in hits:
+            item: Dict[str, object] = {"kind": kind, "id": entity_id, "score": round(score, 4)}
+            if kind == "note":
+                item["task_id"] = index.note_task.get(entity_id)
+            results.append(item)
+        return results
+
+
+def rank_tasks_for_prompt(db: Session, user_id: int, query: str, k: int = 40) -> Dict[int, float]:
+    """
+    Task relevance for a prompt; note hits count toward the task they belong to
+    and project hits toward the project's open tasks.
+    """
+    task_scores: Dict[int, float] = {}
+    project_scores: Dict[int, float] = {}
+    for hit in search_entities(db, user_id, query, k=k * 2):
+        if hit["kind"] == "task":
+            task_id, score = hit["id"], float(hit["score"])
+        elif hit["kind"] == "note" and hit.get("task_id"):
+            task_id, score = hit["task_id"], float(hit["score"]) * NOTE_TO_TASK_WEIGHT
+        elif hit["kind"] == "project":
+            project_scores[hit["id"]] = float(hit["score"]) * PROJECT_TO_TASK_WEIGHT
+            continue
+        else:
+            continue
+        task_scores[task_id] = task_scores.get(task_id, 0.0) + score
+    if project_scores:
+        project_tasks = db.query(DbTask.id, DbTask.proj_id).filter(
+            DbTask.owner == user_id,
+            DbTask.proj_id.in_(list(project_scores)),
+            DbTask.state.in_(OPEN_TASK_STATES),
+        )
+        for task_id, project_id in project_tasks:
+            task_scores[task_id] = task_scores.get(task_id, 0.0) + project_scores[project_id]
+    top = sorted(task_scores.items(), key=lambda item: -item[1])[:k]
+    return dict(top)
+
+
+# --- incremental maintenance from ORM writes -------------------------------------------------
+
+_PENDING_KEY = "entity_index_pending"
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, DbTask):
+            pending.append(("upsert", "task", obj.id, obj.owner, obj.title, None))
+        elif isinstance(obj, Project):
+            pending.append(("upsert", "project", obj.id, obj.owner, obj.name, None))
+        elif isinstance(obj, Note):
+            owner = _task_owner.get(obj.task_id)
+            pending.append(("upsert", "note", obj.id, owner, _note_text(obj.content), obj.task_id))
+    for obj in session.deleted:
+        if isinstance(obj, DbTask):
+            pending.append(("remove", "task", obj.id, obj.owner, None, None))
+        elif isinstance(obj, Project):
+            pending.append(("remove", "project", obj.id, obj.owner, None, None))
+        elif isinstance(obj, Note):
+            owner = _task_owner.get(obj.task_id)
+            pending.append(("remove", "note", obj.id, owner, None, obj.task_id))
+
+
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # Task removals go last so notes deleted alongside their task can still be routed.
+    pending.sort(key=lambda change: change[0] == "remove" and change[1] == "task")
+    with _lock:
+        for op, kind, entity_id, owner, text, task_id in pending:
+            if kind == "note" and owner is None:
+                owner = _task_owner.get(task_id)
+            _note_change(owner)
+            index = _indexes.get(owner) if owner is not None else None
+            if index is None:
+                continue
+            key = (kind, entity_id)
+            if op == "remove":
+                index.remove(key)
+                if kind == "task":
+                    _task_owner.pop(entity_id, None)
+                continue
+            index.upsert(key, text or "")
+            if kind == "task":
+                _task_owner[entity_id] = owner
+            elif kind == "note":
+                index.note_task[entity_id] = task_id
+
+
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_entity_index_listeners() -> None:
+    if event.contains(Session, "after_flush", _collect_changes):
+        return
+    event.listen(Session, "after_flush", _collect_changes)
+    event.listen(Session, "after_commit", _apply_changes)
+    event.listen(Session, "after_rollback", _discard_changes)
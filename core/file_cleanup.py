@@ -0,0 +1,53 @@
+import logging
+import os
+import shutil
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from models.file_cleanup import FileCleanupJob
+
+logger = logging.getLogger(__name__)
+
+# Only paths under these roots are ever removed, whatever ends up in the queue.
+CLEANUP_ROOTS = ("uploads",)
+# Note attachments live in one directory per note id under here.
+NOTE_UPLOAD_DIR = "uploads/notes"
+FILE_CLEANUP_INTERVAL_SECONDS = 60
+FILE_CLEANUP_BATCH = 500
+MAX_CLEANUP_ATTEMPTS = 5
+
+
+def _is_removable(path: str) -> bool:
+    resolved = os.path.realpath(path)
+    return any(
+        resolved.startswith(os.path.realpath(root) + os.sep) for root in CLEANUP_ROOTS
+    )
+
+
+def _remove(path: str) -> None:
+    if not _is_removable(path):
+        logger.warning("Refusing to clean up path outside upload roots: %s", path)
+        return
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def process_file_cleanup_queue(db: Session, batch_size: int = FILE_CLEANUP_BATCH) -> Dict[str, int]:
+    jobs = db.query(FileCleanupJob).order_by(FileCleanupJob.id.asc()).limit(batch_size).all()
+    removed = failed = 0
+    for job in jobs:
+        try:
+            _remove(job.path)
+            db.delete(job)
+            removed += 1
+        except OSError as exc:
+            job.attempts += 1
+            failed += 1
+            if job.attempts >= MAX_CLEANUP_ATTEMPTS:
+                logger.error("Giving up on removing %s: %s", job.path, exc)
+                db.delete(job)
+    db.commit()
+    return {"removed": removed, "failed": failed}
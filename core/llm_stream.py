@@ -0,0 +1,211 @@
+import json
+from typing import AsyncIterator, Dict, List
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import HTTPException
+
+from models.models import Model
+
+
+async def stream_openai_compatible_completion(
+    model: Model,
+    messages: List[Dict[str, str]],
+    temperature: float = 0.2,
+) -> AsyncIterator[str]:
+    """
+    Stream text pieces from ``model``. Tries the OpenAI chat and completions
+    endpoints (with and without ``/v1``, over http and https) and then Ollama's
+    chat endpoint, using the first one that answers.
+    """
+    def _extract_piece(chunk: Dict[str, object], kind: str) -> str:
+        if kind == "ollama_chat":
+            return (((chunk.get("message") or {}) if isinstance(chunk, dict) else {}).get("content") or "")
+
+        choices = chunk.get("choices") if isinstance(chunk, dict) else None
+        if not choices or not isinstance(choices, list):
+            return ""
+        choice = choices[0] if choices else {}
+        if not isinstance(choice, dict):
+            return ""
+
+        if kind == "openai_chat":
+            return (
+                ((choice.get("delta") or {}).get("content") if isinstance(choice.get("delta"), dict) else None)
+                or ((choice.get("message") or {}).get("content") if isinstance(choice.get("message"), dict) else None)
+                or (choice.get("text") if isinstance(choice.get("text"), str) else "")
+                or ""
+            )
+        return (
+            (choice.get("text") if isinstance(choice.get("text"), str) else None)
+            or ((choice.get("message") or {}).get("content") if isinstance(choice.get("message"), dict) else None)
+            or ""
+        )
+
+    def _base_candidates(raw_base: str) -> List[str]:
+        trimmed = (raw_base or "").strip().rstrip("/")
+        if not trimmed:
+            return []
+
+        parsed = urlparse(trimmed)
+        if not parsed.scheme:
+            host = trimmed.lstrip("/")
+            return [f"http://{host}", f"https://{host}"]
+
+        if parsed.scheme == "http":
+            return [trimmed, f"https://{trimmed[len('http://') :]}"]
+        if parsed.scheme == "https":
+            return [trimmed, f"http://{trimmed[len('https://') :]}"]
+        return [trimmed]
+
+    base = (model.base_url or "").strip().rstrip("/")
+    if not base:
+        raise HTTPException(status_code=400, detail="Model base_url is empty")
+    bases = _base_candidates(base)
+
+    auth_headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {model.api_key}",
+    }
+
+    prompt_text = "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+    ollama_model = model.name.split("/")[-1] if "/" in model.name else model.name
+
+    candidate_pool = []
+    for candidate_base in bases:
+        ollama_base = candidate_base[:-3] if candidate_base.endswith("/v1") else candidate_base
+        openai_base = candidate_base if candidate_base.endswith("/v1") else f"{candidate_base}/v1"
+        candidate_pool.extend(
+            [
+                {
+                    "kind": "openai_chat",
+                    "url": f"{candidate_base}/chat/completions",
+                    "headers": auth_headers,
+                    "payload": {
+                        "model": model.name,
+                        "messages": messages,
+                        "temperature": temperature,
+                        "stream": True,
+                    },
+                },
+                {
+                    "kind": "openai_completions",
+                    "url": f"{candidate_base}/completions",
+                    "headers": auth_headers,
+                    "payload": {
+                        "model": model.name,
+                        "prompt": prompt_text,
+                        "temperature": temperature,
+                        "stream": True,
+                    },
+                },
+                {
+                    "kind": "openai_chat",
+                    "url": f"{openai_base}/chat/completions",
+                    "headers": auth_headers,
+                    "payload": {
+                        "model": model.name,
+                        "messages": messages,
+                        "temperature": temperature,
+                        "stream": True,
+                    },
+                },
+                {
+                    "kind": "openai_completions",
+                    "url": f"{openai_base}/completions",
+                    "headers": auth_headers,
+                    "payload": {
+                        "model": model.name,
+                        "prompt": prompt_text,
+                        "temperature": temperature,
+                        "stream": True,
+                    },
+                },
+                {
+                    "kind": "ollama_chat",
+                    "url": f"{ollama_base}/api/chat",
+                    "headers": {"Content-Type": "application/json"},
+                    "payload": {
+                        "model": ollama_model,
+                        "messages": messages,
+                        "stream": True,
+                    },
+                },
+            ]
+        )
+    # Deduplicate candidate URLs while preserving order.
+    seen_urls = set()
+    candidates = []
+    for candidate in candidate_pool:
+        url = candidate["url"]
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        candidates.append(candidate)
+
+    last_error = None
+    attempt_errors = []
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(120.0, read=120.0),
+        trust_env=False,
+        follow_redirects=True,
+    ) as client:
+        for candidate in candidates:
+            try:
+                async with client.stream(
+                    "POST",
+                    candidate["url"],
+                    json=candidate["payload"],
+                    headers=candidate["headers"],
+                ) as response:
+                    if response.status_code == 404:
+                        last_error = f"404 at {candidate['url']}"
+                        attempt_errors.append(last_error)
+                        continue
+                    response.raise_for_status()
+
+                    if candidate["kind"] in {"openai_chat", "openai_completions"}:
+                        async for raw_line in response.aiter_lines():
+                            if not raw_line:
+                                continue
+                            data = raw_line[5:].strip() if raw_line.startswith("data:") else raw_line.strip()
+                            if not data:
+                                continue
+                            if data == "[DONE]":
+                                break
+                            try:
+                                chunk = json.loads(data)
+                            except Exception:
+                                continue
+                            piece = _extract_piece(chunk, candidate["kind"])
+                            if piece:
+                                yield piece
+                        return
+
+                    if candidate["kind"] == "ollama_chat":
+                        async for raw_line in response.aiter_lines():
+                            if not raw_line:
+                                continue
+                            try:
+                                chunk = json.loads(raw_line)
+                            except Exception:
+                                continue
+                            piece = _extract_piece(chunk, "ollama_chat")
+                            if piece:
+                                yield piece
+                            if chunk.get("done") is True:
+                                break
+                        return
+            except Exception as exc:
+                last_error = f"{type(exc).__name__}: {exc}"
+                attempt_errors.append(f"{candidate['url']} -> {last_error}")
+                continue
+
+    raise HTTPException(
+        status_code=502,
+        detail=(
+            "Streaming failed: no compatible endpoint found for this model/base_url. "
+            f"Last error: {last_error or 'unknown'}. "
+            f"Tried: {' | '.join(attempt_errors[-4:]) if attempt_errors else 'no candidates'}"
+        ),
+    )
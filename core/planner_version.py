@@ -0,0 +1,119 @@
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.activity import Activity
+from models.notes import Note
+from models.planner_version import PlannerVersion
+from models.progress import Progress
+from models.projects import Project
+from models.reminders import Reminder
+from models.sync_tombstone import SyncTombstone
+from models.task_dependency import TaskDependency
+from models.tasks import Task as DbTask
+
+# A per-user counter that moves whenever planner data changes. Caches key on it
+# so they never serve results computed from older data, and it doubles as the
+# delta-sync token: every changed task, project, activity or reminder is stamped
+# with the new version and every deleted one leaves a tombstone at it. ORM writes
+# do both automatically; set-based writes (query.update/delete, raw SQL) must call
+# bump_planner_version() themselves and stamp or tombstone the rows they touch.
+
+SYNC_ENTITIES = {DbTask: "task", Project: "project", Activity: "activity", Reminder: "reminder"}
+
+
+def get_planner_version(db: Session, user_id: int) -> int:
+    version = db.query(PlannerVersion.version).filter(PlannerVersion.owner == user_id).scalar()
+    return int(version or 0)
+
+
+def _bump(connection, user_ids: Iterable[int]) -> Dict[int, int]:
+    now = datetime.utcnow()
+    owners = sorted(set(user_ids))
+    if not owners:
+        return {}
+    stmt = sqlite_insert(PlannerVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner"],
+        set_={"version": PlannerVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    connection.execute(stmt, [{"owner": owner, "version": 1, "updated_at": now} for owner in owners])
+    return dict(
+        connection.execute(
+            select(PlannerVersion.owner, PlannerVersion.version).where(PlannerVersion.owner.in_(owners))
+        ).all()
+    )
+
+
+def bump_planner_version(db: Session, user_id: int) -> int:
+    """Mark a user's planner data as changed within the current transaction; returns the new version."""
+    return _bump(db.connection(), [user_id])[user_id]
+
+
+def _changed_objects(session: Session) -> List[Tuple[object, int, bool]]:
+    """(object, owner, deleted) for every planner row this flush will write."""
+    changed = []
+    task_ids: Set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changed.append(obj)
+        if isinstance(obj, (Activity, Note)):
+            task_ids.add(obj.task_id)
+    task_owners: Dict[int, int] = {}
+    if task_ids:
+        task_owners = dict(
+            session.connection().execute(select(DbTask.id, DbTask.owner).where(DbTask.id.in_(task_ids))).all()
+        )
+
+    result = []
+    for obj in changed:
+        if isinstance(obj, (DbTask, Project, Progress, TaskDependency)):
+            owner = obj.owner
+        elif isinstance(obj, Reminder):
+            owner = obj.owner_id
+        elif isinstance(obj, (Activity, Note)):
+            owner = task_owners.get(obj.task_id)
+        else:
+            continue
+        if owner is not None:
+            result.append((obj, owner, obj in session.deleted))
+    return result
+
+
+def _stamp_sync_rows(session: Session, changed: List[Tuple[object, int, bool]], versions: Dict[int, int]) -> None:
+    now = datetime.utcnow()
+    progress_versions: Dict[int, int] = {}
+    for obj, owner, deleted in changed:
+        entity = SYNC_ENTITIES.get(type(obj))
+        if entity is not None:
+            if deleted:
+                session.add(SyncTombstone(
+                    owner=owner, entity=entity, entity_id=obj.id, version=versions[owner], deleted_at=now
+                ))
+            else:
+                obj.version = versions[owner]
+                obj.updated_at = now
+        elif isinstance(obj, Progress) and not deleted and obj.id is not None:
+            progress_versions[obj.id] = versions[owner]
+    # Tasks embed their progress item, so a progress change resends the tasks using it.
+    for progress_id, version in progress_versions.items():
+        session.connection().execute(
+            update(DbTask).where(DbTask.progress_id == progress_id).values(version=version, updated_at=now)
+        )
+
+
+def _bump_on_flush(session: Session, flush_context, instances) -> None:
+    changed = _changed_objects(session)
+    owners = {owner for _, owner, _ in changed}
+    if owners:
+        _stamp_sync_rows(session, changed, _bump(session.connection(), owners))
+
+
+def register_planner_version_listeners() -> None:
+    if not event.contains(Session, "before_flush", _bump_on_flush):
+        event.listen(Session, "before_flush", _bump_on_flush)
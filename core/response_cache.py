@@ -0,0 +1,72 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.assistant_cache import AssistantResponseCache
+
+BRIEFING_CACHE_TTL_SECONDS = 2 * 3600
+RECOVERY_CACHE_TTL_SECONDS = 2 * 3600
+
+
+def response_cache_key(kind: str, user_id: int, **parts: Any) -> str:
+    raw = json.dumps({"kind": kind, "user": user_id, **parts}, sort_keys=True, default=str)
+    return f"{kind}:{user_id}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_cached_response(db: Session, user_id: int, cache_key: str) -> Optional[Dict[str, Any]]:
+    row = (
+        db.query(AssistantResponseCache)
+        .filter(
+            AssistantResponseCache.cache_key == cache_key,
+            AssistantResponseCache.owner == user_id,
+            AssistantResponseCache.expires_at > datetime.utcnow(),
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    try:
+        meta = json.loads(row.meta or "{}")
+    except Exception:
+        meta = {}
+    return {"response": row.response, "meta": meta, "created_at": row.created_at}
+
+
+def store_cached_response(
+    db: Session,
+    user_id: int,
+    kind: str,
+    cache_key: str,
+    response: str,
+    meta: Dict[str, Any],
+    ttl_seconds: int,
+) -> None:
+    now = datetime.utcnow()
+    # Expired entries of this user are dropped here so the table stays small without a job.
+    db.query(AssistantResponseCache).filter(
+        AssistantResponseCache.owner == user_id,
+        AssistantResponseCache.expires_at <= now,
+    ).delete(synchronize_session=False)
+    stmt = sqlite_insert(AssistantResponseCache).values(
+        owner=user_id,
+        kind=kind,
+        cache_key=cache_key,
+        response=response,
+        meta=json.dumps(meta, ensure_ascii=True, default=str),
+        created_at=now,
+        expires_at=now + timedelta(seconds=ttl_seconds),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cache_key"],
+        set_={
+            "response": stmt.excluded.response,
+            "meta": stmt.excluded.meta,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+    )
+    db.execute(stmt)
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Select, String, and_, cast, delete, exists, func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from core.file_cleanup import NOTE_UPLOAD_DIR
+from core.planner_version import bump_planner_version
+from models.activity import Activity
+from models.file_cleanup import FileCleanupJob
+from models.notes import Note, NoteAttachment
+from models.progress import Progress
+from models.sync_tombstone import SyncTombstone
+from models.task_closure import TaskClosure
+from models.task_dependency import TaskDependency
+from models.tasks import Task
+
+# Set-based cascade for deleting tasks: a fixed number of DELETE ... WHERE ... IN
+# (subquery) statements whatever the size of the task history, instead of loading
+# and deleting every row through the ORM. Attachment files are queued for the
+# background cleanup job rather than removed inside the request.
+#
+# These statements bypass the ORM flush listeners, so the caller must commit and
+# then call invalidate_entity_index(user_id); the planner version is bumped and
+# sync tombstones are written here.
+
+
+def delete_tasks_cascade(db: Session, user_id: int, target_ids: Select) -> Dict[str, int]:
+    """
+    Delete the tasks selected by ``target_ids`` (a SELECT of task ids owned by
+    ``user_id``) with their activities, notes, attachments, closure rows and any
+    progress items no surviving task uses. Subtasks outside the selection are kept
+    and become top-level tasks. Does not commit.
+    """
+    targets = target_ids.scalar_subquery()
+    target_notes = select(Note.id).where(Note.task_id.in_(targets)).scalar_subquery()
+    version = bump_planner_version(db, user_id)
+    now = datetime.utcnow()
+
+    db.execute(
+        insert(SyncTombstone).from_select(
+            ["owner", "entity", "entity_id", "version", "deleted_at"],
+            union_all(
+                select(literal(user_id), literal("activity"), Activity.id, literal(version), literal(now))
+                .where(Activity.task_id.in_(targets)),
+                select(literal(user_id), literal("task"), Task.id, literal(version), literal(now))
+                .where(Task.id.in_(targets)),
+            ),
+        )
+    )
+
+    # Each note's directory goes as a whole; attachments stored anywhere else are
+    # queued one by one.
+    note_dir = literal(NOTE_UPLOAD_DIR + "/") + cast(Note.id, String)
+    db.execute(
+        insert(FileCleanupJob).from_select(
+            ["path", "attempts", "created_at"],
+            union_all(
+                select(note_dir, literal(0), func.now()).where(Note.task_id.in_(targets)),
+                select(NoteAttachment.filepath, literal(0), func.now()).where(
+                    NoteAttachment.note_id.in_(target_notes),
+                    ~NoteAttachment.filepath.startswith(
+                        literal(NOTE_UPLOAD_DIR + "/") + cast(NoteAttachment.note_id, String) + "/"
+                    ),
+                ),
+            ),
+        )
+    )
+    unsynced = {"synchronize_session": False}
+    attachments = db.execute(
+        delete(NoteAttachment).where(NoteAttachment.note_id.in_(target_notes)), execution_options=unsynced
+    ).rowcount
+    notes = db.execute(delete(Note).where(Note.task_id.in_(targets)), execution_options=unsynced).rowcount
+    activities = db.execute(
+        delete(Activity).where(Activity.task_id.in_(targets)), execution_options=unsynced
+    ).rowcount
+
+    db.execute(
+        delete(TaskDependency).where(
+            TaskDependency.task_id.in_(targets) | TaskDependency.depends_on_id.in_(targets)
+        ),
+        execution_options=unsynced,
+    )
+
+    # Surviving direct children of deleted tasks become roots: cut every link from
+    # outside such a child's subtree into it (the set-based form of detaching each
+    # one), while the subtrees are still intact. A link (a, d) goes when some
+    # surviving child c has (c, d) but not (c, a). Then drop the deleted tasks' rows.
+    survivors = select(Task.id).where(Task.parent_task_id.in_(targets), Task.id.notin_(targets))
+    under = TaskClosure.__table__.alias("under")
+    above = TaskClosure.__table__.alias("above")
+    db.execute(
+        delete(TaskClosure).where(
+            exists().where(
+                under.c.ancestor.in_(survivors),
+                under.c.descendant == TaskClosure.descendant,
+                ~exists()
+                .where(above.c.ancestor == under.c.ancestor, above.c.descendant == TaskClosure.ancestor)
+                .correlate_except(above),
+            )
+        ),
+        execution_options=unsynced,
+    )
+    db.execute(
+        delete(TaskClosure).where(TaskClosure.ancestor.in_(targets) | TaskClosure.descendant.in_(targets)),
+        execution_options=unsynced,
+    )
+    db.execute(
+        update(Task)
+        .where(Task.parent_task_id.in_(targets), Task.id.notin_(targets))
+        .values(parent_task_id=None, version=version, updated_at=now),
+        execution_options=unsynced,
+    )
+
+    other_task = Task.__table__.alias("other_task")
+    progress_items = db.execute(
+        delete(Progress).where(
+            Progress.owner == user_id,
+            Progress.id.in_(select(Task.progress_id).where(Task.id.in_(targets)).scalar_subquery()),
+            ~exists().where(
+                and_(other_task.c.progress_id == Progress.id, other_task.c.id.notin_(targets))
+            ),
+        ),
+        execution_options=unsynced,
+    ).rowcount
+    tasks = db.execute(delete(Task).where(Task.id.in_(targets)), execution_options=unsynced).rowcount
+    return {
+        "tasks": tasks,
+        "activities": activities,
+        "notes": notes,
+        "attachments": attachments,
+        "progress_items": progress_items,
+    }
@@ -0,0 +1,255 @@
+import statistics
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+from core.planner_version import get_planner_version
+from models.activity import Activity
+from models.task_dependency import TaskDependency
+from models.tasks import Task
+
+# Dependency graph analysis over task_dependencies: topological order, cycle
+# detection and critical path with slack. Every pass is O(tasks + edges) over the
+# user's graph. Durations are remaining hours of work: the median tracked time of
+# finished tasks at the same energy level, less what the task has already
+# tracked. Times are hours from now and ignore working hours. Results are cached
+# per user and planner version; the TTL keeps "from now" offsets current.
+GRAPH_CACHE_TTL_SECONDS = 60
+MAX_GRAPH_CACHE_USERS = 256
+DEFAULT_TASK_HOURS = 1.0
+
+DONE_STATES = ("done", "closed")
+
+_lock = threading.Lock()
+_cache: Dict[int, Dict[str, object]] = {}
+
+
+def depends_on_transitively(db: Session, user_id: int, task_id: int, target_id: int) -> bool:
+    """True when ``task_id`` already depends (directly or not) on ``target_id``."""
+    edges: Dict[int, List[int]] = {}
+    for dependent, dependency in db.query(TaskDependency.task_id, TaskDependency.depends_on_id).filter(
+        TaskDependency.owner == user_id
+    ):
+        edges.setdefault(dependent, []).append(dependency)
+    seen = {task_id}
+    queue = deque([task_id])
+    while queue:
+        for dependency in edges.get(queue.popleft(), ()):
+            if dependency == target_id:
+                return True
+            if dependency not in seen:
+                seen.add(dependency)
+                queue.append(dependency)
+    return False
+
+
+def get_open_blockers(db: Session, user_id: int, task_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """Unfinished tasks that each of ``task_ids`` is waiting on."""
+    wanted = list(set(task_ids))
+    if not wanted:
+        return {}
+    rows = (
+        db.query(TaskDependency.task_id, TaskDependency.depends_on_id)
+        .join(Task, Task.id == TaskDependency.depends_on_id)
+        .filter(
+            TaskDependency.owner == user_id,
+            TaskDependency.task_id.in_(wanted),
+            Task.state.notin_(DONE_STATES + ("deleted",)),
+        )
+        .order_by(TaskDependency.depends_on_id.asc())
+    )
+    blockers: Dict[int, List[int]] = {}
+    for task_id, depends_on_id in rows:
+        blockers.setdefault(task_id, []).append(depends_on_id)
+    return blockers
+
+
+def _duration_estimates(db: Session, user_id: int, node_ids: set) -> Tuple[Dict[int, float], Dict[int, float]]:
+    """(tracked hours per graph task, median hours of finished tasks per energy level)."""
+    hours = func.sum(func.julianday(Activity.clock_out) - func.julianday(Activity.clock_in)) * 24
+    rows = (
+        db.query(Task.id, Task.energy_level, Task.state, hours)
+        .join(Activity, Activity.task_id == Task.id)
+        .filter(Task.owner == user_id, Activity.status == "DONE", Activity.clock_out.isnot(None))
+        .group_by(Task.id, Task.energy_level, Task.state)
+    )
+    tracked: Dict[int, float] = {}
+    finished: Dict[int, List[float]] = {}
+    for task_id, energy, state, total in rows:
+        total = max(0.0, float(total or 0.0))
+        if task_id in node_ids:
+            tracked[task_id] = total
+        if state in DONE_STATES and total > 0:
+            finished.setdefault(int(energy or 1), []).append(total)
+    every = [value for values in finished.values() for value in values]
+    fallback = statistics.median(every) if every else DEFAULT_TASK_HOURS
+    estimates = {energy: statistics.median(finished[energy]) if finished.get(energy) else fallback for energy in (1, 2, 3)}
+    return tracked, estimates
+
+
+def analyze_graph(
+    nodes: Dict[int, Dict[str, object]],
+    edges: List[Tuple[int, int]],
+    now: datetime,
+) -> Dict[str, object]:
+    """
+    ``nodes`` maps task id to {title, state, deadline, duration_hours}; ``edges``
+    are (task_id, depends_on_id). Runs Kahn's algorithm for the order, then a
+    forward pass (earliest start/finish) and a backward pass (latest start/finish
+    from deadlines and successors) over the ordered tasks.
+    """
+    successors: Dict[int, List[int]] = {task_id: [] for task_id in nodes}
+    predecessors: Dict[int, List[int]] = {task_id: [] for task_id in nodes}
+    for task_id, depends_on_id in edges:
+        if task_id in nodes and depends_on_id in nodes:
+            successors[depends_on_id].append(task_id)
+            predecessors[task_id].append(depends_on_id)
+
+    indegree = {task_id: len(preds) for task_id, preds in predecessors.items()}
+    queue = deque(sorted(task_id for task_id, degree in indegree.items() if degree == 0))
+    order: List[int] = []
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for successor in successors[task_id]:
+            indegree[successor] -= 1
+            if not indegree[successor]:
+                queue.append(successor)
+
+    # Anything left is on a cycle or waits on one. Every leftover task has a leftover
+    # predecessor, so walking predecessors from any of them must revisit a task.
+    unordered = [task_id for task_id in nodes if indegree[task_id] > 0]
+    cycle: List[int] = []
+    if unordered:
+        position: Dict[int, int] = {}
+        walk: List[int] = []
+        current = min(unordered)
+        while current not in position:
+            position[current] = len(walk)
+            walk.append(current)
+            current = next(pred for pred in predecessors[current] if indegree[pred] > 0)
+        cycle = list(reversed(walk[position[current]:]))
+
+    def offset(deadline: Optional[datetime]) -> Optional[float]:
+        return (deadline - now).total_seconds() / 3600 if deadline else None
+
+    earliest_start: Dict[int, float] = {}
+    earliest_finish: Dict[int, float] = {}
+    for task_id in order:
+        start = max((earliest_finish[pred] for pred in predecessors[task_id]), default=0.0)
+        earliest_start[task_id] = start
+        earliest_finish[task_id] = start + float(nodes[task_id]["duration_hours"])
+    horizon = max(earliest_finish.values(), default=0.0)
+
+    latest_start: Dict[int, float] = {}
+    latest_finish: Dict[int, float] = {}
+    for task_id in reversed(order):
+        limits = [latest_start[succ] for succ in successors[task_id]]
+        due = offset(nodes[task_id]["deadline"])
+        if due is not None:
+            limits.append(due)
+        finish = min(limits) if limits else horizon
+        latest_finish[task_id] = finish
+        latest_start[task_id] = finish - float(nodes[task_id]["duration_hours"])
+
+    slack = {task_id: latest_finish[task_id] - earliest_finish[task_id] for task_id in order}
+    open_ids = [task_id for task_id in order if nodes[task_id]["state"] not in DONE_STATES]
+    critical_path: List[int] = []
+    critical: set = set()
+    if open_ids:
+        least = min(slack[task_id] for task_id in open_ids)
+        critical = {task_id for task_id in open_ids if slack[task_id] <= least + 1e-6}
+        # Walk back from the latest-finishing critical task through critical
+        # predecessors that finish exactly when it can start.
+        current = max(
+            (task_id for task_id in critical if not any(succ in critical for succ in successors[task_id])),
+            key=lambda task_id: (earliest_finish[task_id], -task_id),
+        )
+        while current is not None:
+            critical_path.append(current)
+            current = next(
+                (
+                    pred
+                    for pred in predecessors[current]
+                    if pred in critical and abs(earliest_finish[pred] - earliest_start[current]) <= 1e-6
+                ),
+                None,
+            )
+        critical_path.reverse()
+
+    tasks = []
+    for task_id in order + sorted(unordered):
+        node = nodes[task_id]
+        ordered = task_id in earliest_start
+        tasks.append({
+            "task_id": task_id,
+            "title": node["title"],
+            "state": node["state"],
+            "deadline": node["deadline"],
+            "duration_hours": round(float(node["duration_hours"]), 2),
+            "depends_on": sorted(predecessors[task_id]),
+            "blocked": any(nodes[pred]["state"] not in DONE_STATES for pred in predecessors[task_id]),
+            "earliest_start_hours": round(earliest_start[task_id], 2) if ordered else None,
+            "earliest_finish_hours": round(earliest_finish[task_id], 2) if ordered else None,
+            "latest_start_hours": round(latest_start[task_id], 2) if ordered else None,
+            "latest_finish_hours": round(latest_finish[task_id], 2) if ordered else None,
+            "slack_hours": round(slack[task_id], 2) if ordered else None,
+            "critical": task_id in critical,
+        })
+    return {
+        "order": order,
+        "has_cycle": bool(unordered),
+        "cycle": cycle,
+        "unordered": sorted(unordered),
+        "critical_path": critical_path,
+        "critical_path_hours": round(sum(float(nodes[t]["duration_hours"]) for t in critical_path), 2),
+        "finish_hours": round(horizon, 2),
+        "tasks": tasks,
+    }
+
+
+def _build_graph(db: Session, user_id: int) -> Dict[str, object]:
+    edges = [
+        (task_id, depends_on_id)
+        for task_id, depends_on_id in db.query(TaskDependency.task_id, TaskDependency.depends_on_id).filter(
+            TaskDependency.owner == user_id
+        )
+    ]
+    node_ids = union(
+        select(TaskDependency.task_id).where(TaskDependency.owner == user_id),
+        select(TaskDependency.depends_on_id).where(TaskDependency.owner == user_id),
+    )
+    rows = (
+        db.query(Task.id, Task.title, Task.state, Task.deadline, Task.energy_level)
+        .filter(Task.owner == user_id, Task.state != "deleted", Task.id.in_(node_ids))
+        .all()
+    )
+    tracked, estimates = _duration_estimates(db, user_id, {row[0] for row in rows})
+    nodes: Dict[int, Dict[str, object]] = {}
+    for task_id, title, state, deadline, energy in rows:
+        remaining = 0.0
+        if state not in DONE_STATES:
+            remaining = max(0.0, estimates[int(energy or 1)] - tracked.get(task_id, 0.0))
+        nodes[task_id] = {"title": title, "state": state, "deadline": deadline, "duration_hours": remaining}
+    return analyze_graph(nodes, edges, datetime.utcnow())
+
+
+def get_dependency_graph(db: Session, user_id: int) -> Dict[str, object]:
+    version = get_planner_version(db, user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry is not None and entry["version"] == version and entry["expires_at"] > now:
+            return entry["graph"]
+
+    graph = _build_graph(db, user_id)
+    with _lock:
+        if user_id not in _cache and len(_cache) >= MAX_GRAPH_CACHE_USERS:
+            _cache.pop(min(_cache, key=lambda uid: _cache[uid]["expires_at"]))
+        _cache[user_id] = {"version": version, "expires_at": now + GRAPH_CACHE_TTL_SECONDS, "graph": graph}
+    return graph
@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from core.planner_version import get_planner_version
+from models.activity import Activity
+from models.progress import Progress
+from models.task_closure import TaskClosure
+from models.tasks import Task
+
+# Subtree rollups (tracked hours, done/open counts, weighted progress) computed in
+# SQL over task_closure. Results are cached per user and planner version; the TTL
+# only matters for running activities, whose hours grow without a data change.
+ROLLUP_CACHE_TTL_SECONDS = 60
+MAX_ROLLUP_CACHE_USERS = 256
+
+DONE_STATES = ("done", "closed")
+OPEN_STATES = ("open", "todo", "doing")
+
+_lock = threading.Lock()
+_cache: Dict[int, Dict[str, object]] = {}
+
+
+def _compute_rollups(db: Session, user_id: int, task_ids: List[int]) -> Dict[int, Dict[str, object]]:
+    # Each task counts toward progress in proportion to its energy level (1-3) as an
+    # effort weight: finished tasks are complete, others use their progress item.
+    fraction = case(
+        (Task.state.in_(DONE_STATES), 1.0),
+        (Progress.max_value > 0, func.min(1.0, func.max(0.0, Progress.value * 1.0 / Progress.max_value))),
+        else_=0.0,
+    )
+    weight = func.coalesce(Task.energy_level, 1)
+    task_rows = (
+        db.query(
+            TaskClosure.ancestor,
+            func.count(Task.id),
+            func.sum(case((Task.state.in_(DONE_STATES), 1), else_=0)),
+            func.sum(case((Task.state.in_(OPEN_STATES), 1), else_=0)),
+            func.sum(weight),
+            func.sum(weight * fraction),
+        )
+        .join(Task, Task.id == TaskClosure.descendant)
+        .outerjoin(Progress, Progress.id == Task.progress_id)
+        .filter(
+            TaskClosure.ancestor.in_(task_ids),
+            Task.owner == user_id,
+            Task.state != "deleted",
+        )
+        .group_by(TaskClosure.ancestor)
+        .all()
+    )
+
+    now = datetime.utcnow()
+    elapsed_days = func.julianday(func.coalesce(Activity.clock_out, now)) - func.julianday(Activity.clock_in)
+    hour_rows = (
+        db.query(TaskClosure.ancestor, func.sum(func.max(0.0, elapsed_days)) * 24)
+        .join(Task, Task.id == TaskClosure.descendant)
+        .join(Activity, Activity.task_id == Task.id)
+        .filter(
+            TaskClosure.ancestor.in_(task_ids),
+            Task.owner == user_id,
+            Task.state != "deleted",
+            Activity.status.in_(("DOING", "DONE")),
+            Activity.clock_in <= now,
+        )
+        .group_by(TaskClosure.ancestor)
+        .all()
+    )
+    hours = {task_id: float(total or 0.0) for task_id, total in hour_rows}
+
+    rollups: Dict[int, Dict[str, object]] = {}
+    for task_id, count, done, open_count, weight_total, weighted_done in task_rows:
+        rollups[task_id] = {
+            "task_id": task_id,
+            "subtree_tasks": int(count or 0),
+            "done_tasks": int(done or 0),
+            "open_tasks": int(open_count or 0),
+            "tracked_hours": round(hours.get(task_id, 0.0), 2),
+            "progress_percent": round(100 * float(weighted_done or 0) / float(weight_total), 1) if weight_total else 0.0,
+        }
+    return rollups
+
+
+def get_task_rollups(db: Session, user_id: int, task_ids: Iterable[int]) -> Dict[int, Dict[str, object]]:
+    """Rollups for the subtrees of ``task_ids`` (owned by ``user_id``); unknown ids are omitted."""
+    wanted = sorted(set(task_ids))
+    if not wanted:
+        return {}
+    version = get_planner_version(db, user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry is None or entry["version"] != version or entry["expires_at"] <= now:
+            if entry is None and len(_cache) >= MAX_ROLLUP_CACHE_USERS:
+                _cache.pop(min(_cache, key=lambda uid: _cache[uid]["expires_at"]))
+            entry = {"version": version, "expires_at": now + ROLLUP_CACHE_TTL_SECONDS, "rollups": {}}
+            _cache[user_id] = entry
+        cached: Dict[int, Dict[str, object]] = entry["rollups"]
+        missing = [task_id for task_id in wanted if task_id not in cached]
+
+    if missing:
+        computed = _compute_rollups(db, user_id, missing)
+        with _lock:
+            cached.update(computed)
+    return {task_id: cached[task_id] for task_id in wanted if task_id in cached}
@@ -0,0 +1,339 @@
+import bisect
+import heapq
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pytz
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import Session
+
+from core.planner_version import bump_planner_version
+from models.activity import Activity
+from models.tasks import Task
+
+# Packs open tasks into the free gaps of a user's working hours as PLANNED
+# activities. Free time is built with one sweep over the merged bookings, then
+# filled in time order from per-energy-level heaps. Each booked block costs
+# O(log tasks); a gap also pays O(log tasks) for every task that is too long for
+# it yet too short to split, so a gap is O(tasks log tasks) at worst. Only a few
+# columns are loaded per task.
+#
+# Each working day is split into thirds by energy: the first third suits HIGH
+# energy tasks, the middle MEDIUM and the last LOW. The earliest due day always
+# wins; among tasks due the same local day, the best energy fit and then the
+# Eisenhower quadrant decide.
+
+SCHEDULABLE_STATES = ("open", "todo", "doing")
+AUTO_SCHEDULE_DESCRIPTION = "Auto-scheduled"
+MAX_SCHEDULE_DAYS = 62
+MAX_SCHEDULE_TASKS = 5000
+
+Interval = Tuple[datetime, datetime]
+
+
+class _Item:
+    __slots__ = ("task_id", "title", "energy", "deadline", "due_day", "rank", "remaining")
+
+    def __init__(self, task_id, title, energy, deadline, due_day, rank, remaining):
+        self.task_id = task_id
+        self.title = title
+        self.energy = energy
+        self.deadline = deadline
+        self.due_day = due_day
+        self.rank = rank
+        self.remaining = remaining
+
+    def heap_key(self):
+        return (self.due_day, self.rank, self.deadline or datetime.max, self.task_id)
+
+
+def _quadrant(is_urgent: bool, is_important: bool) -> int:
+    if is_urgent and is_important:
+        return 0
+    if is_urgent:
+        return 1
+    if is_important:
+        return 2
+    return 3
+
+
+def _to_utc(tz, day: date, at: time) -> datetime:
+    return tz.localize(datetime.combine(day, at)).astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+def _merge(intervals: Iterable[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_segments(
+    tz,
+    start_date: date,
+    end_date: date,
+    work_start: time,
+    work_end: time,
+    work_days: Sequence[int],
+    busy: Iterable[Interval],
+    not_before: datetime,
+) -> List[Tuple[datetime, datetime, int]]:
+    """
+    Free (start, end, energy band) segments in UTC, in time order: each working
+    window minus the busy intervals, cut at the energy-band boundaries.
+    """
+    merged = _merge(busy)
+    busy_ends = [end for _, end in merged]
+    segments: List[Tuple[datetime, datetime, int]] = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in work_days:
+            window_start = _to_utc(tz, day, work_start)
+            window_end = _to_utc(tz, day, work_end)
+            third = (window_end - window_start) / 3
+            bands = [
+                (window_start, window_start + third, 3),
+                (window_start + third, window_end - third, 2),
+                (window_end - third, window_end, 1),
+            ]
+            for band_start, band_end, band in bands:
+                cursor = max(band_start, not_before)
+                index = bisect.bisect_right(busy_ends, cursor)
+                while cursor < band_end:
+                    if index < len(merged) and merged[index][0] < band_end:
+                        busy_start, busy_end = merged[index]
+                        if busy_start > cursor:
+                            segments.append((cursor, busy_start, band))
+                        cursor = max(cursor, busy_end)
+                        index += 1
+                    else:
+                        segments.append((cursor, band_end, band))
+                        break
+        day += timedelta(days=1)
+    return segments
+
+
+def _load_busy(db: Session, user_id: int, range_start: datetime, range_end: datetime, default_minutes: int, now: datetime):
+    # Open-ended bookings: a running activity holds until now, a PLANNED one without
+    # an end holds the default block length.
+    rows = (
+        db.query(Activity.clock_in, Activity.clock_out, Activity.status)
+        .join(Task, Task.id == Activity.task_id)
+        .filter(
+            Task.owner == user_id,
+            Activity.clock_in < range_end,
+            or_(Activity.clock_out.is_(None), Activity.clock_out > range_start),
+        )
+        .all()
+    )
+    busy: List[Interval] = []
+    for clock_in, clock_out, status in rows:
+        if clock_out is None:
+            clock_out = max(now, clock_in) if status == "DOING" else clock_in + timedelta(minutes=default_minutes)
+        if clock_out > range_start:
+            busy.append((clock_in, clock_out))
+    return busy
+
+
+def _load_tasks(
+    db: Session,
+    user_id: int,
+    tz,
+    now: datetime,
+    default_minutes: int,
+    durations: Dict[int, int],
+    proj_id: Optional[int],
+    task_ids: Optional[List[int]],
+    include_planned: bool,
+) -> List[_Item]:
+    # Uncorrelated subqueries, evaluated once rather than per candidate row.
+    open_parents = select(Task.parent_task_id).where(
+        Task.owner == user_id,
+        Task.parent_task_id.isnot(None),
+        Task.state.in_(SCHEDULABLE_STATES),
+    )
+    query = db.query(
+        Task.id, Task.title, Task.energy_level, Task.deadline, Task.is_urgent, Task.is_important
+    ).filter(
+        Task.owner == user_id,
+        Task.state.in_(SCHEDULABLE_STATES),
+        # Parents are worked on through their subtasks.
+        Task.id.notin_(open_parents),
+    )
+    if proj_id is not None:
+        query = query.filter(Task.proj_id == proj_id)
+    if task_ids:
+        query = query.filter(Task.id.in_(task_ids))
+    if not include_planned:
+        upcoming = (
+            select(Activity.task_id)
+            .join(Task, Task.id == Activity.task_id)
+            .where(Task.owner == user_id, Activity.status == "PLANNED", Activity.clock_in >= now)
+        )
+        query = query.filter(Task.id.notin_(upcoming))
+    query = query.order_by(Task.deadline.is_(None), Task.deadline.asc(), Task.id.asc()).limit(MAX_SCHEDULE_TASKS)
+    items = []
+    for task_id, title, energy, deadline, is_urgent, is_important in query:
+        due_day = pytz.UTC.localize(deadline).astimezone(tz).date() if deadline else date.max
+        minutes = durations.get(task_id, default_minutes)
+        items.append(
+            _Item(task_id, title, int(energy or 1), deadline, due_day, _quadrant(is_urgent, is_important), timedelta(minutes=minutes))
+        )
+    return items
+
+
+def pack_tasks(
+    items: List[_Item],
+    segments: List[Tuple[datetime, datetime, int]],
+    min_block: timedelta,
+) -> List[Dict[str, object]]:
+    """
+    Fill ``segments`` in time order. Each gap takes the best of the three heap
+    tops that can be booked there; a task longer than the gap keeps its remainder
+    and continues in the next gap. Pieces shorter than ``min_block`` are not
+    booked, and a task that cannot be split to fit is set aside so the next
+    candidate gets the gap.
+    """
+    heaps: Dict[int, list] = {1: [], 2: [], 3: []}
+    for item in items:
+        # Shorter than the smallest bookable piece: it can never be placed.
+        if item.remaining < min_block:
+            continue
+        heaps.setdefault(item.energy, []).append((item.heap_key(), item))
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    def fit(item: _Item, gap: timedelta) -> Optional[timedelta]:
+        length = min(item.remaining, gap)
+        # Never leave a remainder too short to book on its own.
+        if item.remaining - length and item.remaining - length < min_block:
+            length = item.remaining - min_block
+        return length if length >= min_block else None
+
+    blocks: List[Dict[str, object]] = []
+    for seg_start, seg_end, band in segments:
+        cursor = seg_start
+        while seg_end - cursor >= min_block:
+            set_aside = []
+            placed = None
+            while placed is None:
+                best = None
+                best_key = None
+                for energy, heap in heaps.items():
+                    if not heap:
+                        continue
+                    item = heap[0][1]
+                    key = (item.due_day, abs(energy - band), item.rank, item.deadline or datetime.max, item.task_id)
+                    if best_key is None or key < best_key:
+                        best, best_key = energy, key
+                if best is None:
+                    break
+                item = heaps[best][0][1]
+                length = fit(item, seg_end - cursor)
+                if length is None:
+                    set_aside.append(heapq.heappop(heaps[best]))
+                else:
+                    placed = (item, length)
+                    if length == item.remaining:
+                        heapq.heappop(heaps[best])
+            for entry in set_aside:
+                heapq.heappush(heaps[entry[1].energy], entry)
+            if placed is None:
+                if not set_aside:
+                    return blocks
+                break
+
+            item, length = placed
+            end = cursor + length
+            blocks.append({
+                "task_id": item.task_id,
+                "title": item.title,
+                "energy_level": item.energy,
+                "band": band,
+                "clock_in": cursor,
+                "clock_out": end,
+                "late": item.deadline is not None and end > item.deadline,
+            })
+            item.remaining -= length
+            cursor = end
+    return blocks
+
+
+def auto_schedule(
+    db: Session,
+    user_id: int,
+    timezone_name: Optional[str],
+    start_date: date,
+    end_date: date,
+    work_start: time,
+    work_end: time,
+    work_days: Sequence[int],
+    default_minutes: int = 60,
+    min_block_minutes: int = 30,
+    durations: Optional[Dict[int, int]] = None,
+    proj_id: Optional[int] = None,
+    task_ids: Optional[List[int]] = None,
+    include_planned: bool = False,
+    dry_run: bool = True,
+) -> Dict[str, object]:
+    """
+    Plan open tasks into free working time between ``start_date`` and ``end_date``
+    (local dates, inclusive). Unless ``dry_run``, the blocks are inserted as PLANNED
+    activities; the caller commits. Times in the result are naive UTC.
+    """
+    tz = pytz.timezone(timezone_name or "UTC")
+    now = datetime.utcnow()
+    range_start = _to_utc(tz, start_date, time.min)
+    range_end = _to_utc(tz, end_date + timedelta(days=1), time.min)
+
+    busy = _load_busy(db, user_id, range_start, range_end, default_minutes, now)
+    segments = free_segments(tz, start_date, end_date, work_start, work_end, work_days, busy, now)
+    items = _load_tasks(db, user_id, tz, now, default_minutes, durations or {}, proj_id, task_ids, include_planned)
+    blocks = pack_tasks(items, segments, timedelta(minutes=min_block_minutes))
+
+    planned: Dict[int, timedelta] = {}
+    for block in blocks:
+        planned[block["task_id"]] = planned.get(block["task_id"], timedelta()) + (block["clock_out"] - block["clock_in"])
+    unscheduled = [
+        {"task_id": item.task_id, "title": item.title, "unplanned_minutes": int(item.remaining.total_seconds() // 60)}
+        for item in items
+        if item.remaining
+    ]
+
+    created = 0
+    if blocks and not dry_run:
+        version = bump_planner_version(db, user_id)
+        db.execute(
+            insert(Activity),
+            [
+                {
+                    "task_id": block["task_id"],
+                    "clock_in": block["clock_in"],
+                    "clock_out": block["clock_out"],
+                    "status": "PLANNED",
+                    "description": AUTO_SCHEDULE_DESCRIPTION,
+                    "version": version,
+                    "updated_at": now,
+                }
+                for block in blocks
+            ],
+        )
+        created = len(blocks)
+
+    free_seconds = sum((end - start).total_seconds() for start, end, _ in segments)
+    return {
+        "blocks": blocks,
+        "unscheduled": unscheduled,
+        "candidate_tasks": len(items),
+        "scheduled_tasks": len(planned),
+        "scheduled_minutes": int(sum(planned.values(), timedelta()).total_seconds() // 60),
+        "free_minutes": int(free_seconds // 60),
+        "late_blocks": sum(1 for block in blocks if block["late"]),
+        "created": created,
+    }
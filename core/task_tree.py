@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import Select, delete, event, insert, inspect, select, true
+from sqlalchemy.orm import Session, aliased
+
+from models.task_closure import TaskClosure
+from models.tasks import Task
+
+# Task hierarchy helpers backed by the task_closure table, which holds every
+# (ancestor, descendant, depth) pair of the parent_task_id tree. Subtree and
+# ancestry lookups are single indexed selects that can be embedded in IN clauses
+# or joins. ORM task inserts, reparents and deletes keep it current; set-based
+# writes to tasks.parent_task_id must call rebuild_task_closure() (or patch the
+# rows themselves).
+
+
+class TaskCycleError(ValueError):
+    pass
+
+
+def subtree_ids_select(root_task_id: int, owner: Optional[int] = None) -> Select:
+    """SELECT of task ids in the subtree rooted at ``root_task_id`` (the root included)."""
+    query = select(TaskClosure.descendant).where(TaskClosure.ancestor == root_task_id)
+    if owner is not None:
+        query = query.join(Task, Task.id == TaskClosure.descendant).where(Task.owner == owner)
+    return query
+
+
+def ancestor_ids_select(task_id: int) -> Select:
+    """SELECT of the ids above ``task_id``, nearest parent first."""
+    return (
+        select(TaskClosure.ancestor)
+        .where(TaskClosure.descendant == task_id, TaskClosure.depth > 0)
+        .order_by(TaskClosure.depth.asc())
+    )
+
+
+def get_subtree_task_ids(db: Session, root_task_id: int, owner: Optional[int] = None) -> List[int]:
+    """Ids of the task and all of its descendants (the root first), in one query."""
+    query = subtree_ids_select(root_task_id, owner).order_by(TaskClosure.depth.asc(), TaskClosure.descendant.asc())
+    return list(db.execute(query).scalars())
+
+
+def get_ancestor_task_ids(db: Session, task_id: int) -> List[int]:
+    return list(db.execute(ancestor_ids_select(task_id)).scalars())
+
+
+def creates_task_cycle(db: Session, task_id: int, parent_task_id: Optional[int]) -> bool:
+    """True when making ``parent_task_id`` the parent of ``task_id`` would close a loop."""
+    if parent_task_id is None:
+        return False
+    if parent_task_id == task_id:
+        return True
+    found = db.execute(
+        select(TaskClosure.depth).where(
+            TaskClosure.ancestor == task_id, TaskClosure.descendant == parent_task_id
+        ).limit(1)
+    ).first()
+    return found is not None
+
+
+# --- maintenance ----------------------------------------------------------------------------
+
+
+def _attach(connection, task_id: int, parent_task_id: Optional[int]) -> None:
+    """Link the subtree of ``task_id`` under ``parent_task_id`` and all of its ancestors."""
+    if parent_task_id is None:
+        return
+    cycle = connection.execute(
+        select(TaskClosure.depth).where(
+            TaskClosure.ancestor == task_id, TaskClosure.descendant == parent_task_id
+        ).limit(1)
+    ).first()
+    if cycle is not None or parent_task_id == task_id:
+        raise TaskCycleError(f"Task {parent_task_id} is inside the subtree of task {task_id}")
+    above = aliased(TaskClosure)
+    below = aliased(TaskClosure)
+    connection.execute(
+        insert(TaskClosure).from_select(
+            ["ancestor", "descendant", "depth"],
+            select(above.ancestor, below.descendant, above.depth + below.depth + 1)
+            .select_from(above).join(below, true())
+            .where(above.descendant == parent_task_id, below.ancestor == task_id),
+        )
+    )
+
+
+def _detach(connection, task_id: int) -> None:
+    """Cut the links between the subtree of ``task_id`` and everything above it."""
+    subtree = select(TaskClosure.descendant).where(TaskClosure.ancestor == task_id).scalar_subquery()
+    connection.execute(
+        delete(TaskClosure).where(
+            TaskClosure.descendant.in_(subtree),
+            TaskClosure.ancestor.notin_(subtree),
+        )
+    )
+
+
+def _sync_on_flush(session: Session, flush_context) -> None:
+    connection = session.connection()
+    new_tasks = [obj for obj in session.new if isinstance(obj, Task)]
+    if new_tasks:
+        connection.execute(
+            insert(TaskClosure),
+            [{"ancestor": obj.id, "descendant": obj.id, "depth": 0} for obj in new_tasks],
+        )
+        # Self rows first, so a parent and child created in the same flush link in any order.
+        for obj in new_tasks:
+            _attach(connection, obj.id, obj.parent_task_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Task) and inspect(obj).attrs.parent_task_id.history.has_changes():
+            _detach(connection, obj.id)
+            _attach(connection, obj.id, obj.parent_task_id)
+
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, Task)]
+    for task_id in deleted_ids:
+        # Children keep their own subtrees but lose every ancestor at or above the deleted task.
+        _detach(connection, task_id)
+    if deleted_ids:
+        connection.execute(
+            delete(TaskClosure).where(
+                TaskClosure.ancestor.in_(deleted_ids) | TaskClosure.descendant.in_(deleted_ids)
+            )
+        )
+
+
+def register_task_closure_listeners() -> None:
+    if not event.contains(Session, "after_flush", _sync_on_flush):
+        event.listen(Session, "after_flush", _sync_on_flush)
+
+
+def rebuild_task_closure(db: Session) -> Dict[str, int]:
+    """Recompute task_closure from tasks.parent_task_id. A parent link that closes a loop is ignored."""
+    parents: Dict[int, Optional[int]] = dict(db.query(Task.id, Task.parent_task_id).all())
+    rows = []
+    cycles = 0
+    for task_id in parents:
+        rows.append({"ancestor": task_id, "descendant": task_id, "depth": 0})
+        seen = {task_id}
+        parent_id, depth = parents.get(task_id), 1
+        while parent_id is not None and parent_id in parents:
+            if parent_id in seen:
+                cycles += 1
+                break
+            seen.add(parent_id)
+            rows.append({"ancestor": parent_id, "descendant": task_id, "depth": depth})
+            parent_id, depth = parents.get(parent_id), depth + 1
+
+    db.execute(delete(TaskClosure))
+    if rows:
+        db.execute(insert(TaskClosure), rows)
+    db.commit()
+    return {"tasks": len(parents), "rows": len(rows), "cycles": cycles}
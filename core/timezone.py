@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import pytz
 
 # Default timezone configuration
@@ -11,6 +11,17 @@ def get_current_time_in_timezone(timezone_str: str = DEFAULT_TIMEZONE) -> dateti
     utc_now = datetime.now(timezone.utc)
     return utc_now.astimezone(tz)
 
+def get_user_now(timezone_str: str | None) -> datetime:
+    """Current time in a user's timezone, falling back to UTC for unknown zones"""
+    try:
+        return get_current_time_in_timezone(timezone_str or "UTC")
+    except pytz.UnknownTimeZoneError:
+        return datetime.now(timezone.utc)
+
+def local_today(timezone_str: str | None) -> date:
+    """Today's date in a user's timezone"""
+    return get_user_now(timezone_str).date()
+
 def convert_to_timezone(dt: datetime, timezone_str: str = DEFAULT_TIMEZONE) -> datetime:
     """Convert a datetime to the specified timezone"""
     if dt.tzinfo is None:
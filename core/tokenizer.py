@@ -0,0 +1,79 @@
+import math
+import os
+import re
+from typing import Callable, Optional
+
+# Pieces roughly matching how byte-pair tokenizers split text: letter runs,
+# digit runs, runs of non-ASCII characters and single punctuation marks.
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\x00-\x7f]+|[^\sA-Za-z\d]")
+
+TokenCounter = Callable[[str], int]
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def estimate_bpe_tokens(text: str) -> int:
+    """
+    Fast tokenizer-free estimate. English words of up to ~5 letters are usually
+    one BPE token, digits merge in groups of three and non-Latin scripts
+    (e.g. Persian) average about four UTF-8 bytes per token.
+    """
+    if not text:
+        return 0
+    total = 0
+    for piece in _PIECE_RE.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            total += math.ceil(len(piece) / 5)
+        elif first.isdigit():
+            total += math.ceil(len(piece) / 3)
+        elif not first.isascii():
+            total += math.ceil(len(piece.encode("utf-8")) / 4)
+        else:
+            total += 1
+    return max(1, total)
+
+
+def _load_configured_counter() -> TokenCounter:
+    """
+    ASSISTANT_TOKENIZER_FILE points at a local HuggingFace ``tokenizer.json``
+    (matches most local models); ASSISTANT_TOKENIZER=tiktoken:<encoding> uses
+    tiktoken. Both are optional dependencies; anything missing falls back to
+    the estimator.
+    """
+    tokenizer_file = os.environ.get("ASSISTANT_TOKENIZER_FILE", "").strip()
+    if tokenizer_file:
+        try:
+            from tokenizers import Tokenizer
+
+            hf_tokenizer = Tokenizer.from_file(tokenizer_file)
+            return lambda text: len(hf_tokenizer.encode(text, add_special_tokens=False).ids)
+        except Exception:
+            pass
+
+    configured = os.environ.get("ASSISTANT_TOKENIZER", "").strip()
+    if configured.startswith("tiktoken:"):
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding(configured.split(":", 1)[1] or "cl100k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+
+    return estimate_bpe_tokens
+
+
+def set_token_counter(counter: Optional[TokenCounter]) -> None:
+    """Plug in a custom token counter; ``None`` restores the configured default."""
+    global _token_counter
+    _token_counter = counter
+
+
+def count_tokens(text: str) -> int:
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = _load_configured_counter()
+    if not text:
+        return 0
+    return _token_counter(text)
@@ -28,8 +28,32 @@ from routers import reminders as reminders_router
 from routers import assistant as assistant_router
 from routers import agentic_assistant as agentic_router
 from routers.notes import router as notes_router
-from core.database import engine, Base, get_db, migrate_reminders_table_if_needed
-from models import user, projects, models, keys, tasks, progress, reminders, assistant_memory, assistant_events
+from routers import sync as sync_router
+from core.database import (
+    engine,
+    Base,
+    get_db,
+    migrate_assistant_memory_if_needed,
+    migrate_assistant_turns_table_if_needed,
+    migrate_indexes_if_needed,
+    migrate_models_table_if_needed,
+    migrate_reminders_table_if_needed,
+    migrate_sync_columns_if_needed,
+    migrate_task_closure_if_needed,
+)
+from core.assistant_retention import (
+    ASSISTANT_EVENT_COMPACTION_INTERVAL_SECONDS,
+    compact_assistant_events,
+)
+from core.assistant_summarizer import SUMMARY_JOB_INTERVAL_SECONDS, summarize_pending_memories
+from core.background_jobs import start_periodic_job, stop_background_jobs
+from core.briefing_scheduler import BRIEFING_SCHEDULER_INTERVAL_SECONDS, pregenerate_due_briefings
+from core.entity_index import register_entity_index_listeners
+from core.delta_sync import SYNC_TOMBSTONE_PRUNE_INTERVAL_SECONDS, prune_sync_tombstones
+from core.file_cleanup import FILE_CLEANUP_INTERVAL_SECONDS, process_file_cleanup_queue
+from core.planner_version import register_planner_version_listeners
+from core.task_tree import register_task_closure_listeners
+from models import user, projects, models, keys, tasks, progress, reminders, assistant_memory, assistant_events, assistant_event_rollups, planner_version, assistant_cache, briefing_schedule, task_closure, file_cleanup, task_dependency, sync_tombstone
 from sqlalchemy.orm import Session
 from datetime import datetime as dt
 from core.auth import check_user_auth
@@ -39,6 +63,15 @@ from core.templates import templates
 # Create database tables
 Base.metadata.create_all(bind=engine)
 migrate_reminders_table_if_needed()
+migrate_models_table_if_needed()
+migrate_assistant_turns_table_if_needed()
+migrate_assistant_memory_if_needed()
+migrate_sync_columns_if_needed()
+migrate_indexes_if_needed()
+migrate_task_closure_if_needed()
+register_entity_index_listeners()
+register_planner_version_listeners()
+register_task_closure_listeners()
 
 # Create FastAPI instance
 app = FastAPI()
@@ -46,6 +79,38 @@ app = FastAPI()
 # Optional: Serve static files (CSS, JS, images)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def start_background_jobs():
+    start_periodic_job(
+        "assistant-event-compaction",
+        compact_assistant_events,
+        interval_seconds=ASSISTANT_EVENT_COMPACTION_INTERVAL_SECONDS,
+    )
+    start_periodic_job(
+        "assistant-memory-summarizer",
+        summarize_pending_memories,
+        interval_seconds=SUMMARY_JOB_INTERVAL_SECONDS,
+    )
+    start_periodic_job(
+        "briefing-pregeneration",
+        pregenerate_due_briefings,
+        interval_seconds=BRIEFING_SCHEDULER_INTERVAL_SECONDS,
+    )
+    start_periodic_job(
+        "file-cleanup",
+        process_file_cleanup_queue,
+        interval_seconds=FILE_CLEANUP_INTERVAL_SECONDS,
+    )
+    start_periodic_job(
+        "sync-tombstone-pruning",
+        prune_sync_tombstones,
+        interval_seconds=SYNC_TOMBSTONE_PRUNE_INTERVAL_SECONDS,
+    )
+
+@app.on_event("shutdown")
+async def shutdown_background_jobs():
+    await stop_background_jobs()
+
 # include routers
 app.include_router(date.router)
 app.include_router(user_router.router)
@@ -59,6 +124,7 @@ app.include_router(reminders_router.router)
 app.include_router(assistant_router.router)
 app.include_router(agentic_router.router)
 app.include_router(notes_router)
+app.include_router(sync_router.router)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request, db: Session = Depends(get_db)):
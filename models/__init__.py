@@ -8,3 +8,7 @@ from .models import Model
 from .reminders import Reminder
 from .keys import Key
 from .assistant_events import AssistantEvent
+from .assistant_event_rollups import AssistantEventDaily
+from .planner_version import PlannerVersion
+from .assistant_cache import AssistantResponseCache
+from .briefing_schedule import BriefingSchedule
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from core.database import Base
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -12,6 +12,7 @@ class ActivityStatus(Enum):
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (Index("ix_activities_version", "version"),)
     
     id = Column(Integer, primary_key=True, index=True)
     clock_in = Column(DateTime, nullable=False)
@@ -19,6 +20,9 @@ class Activity(Base):
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
     status = Column(String, nullable=False)  # Store as string
     description = Column(String, nullable=True)  # Optional description field
+    # Delta sync: the owner's planner version when the row last changed.
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime, nullable=True)
     
     # Relationships
     task = relationship("Task", foreign_keys=[task_id], back_populates="activities")
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class AssistantResponseCache(Base):
+    __tablename__ = "assistant_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    cache_key = Column(String, nullable=False, unique=True, index=True)
+    response = Column(Text, nullable=False)
+    meta = Column(Text, nullable=False, default="{}")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    owner_user = relationship("User")
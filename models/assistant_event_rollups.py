@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class AssistantEventDaily(Base):
+    __tablename__ = "assistant_event_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "owner", "day", "event_type", "action_type", "status",
+            name="uq_assistant_event_daily_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    day = Column(Date, nullable=False, index=True)
+    event_type = Column(String, nullable=False)
+    # Empty string instead of NULL so the unique key (and upserts on it) work in SQLite.
+    action_type = Column(String, nullable=False, default="")
+    status = Column(String, nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+
+    owner_user = relationship("User")
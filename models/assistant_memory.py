@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,6 +6,7 @@ from core.database import Base
 
 
 class AssistantMemory(Base):
+    # Legacy single-row memory blob; migrated into turns/summaries at startup.
     __tablename__ = "assistant_memory"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -17,3 +18,39 @@ class AssistantMemory(Base):
 
     owner_user = relationship("User")
 
+
+class AssistantTurn(Base):
+    __tablename__ = "assistant_turns"
+    __table_args__ = (
+        UniqueConstraint("owner", "mode", "seq", name="uq_assistant_turns_owner_mode_seq"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False)
+    mode = Column(String, nullable=False, default="assistant")
+    seq = Column(Integer, nullable=False)
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False, default="")
+    # Model that served the exchange; reused by the background summarizer.
+    model_api_key = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    owner_user = relationship("User")
+
+
+class AssistantMemorySummary(Base):
+    __tablename__ = "assistant_memory_summaries"
+    __table_args__ = (
+        UniqueConstraint("owner", "mode", "version", name="uq_assistant_memory_summaries_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False)
+    mode = Column(String, nullable=False, default="assistant")
+    version = Column(Integer, nullable=False)
+    summary = Column(Text, nullable=False, default="")
+    # Highest turn seq folded into this summary.
+    covers_through_seq = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    owner_user = relationship("User")
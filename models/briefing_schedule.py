@@ -0,0 +1,17 @@
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class BriefingSchedule(Base):
+    __tablename__ = "briefing_schedules"
+
+    owner = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    enabled = Column(Boolean, nullable=False, default=False)
+    local_time = Column(String, nullable=False, default="07:30")  # HH:MM in the user's timezone
+    model_api_key = Column(String, ForeignKey("models.api_key"), nullable=True)
+    project_mode = Column(String, nullable=False, default="auto")
+    last_generated_on = Column(Date, nullable=True)  # local date of the last pre-generated briefing
+
+    owner_user = relationship("User")
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from core.database import Base
+
+
+class FileCleanupJob(Base):
+    """A file or directory left on disk by a bulk delete, removed later by a background job."""
+
+    __tablename__ = "file_cleanup_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
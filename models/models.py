@@ -8,5 +8,6 @@ class Model(Base):
     owner = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     base_url = Column(String, nullable=False)
+    context_window = Column(Integer, nullable=True)  # tokens; None = unknown
     user = relationship("User", foreign_keys=[owner], back_populates="models")
     
\ No newline at end of file
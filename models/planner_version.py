@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, text
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class PlannerVersion(Base):
+    __tablename__ = "planner_versions"
+
+    owner = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Sync tokens below this may have lost pruned tombstones and need a full resync.
+    sync_floor = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+    owner_user = relationship("User")
@@ -1,15 +1,19 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from core.database import Base
 from sqlalchemy.orm import relationship
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_owner_version", "owner", "version"),)
     
     id = Column(Integer, primary_key=True, index=True)
     owner = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     color = Column(String, nullable=False)
+    # Delta sync: the owner's planner version when the row last changed.
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime, nullable=True)
     
     # Relationships
     owner_user = relationship("User", foreign_keys=[owner], back_populates="projects")
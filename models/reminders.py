@@ -1,15 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from core.database import Base
 
 class Reminder(Base):
     __tablename__ = "reminders"
+    __table_args__ = (Index("ix_reminders_owner_version", "owner_id", "version"),)
     
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     when = Column(DateTime, nullable=True)
     is_timeless = Column(Integer, nullable=False, server_default=text("0"))
     note = Column(String, nullable=False)
+    # Delta sync: the owner's planner version when the row last changed.
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime, nullable=True)
     
     # Relationships
     owner_user = relationship("User", back_populates="reminders")
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from core.database import Base
+
+
+class SyncTombstone(Base):
+    """Marks a deleted task, project, activity or reminder for delta-sync clients."""
+
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (Index("ix_sync_tombstones_owner_version", "owner", "version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)  # task | project | activity | reminder
+    entity_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
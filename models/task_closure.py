@@ -0,0 +1,14 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer
+
+from core.database import Base
+
+
+class TaskClosure(Base):
+    """One row per (ancestor, descendant) pair of the task tree, including (task, task, 0)."""
+
+    __tablename__ = "task_closure"
+    __table_args__ = (Index("ix_task_closure_descendant", "descendant", "depth"),)
+
+    ancestor = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    descendant = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
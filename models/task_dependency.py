@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, UniqueConstraint
+
+from core.database import Base
+
+
+class TaskDependency(Base):
+    """``task_id`` cannot start until ``depends_on_id`` is done."""
+
+    __tablename__ = "task_dependencies"
+    __table_args__ = (
+        UniqueConstraint("task_id", "depends_on_id", name="uq_task_dependency"),
+        Index("ix_task_dependencies_owner", "owner"),
+        Index("ix_task_dependencies_depends_on", "depends_on_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(Integer, ForeignKey("users.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    depends_on_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, text
 from core.database import Base
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -19,6 +19,15 @@ class TaskState(Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Composite indexes for the filtered/sorted task list and the Kanban board,
+    # all led by owner since every query is per user.
+    __table_args__ = (
+        Index("ix_tasks_owner_state_deadline", "owner", "state", "deadline"),
+        Index("ix_tasks_owner_project_state", "owner", "proj_id", "state"),
+        Index("ix_tasks_owner_flags_deadline", "owner", "is_urgent", "is_important", "deadline"),
+        Index("ix_tasks_owner_parent", "owner", "parent_task_id"),
+        Index("ix_tasks_owner_version", "owner", "version"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     owner = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -31,6 +40,9 @@ class Task(Base):
     state = Column(String, nullable=False)  # Store as string
     deadline = Column(DateTime, nullable=True)
     progress_id = Column(Integer, ForeignKey("progress.id"), nullable=False)
+    # Delta sync: the owner's planner version when the row last changed.
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime, nullable=True)
     
     # Relationships
     owner_user = relationship("User", foreign_keys=[owner], back_populates="tasks")
@@ -1,3 +1,4 @@
+import time
 import pytz
 from fastapi import APIRouter, HTTPException, Depends, Header, Query
 from sqlalchemy.orm import Session
@@ -8,7 +9,8 @@ from models.activity import Activity, ActivityStatus
 from models.user import User
 from models.keys import Key
 from models.tasks import Task
-from schemas.activity import ActivityCreate, ActivityUpdate, ActivityResponse, ACTIVITY_STATUS_MAP, ActivityDetailsResponse
+from schemas.activity import ActivityCreate, ActivityUpdate, ActivityResponse, ACTIVITY_STATUS_MAP, ActivityDetailsResponse, AutoScheduleRequest, AutoScheduleResponse
+from core.task_scheduler import MAX_SCHEDULE_DAYS, auto_schedule
 from core.timezone import convert_from_app_timezone, convert_to_timezone
 from models.projects import Project
 from pydantic import BaseModel
@@ -127,6 +129,68 @@ def create_activity(
     
     return created_activities
 
+@router.post("/auto-schedule", response_model=AutoScheduleResponse)
+def auto_schedule_tasks(
+    request: AutoScheduleRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Fit open tasks into free working time as PLANNED activities.
+
+    With ``dry_run`` (the default) nothing is saved and the proposed blocks are
+    returned for preview; send the same request with ``dry_run: false`` to book them.
+    Working hours and dates are in the user's timezone.
+    """
+    if request.end_date < request.start_date:
+        raise HTTPException(status_code=400, detail="End date must not be before start date")
+    if (request.end_date - request.start_date).days >= MAX_SCHEDULE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_SCHEDULE_DAYS} days")
+    if request.work_end <= request.work_start:
+        raise HTTPException(status_code=400, detail="Working hours must end after they start")
+    if any(day < 0 or day > 6 for day in request.work_days):
+        raise HTTPException(status_code=400, detail="Work days must be between 0 (Monday) and 6 (Sunday)")
+    if request.default_minutes < request.min_block_minutes:
+        raise HTTPException(status_code=400, detail="Default block length must not be shorter than the minimum block length")
+    if any(minutes < request.min_block_minutes or minutes > 24 * 60 for minutes in request.durations.values()):
+        raise HTTPException(status_code=400, detail="Task durations must be between the minimum block length and 24 hours")
+
+    user_timezone = current_user.timezone or "UTC"
+    try:
+        tz = pytz.timezone(user_timezone)
+    except pytz.UnknownTimeZoneError:
+        raise HTTPException(status_code=400, detail=f"Invalid timezone: {user_timezone}")
+
+    started = time.perf_counter()
+    result = auto_schedule(
+        db,
+        current_user.id,
+        user_timezone,
+        request.start_date,
+        request.end_date,
+        request.work_start,
+        request.work_end,
+        request.work_days,
+        default_minutes=request.default_minutes,
+        min_block_minutes=request.min_block_minutes,
+        durations=request.durations,
+        proj_id=request.proj_id,
+        task_ids=request.task_ids,
+        include_planned=request.include_planned,
+        dry_run=request.dry_run,
+    )
+    if not request.dry_run:
+        db.commit()
+
+    for block in result["blocks"]:
+        block["clock_in"] = pytz.UTC.localize(block["clock_in"]).astimezone(tz)
+        block["clock_out"] = pytz.UTC.localize(block["clock_out"]).astimezone(tz)
+    return AutoScheduleResponse(
+        dry_run=request.dry_run,
+        timezone=user_timezone,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        **result,
+    )
+
 @router.get("/", response_model=List[ActivityResponse])
 def get_activities(
     skip: int = 0, 
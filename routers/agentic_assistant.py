@@ -1,16 +1,19 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from core.crewai_env import disable_crewai_telemetry
-
-disable_crewai_telemetry()
-
-from crewai import Agent, Crew, LLM, Process, Task
 from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from core.assistant_context import build_compact_context, build_planner_snapshot, update_memory_after_response
+from core.assistant_context import (
+    build_compact_context,
+    build_planner_snapshot,
+    context_token_budget,
+    prompt_prefix_fingerprint,
+    update_memory_after_response,
+)
+from core.crewai_cache import checkout_agent
+from core.crewai_env import load_crewai
 from core.database import get_db
 from models.keys import Key
 from models.models import Model
@@ -25,6 +28,7 @@ class AgenticQuery(BaseModel):
     conversation_history: Optional[List[Dict[str, str]]] = []
     project_mode: str = "auto"
     focus_project_id: Optional[int] = None
+    prompt_layout: Optional[str] = None
 
 
 class AgenticResponse(BaseModel):
@@ -112,51 +116,42 @@ def run_agentic_crewai(
     agent_name: str,
     agent_goal: str,
 ) -> str:
-    llm = LLM(
-        model=model.name,
-        base_url=model.base_url,
-        api_key=model.api_key,
-        temperature=0.2,
-    )
-
-    specialist = Agent(
+    crewai = load_crewai()
+    with checkout_agent(
+        model,
         role=agent_name,
         goal=agent_goal,
         backstory=(
             "You are a specialist in personal planning software. "
             "You answer with concise, actionable markdown."
         ),
-        allow_delegation=False,
-        llm=llm,
-        verbose=False,
-    )
-
-    task = Task(
-        description=(
-            "{user_prompt}\n\n"
-            "Known user context (JSON-like):\n{user_context}\n\n"
-            "Respond with practical next actions and clear prioritization. "
-            "Tie recommendations to project names and task IDs when available."
-        ),
-        expected_output=(
-            "Markdown with sections: Situation, Priorities, Next 3 actions, and Timeboxing."
-        ),
-        agent=specialist,
-    )
+    ) as specialist:
+        task = crewai.Task(
+            description=(
+                "{user_prompt}\n\n"
+                "Known user context (JSON-like):\n{user_context}\n\n"
+                "Respond with practical next actions and clear prioritization. "
+                "Tie recommendations to project names and task IDs when available."
+            ),
+            expected_output=(
+                "Markdown with sections: Situation, Priorities, Next 3 actions, and Timeboxing."
+            ),
+            agent=specialist,
+        )
 
-    crew = Crew(
-        agents=[specialist],
-        tasks=[task],
-        process=Process.sequential,
-        verbose=False,
-    )
+        crew = crewai.Crew(
+            agents=[specialist],
+            tasks=[task],
+            process=crewai.Process.sequential,
+            verbose=False,
+        )
 
-    result = crew.kickoff(
-        inputs={
-            "user_prompt": user_prompt,
-            "user_context": str(context),
-        }
-    )
+        result = crew.kickoff(
+            inputs={
+                "user_prompt": user_prompt,
+                "user_context": str(context),
+            }
+        )
     return getattr(result, "raw", str(result))
 
 
@@ -191,6 +186,8 @@ async def agentic_query(
             incoming_history=query.conversation_history or [],
             project_mode=query.project_mode,
             focus_project_id=query.focus_project_id,
+            token_budget=context_token_budget(model.context_window),
+            layout=query.prompt_layout,
         )
         effective_prompt = (
             f"{compact['context_text']}\n\n"
@@ -207,10 +204,10 @@ async def agentic_query(
         )
         update_memory_after_response(
             db=db,
-            memory=compact["memory_row"],
-            merged_history=compact["merged_history"],
+            memory=compact["memory"],
             user_prompt=query.user_prompt,
             assistant_response=response_text,
+            model_api_key=model.api_key,
         )
 
         return AgenticResponse(
@@ -229,6 +226,9 @@ async def agentic_query(
                 "matched_entities": context.get("matched_entities_count", 0),
                 "focused_projects": len(context.get("focused_projects", [])),
                 "project_mode": context.get("project_mode", "auto"),
+                "prompt_layout": compact["layout"],
+                "prefix_fingerprint": prompt_prefix_fingerprint(compact["stable_prefix"]),
+                "prefix_tokens": compact["prefix_tokens"],
             },
         )
     except Exception as exc:
@@ -1,29 +1,46 @@
+import asyncio
 import json
+import os
 from datetime import datetime, timedelta
-from typing import AsyncIterator, Dict, List, Optional
-from urllib.parse import urlparse
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from core.crewai_env import disable_crewai_telemetry
-
-disable_crewai_telemetry()
-
-import httpx
-from crewai import Agent, Crew, LLM, Process, Task
 from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import func
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from core.assistant_context import (
     build_compact_context,
     build_planner_snapshot,
+    context_token_budget,
+    prompt_prefix_fingerprint,
+    snapshot_cache_stats,
     update_memory_after_response,
 )
+from core.assistant_briefing import (
+    daily_briefing_request,
+    generate_daily_briefing,
+    planner_cache_key,
+    remember_briefing_model,
+    run_crewai_assistant,
+)
+from core.assistant_events import assistant_event_values, log_assistant_event
+from core.assistant_retention import count_assistant_events
+from core.briefing_scheduler import DEFAULT_BRIEFING_TIME, parse_local_time
+from core.crewai_cache import crewai_cache_stats
 from core.database import get_db
+from core.llm_stream import stream_openai_compatible_completion
+from core.response_cache import (
+    BRIEFING_CACHE_TTL_SECONDS,
+    RECOVERY_CACHE_TTL_SECONDS,
+    get_cached_response,
+    store_cached_response,
+)
 from models.activity import Activity
 from models.assistant_events import AssistantEvent
-from models.assistant_memory import AssistantMemory
+from models.assistant_memory import AssistantMemory, AssistantMemorySummary, AssistantTurn
+from models.briefing_schedule import BriefingSchedule
 from models.keys import Key
 from models.models import Model
 from models.progress import Progress
@@ -34,6 +51,12 @@ from models.user import User
 
 router = APIRouter()
 
+MAX_EVENT_BATCH_SIZE = 200
+# Hedging: start the next configured model when no token has arrived after this
+# many milliseconds (0 disables it unless a request sets hedge_after_ms).
+ASSISTANT_HEDGE_AFTER_MS = max(0, int(os.environ.get("ASSISTANT_HEDGE_AFTER_MS", "0")))
+MAX_HEDGE_MODELS = 3
+
 
 class AssistantQuery(BaseModel):
     model_api_key: str
@@ -42,6 +65,7 @@ class AssistantQuery(BaseModel):
     conversation_history: Optional[List[Dict[str, str]]] = []
     project_mode: str = "auto"
     focus_project_id: Optional[int] = None
+    prompt_layout: Optional[str] = None
 
 
 class AssistantStreamQuery(BaseModel):
@@ -52,6 +76,8 @@ class AssistantStreamQuery(BaseModel):
     agentic_mode: bool = True
     project_mode: str = "auto"
     focus_project_id: Optional[int] = None
+    hedge_after_ms: Optional[int] = None
+    prompt_layout: Optional[str] = None
 
 
 class MemoryResetRequest(BaseModel):
@@ -77,6 +103,15 @@ class AssistantPlannerRequest(BaseModel):
     horizon: str = "today"
     project_mode: str = "auto"
     focus_project_id: Optional[int] = None
+    refresh: bool = False
+    hedge_after_ms: Optional[int] = None
+
+
+class BriefingScheduleRequest(BaseModel):
+    enabled: bool
+    local_time: str = DEFAULT_BRIEFING_TIME
+    model_api_key: Optional[str] = None
+    project_mode: str = "auto"
 
 
 class AssistantActionRequest(BaseModel):
@@ -98,6 +133,10 @@ class AssistantEventRequest(BaseModel):
     metadata: Optional[Dict[str, object]] = None
 
 
+class AssistantEventBatchRequest(BaseModel):
+    events: List[AssistantEventRequest] = []
+
+
 class AssistantEffectivenessResponse(BaseModel):
     window_days: int
     total_events: int
@@ -127,52 +166,6 @@ def get_current_user(
     return key_record.owner_user
 
 
-def run_crewai_assistant(system_prompt: str, user_prompt: str, model: Model) -> str:
-    llm = LLM(
-        model=model.name,
-        base_url=model.base_url,
-        api_key=model.api_key,
-        temperature=0.2,
-    )
-
-    assistant_agent = Agent(
-        role="Personal Productivity Assistant",
-        goal="Give practical, accurate planning help based on the user's request.",
-        backstory=(
-            "You are a concise assistant focused on actionable productivity plans, "
-            "task prioritization, and time management."
-        ),
-        allow_delegation=False,
-        llm=llm,
-        verbose=False,
-    )
-
-    assistant_task = Task(
-        description=("System instructions:\n{system_prompt}\n\n{user_prompt}"),
-        expected_output=(
-            "Markdown with sections: Situation, Priorities, Next 3 actions, and Timeboxing. "
-            "Reference real task IDs/project names when possible."
-        ),
-        agent=assistant_agent,
-    )
-
-    crew = Crew(
-        agents=[assistant_agent],
-        tasks=[assistant_task],
-        process=Process.sequential,
-        verbose=False,
-    )
-
-    result = crew.kickoff(
-        inputs={
-            "system_prompt": system_prompt,
-            "user_prompt": user_prompt,
-        }
-    )
-
-    return getattr(result, "raw", str(result))
-
-
 def _require_model_for_user(db: Session, user_id: int, model_api_key: str) -> Model:
     model = db.query(Model).filter(Model.api_key == model_api_key, Model.owner == user_id).first()
     if not model:
@@ -180,6 +173,15 @@ def _require_model_for_user(db: Session, user_id: int, model_api_key: str) -> Mo
     return model
 
 
+def _hedge_models(db: Session, user_id: int, primary: Model, hedge_after_ms: Optional[int]) -> List[Model]:
+    """The primary model followed by the user's other models, in the order they were added."""
+    delay = ASSISTANT_HEDGE_AFTER_MS if hedge_after_ms is None else hedge_after_ms
+    if delay <= 0:
+        return [primary]
+    others = db.query(Model).filter(Model.owner == user_id, Model.api_key != primary.api_key).all()
+    return ([primary] + others)[:MAX_HEDGE_MODELS]
+
+
 def _find_or_create_progress(db: Session, user_id: int) -> Progress:
     progress = db.query(Progress).filter(Progress.owner == user_id).order_by(Progress.id.asc()).first()
     if progress:
@@ -199,24 +201,126 @@ def _find_default_project(db: Session, user_id: int) -> Optional[Project]:
     )
 
 
-def _log_assistant_event(
+def _recovery_plan_request(
+    db: Session,
+    user_id: int,
+    project_mode: str = "auto",
+    focus_project_id: Optional[int] = None,
+) -> Tuple[str, str, Dict[str, object]]:
+    snapshot = build_planner_snapshot(
+        db=db,
+        user_id=user_id,
+        user_prompt="recovery overdue missed",
+        project_mode=project_mode,
+        focus_project_id=focus_project_id,
+    )
+    metrics = snapshot["metrics"]
+    risk_score = min(
+        100,
+        (metrics.get("urgent_open_tasks", 0) * 15)
+        + (max(metrics.get("open_tasks", 0) - metrics.get("done_tasks", 0), 0) * 2),
+    )
+
+    prompt = (
+        f"{snapshot['context_block']}\n\n"
+        f"Current risk score: {risk_score}/100.\n"
+        "Create a recovery plan to get the user back on track this week. "
+        "Include: what to pause, what to keep, and a day-by-day rescue plan. "
+        "Add one anti-overcommit rule and the first rescue action to do immediately."
+    )
+    system = (
+        "You are a crisis replanning specialist for personal productivity. "
+        "Prioritize clarity, constraints, and realistic execution."
+    )
+    meta = {
+        "risk_score": risk_score,
+        "urgent_open_tasks": metrics.get("urgent_open_tasks", 0),
+        "project_mode": snapshot.get("project_mode", "auto"),
+    }
+    return system, prompt, meta
+
+
+def _planner_stream_response(
     db: Session,
     user_id: int,
+    models: List[Model],
+    kind: str,
+    cache_key: str,
+    cached: Optional[Dict[str, object]],
+    request: Optional[Tuple[str, str, Dict[str, object]]],
     event_type: str,
-    source: str = "assistant",
-    action_type: Optional[str] = None,
-    status: Optional[str] = None,
-    metadata: Optional[Dict[str, object]] = None,
-) -> None:
-    event = AssistantEvent(
-        owner=user_id,
-        event_type=(event_type or "unknown").strip().lower(),
-        source=(source or "assistant").strip().lower(),
-        action_type=(action_type.strip().lower() if action_type else None),
-        status=(status.strip().lower() if status else None),
-        payload=json.dumps(metadata or {}, ensure_ascii=True),
+    source: str,
+    event_metadata: Dict[str, object],
+    ttl_seconds: int,
+    hedge_after_ms: Optional[int] = None,
+) -> StreamingResponse:
+    """SSE (meta/delta/done) for a planner response, replaying the cached text when there is one."""
+
+    async def event_stream() -> AsyncIterator[str]:
+        if cached is not None:
+            log_assistant_event(
+                db=db,
+                user_id=user_id,
+                event_type=event_type,
+                source=source,
+                status="success",
+                metadata={**event_metadata, "cached": True, "stream": True},
+            )
+            db.commit()
+            meta = {**cached["meta"], "cached": True, "generated_at": cached["created_at"].isoformat()}
+            yield f"event: meta\ndata: {json.dumps(meta, ensure_ascii=True)}\n\n"
+            yield f"event: delta\ndata: {json.dumps({'text': cached['response']}, ensure_ascii=True)}\n\n"
+            yield f"event: done\ndata: {json.dumps({'response': cached['response']}, ensure_ascii=True)}\n\n"
+            return
+
+        system_prompt, user_prompt, meta = request
+        yield f"event: meta\ndata: {json.dumps({**meta, 'cached': False}, ensure_ascii=True)}\n\n"
+
+        collected: List[str] = []
+        served: Dict[str, object] = {}
+        try:
+            async for piece in _stream_with_hedging(
+                models,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                served=served,
+                hedge_after_ms=hedge_after_ms,
+            ):
+                collected.append(piece)
+                yield f"event: delta\ndata: {json.dumps({'text': piece}, ensure_ascii=True)}\n\n"
+
+            final_text = "".join(collected).strip() or "No response."
+            served_model = served.get("model") or models[0]
+            log_assistant_event(
+                db=db,
+                user_id=user_id,
+                event_type=event_type,
+                source=source,
+                status="success",
+                metadata={
+                    **event_metadata,
+                    "cached": False,
+                    "stream": True,
+                    "served_model": served_model.name,
+                    "hedged": bool(served.get("hedged")),
+                    "model_attempts": served.get("attempts", 1),
+                },
+            )
+            store_cached_response(db, user_id, kind, cache_key, final_text, meta, ttl_seconds)
+            db.commit()
+            done = {"response": final_text, "served_model": served_model.name}
+            yield f"event: done\ndata: {json.dumps(done, ensure_ascii=True)}\n\n"
+        except Exception as exc:
+            db.rollback()
+            yield f"event: error\ndata: {json.dumps({'detail': str(getattr(exc, 'detail', exc))}, ensure_ascii=True)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
     )
-    db.add(event)
 
 
 def _choose_agent(user_prompt: str) -> tuple[str, str]:
@@ -242,202 +346,83 @@ def _choose_agent(user_prompt: str) -> tuple[str, str]:
     )
 
 
-async def _stream_openai_compatible_completion(
-    model: Model,
+async def _stream_with_hedging(
+    models: List[Model],
     messages: List[Dict[str, str]],
+    served: Dict[str, object],
+    hedge_after_ms: Optional[int] = None,
     temperature: float = 0.2,
 ) -> AsyncIterator[str]:
-    def _extract_piece(chunk: Dict[str, object], kind: str) -> str:
-        if kind == "ollama_chat":
-            return (((chunk.get("message") or {}) if isinstance(chunk, dict) else {}).get("content") or "")
-
-        choices = chunk.get("choices") if isinstance(chunk, dict) else None
-        if not choices or not isinstance(choices, list):
-            return ""
-        choice = choices[0] if choices else {}
-        if not isinstance(choice, dict):
-            return ""
-
-        if kind == "openai_chat":
-            return (
-                ((choice.get("delta") or {}).get("content") if isinstance(choice.get("delta"), dict) else None)
-                or ((choice.get("message") or {}).get("content") if isinstance(choice.get("message"), dict) else None)
-                or (choice.get("text") if isinstance(choice.get("text"), str) else "")
-                or ""
-            )
-        return (
-            (choice.get("text") if isinstance(choice.get("text"), str) else None)
-            or ((choice.get("message") or {}).get("content") if isinstance(choice.get("message"), dict) else None)
-            or ""
-        )
-
-    def _base_candidates(raw_base: str) -> List[str]:
-        trimmed = (raw_base or "").strip().rstrip("/")
-        if not trimmed:
-            return []
-
-        parsed = urlparse(trimmed)
-        if not parsed.scheme:
-            host = trimmed.lstrip("/")
-            return [f"http://{host}", f"https://{host}"]
-
-        if parsed.scheme == "http":
-            return [trimmed, f"https://{trimmed[len('http://') :]}"]
-        if parsed.scheme == "https":
-            return [trimmed, f"http://{trimmed[len('https://') :]}"]
-        return [trimmed]
-
-    base = (model.base_url or "").strip().rstrip("/")
-    if not base:
-        raise HTTPException(status_code=400, detail="Model base_url is empty")
-    bases = _base_candidates(base)
-
-    auth_headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {model.api_key}",
-    }
-
-    prompt_text = "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
-    ollama_model = model.name.split("/")[-1] if "/" in model.name else model.name
-
-    candidate_pool = []
-    for candidate_base in bases:
-        ollama_base = candidate_base[:-3] if candidate_base.endswith("/v1") else candidate_base
-        openai_base = candidate_base if candidate_base.endswith("/v1") else f"{candidate_base}/v1"
-        candidate_pool.extend(
-            [
-                {
-                    "kind": "openai_chat",
-                    "url": f"{candidate_base}/chat/completions",
-                    "headers": auth_headers,
-                    "payload": {
-                        "model": model.name,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": True,
-                    },
-                },
-                {
-                    "kind": "openai_completions",
-                    "url": f"{candidate_base}/completions",
-                    "headers": auth_headers,
-                    "payload": {
-                        "model": model.name,
-                        "prompt": prompt_text,
-                        "temperature": temperature,
-                        "stream": True,
-                    },
-                },
-                {
-                    "kind": "openai_chat",
-                    "url": f"{openai_base}/chat/completions",
-                    "headers": auth_headers,
-                    "payload": {
-                        "model": model.name,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": True,
-                    },
-                },
-                {
-                    "kind": "openai_completions",
-                    "url": f"{openai_base}/completions",
-                    "headers": auth_headers,
-                    "payload": {
-                        "model": model.name,
-                        "prompt": prompt_text,
-                        "temperature": temperature,
-                        "stream": True,
-                    },
-                },
-                {
-                    "kind": "ollama_chat",
-                    "url": f"{ollama_base}/api/chat",
-                    "headers": {"Content-Type": "application/json"},
-                    "payload": {
-                        "model": ollama_model,
-                        "messages": messages,
-                        "stream": True,
-                    },
-                },
-            ]
-        )
-    # Deduplicate candidate URLs while preserving order.
-    seen_urls = set()
-    candidates = []
-    for candidate in candidate_pool:
-        url = candidate["url"]
-        if url in seen_urls:
-            continue
-        seen_urls.add(url)
-        candidates.append(candidate)
-
-    last_error = None
-    attempt_errors = []
-    async with httpx.AsyncClient(
-        timeout=httpx.Timeout(120.0, read=120.0),
-        trust_env=False,
-        follow_redirects=True,
-    ) as client:
-        for candidate in candidates:
+    """
+    Stream from ``models[0]``; if no token arrives within the hedge delay, or it
+    fails first, start the next model as well. The first model to produce a
+    token wins and the others are cancelled. ``served`` receives the winner.
+    """
+    delay = (ASSISTANT_HEDGE_AFTER_MS if hedge_after_ms is None else hedge_after_ms) / 1000
+    queue: asyncio.Queue = asyncio.Queue()
+    attempts: List[asyncio.Task] = []
+    winner: Optional[int] = None
+    failures = 0
+    loop = asyncio.get_running_loop()
+    hedge_at = 0.0
+
+    async def pump(index: int) -> None:
+        try:
+            async for piece in stream_openai_compatible_completion(
+                model=models[index], messages=messages, temperature=temperature
+            ):
+                await queue.put(("piece", index, piece))
+            await queue.put(("done", index, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await queue.put(("error", index, exc))
+
+    def launch() -> None:
+        nonlocal hedge_at
+        attempts.append(asyncio.create_task(pump(len(attempts))))
+        hedge_at = loop.time() + delay
+
+    def settle(index: int) -> None:
+        nonlocal winner
+        winner = index
+        served.update(model=models[index], attempts=len(attempts), hedged=index > 0)
+        for other, attempt in enumerate(attempts):
+            if other != index:
+                attempt.cancel()
+
+    launch()
+    try:
+        while True:
+            timeout = None
+            if winner is None and delay > 0 and len(attempts) < len(models):
+                timeout = max(0.0, hedge_at - loop.time())
             try:
-                async with client.stream(
-                    "POST",
-                    candidate["url"],
-                    json=candidate["payload"],
-                    headers=candidate["headers"],
-                ) as response:
-                    if response.status_code == 404:
-                        last_error = f"404 at {candidate['url']}"
-                        attempt_errors.append(last_error)
-                        continue
-                    response.raise_for_status()
-
-                    if candidate["kind"] in {"openai_chat", "openai_completions"}:
-                        async for raw_line in response.aiter_lines():
-                            if not raw_line:
-                                continue
-                            data = raw_line[5:].strip() if raw_line.startswith("data:") else raw_line.strip()
-                            if not data:
-                                continue
-                            if data == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data)
-                            except Exception:
-                                continue
-                            piece = _extract_piece(chunk, candidate["kind"])
-                            if piece:
-                                yield piece
-                        return
-
-                    if candidate["kind"] == "ollama_chat":
-                        async for raw_line in response.aiter_lines():
-                            if not raw_line:
-                                continue
-                            try:
-                                chunk = json.loads(raw_line)
-                            except Exception:
-                                continue
-                            piece = _extract_piece(chunk, "ollama_chat")
-                            if piece:
-                                yield piece
-                            if chunk.get("done") is True:
-                                break
-                        return
-            except Exception as exc:
-                last_error = f"{type(exc).__name__}: {exc}"
-                attempt_errors.append(f"{candidate['url']} -> {last_error}")
+                kind, index, value = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                launch()
                 continue
-
-    raise HTTPException(
-        status_code=502,
-        detail=(
-            "Streaming failed: no compatible endpoint found for this model/base_url. "
-            f"Last error: {last_error or 'unknown'}. "
-            f"Tried: {' | '.join(attempt_errors[-4:]) if attempt_errors else 'no candidates'}"
-        ),
-    )
+            if winner is not None and index != winner:
+                continue
+            if kind == "piece":
+                if winner is None:
+                    settle(index)
+                yield value
+            elif kind == "done":
+                if winner is None:
+                    settle(index)
+                return
+            else:
+                if winner is not None:
+                    raise value
+                failures += 1
+                if len(attempts) < len(models):
+                    launch()
+                elif failures == len(attempts):
+                    raise value
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
 
 
 @router.post("/query")
@@ -457,6 +442,8 @@ async def query_assistant(
             incoming_history=query.conversation_history or [],
             project_mode=query.project_mode,
             focus_project_id=query.focus_project_id,
+            token_budget=context_token_budget(model.context_window),
+            layout=query.prompt_layout,
         )
         effective_prompt = (
             f"{compact['context_text']}\n\n"
@@ -471,12 +458,12 @@ async def query_assistant(
         )
         update_memory_after_response(
             db=db,
-            memory=compact["memory_row"],
-            merged_history=compact["merged_history"],
+            memory=compact["memory"],
             user_prompt=query.user_prompt,
             assistant_response=response_text,
+            model_api_key=model.api_key,
         )
-        _log_assistant_event(
+        log_assistant_event(
             db=db,
             user_id=current_user.id,
             event_type="assistant_response",
@@ -486,6 +473,9 @@ async def query_assistant(
                 "agentic": False,
                 "estimated_tokens": compact["estimated_tokens"],
                 "compacted": compact["compacted"],
+                "prompt_layout": compact["layout"],
+                "prefix_fingerprint": prompt_prefix_fingerprint(query.system_prompt or "", compact["stable_prefix"]),
+                "prefix_tokens": compact["prefix_tokens"],
             },
         )
         db.commit()
@@ -494,6 +484,7 @@ async def query_assistant(
             "response": response_text,
             "meta": {
                 "estimated_tokens": compact["estimated_tokens"],
+                "token_budget": compact["token_budget"],
                 "compacted": compact["compacted"],
                 "matched_entities": snapshot.get("matched_entities_count", 0),
                 "focused_projects": len(snapshot.get("focused_projects", [])),
@@ -520,61 +511,81 @@ async def stream_assistant_response(
         incoming_history=query.conversation_history or [],
         project_mode=query.project_mode,
         focus_project_id=query.focus_project_id,
+        token_budget=context_token_budget(model.context_window),
+        layout=query.prompt_layout,
     )
 
     snapshot = compact.get("planner_snapshot", {})
+    hedge_models = _hedge_models(db, current_user.id, model, query.hedge_after_ms)
     agent_name = "single-model"
+    agent_line = ""
+    default_system_prompt = (
+        "You are a practical planning assistant. Output markdown with: "
+        "Situation, Priorities, Next 3 actions, Timeboxing."
+    )
     if query.agentic_mode:
         agent_name, agent_goal = _choose_agent(query.user_prompt)
-        system_prompt = (
-            f"You are {agent_name}. {agent_goal} "
-            "Output markdown with: Situation, Priorities, Next 3 actions, Timeboxing."
-        )
+        if compact["layout"] == "stable":
+            # Routing changes per prompt, so the persona goes last to keep the system prompt constant.
+            system_prompt = default_system_prompt
+            agent_line = f"Respond as {agent_name}. {agent_goal}\n\n"
+        else:
+            system_prompt = (
+                f"You are {agent_name}. {agent_goal} "
+                "Output markdown with: Situation, Priorities, Next 3 actions, Timeboxing."
+            )
     else:
-        system_prompt = (query.system_prompt or "").strip() or (
-            "You are a practical planning assistant. Output markdown with: "
-            "Situation, Priorities, Next 3 actions, Timeboxing."
-        )
+        system_prompt = (query.system_prompt or "").strip() or default_system_prompt
 
     effective_prompt = (
         f"{compact['context_text']}\n\n"
+        f"{agent_line}"
         f"Context status: estimated tokens {compact['estimated_tokens']}. "
         f"{'Older content compacted.' if compact['compacted'] else 'No compaction applied.'}"
     )
+    prefix_fingerprint = prompt_prefix_fingerprint(system_prompt, compact["stable_prefix"])
 
     async def event_stream() -> AsyncIterator[str]:
         meta = {
             "estimated_tokens": compact["estimated_tokens"],
+            "token_budget": compact["token_budget"],
             "compacted": compact["compacted"],
             "matched_entities": snapshot.get("matched_entities_count", 0),
             "focused_projects": len(snapshot.get("focused_projects", [])),
             "project_mode": snapshot.get("project_mode", query.project_mode),
             "agent_used": agent_name,
+            "prompt_layout": compact["layout"],
+            "prefix_fingerprint": prefix_fingerprint,
+            "prefix_tokens": compact["prefix_tokens"],
+            "snapshot_cached": compact["snapshot_cached"],
         }
         yield f"event: meta\ndata: {json.dumps(meta, ensure_ascii=True)}\n\n"
 
         collected: List[str] = []
+        served: Dict[str, object] = {}
         try:
-            async for piece in _stream_openai_compatible_completion(
-                model=model,
+            async for piece in _stream_with_hedging(
+                hedge_models,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": effective_prompt},
                 ],
-                temperature=0.2,
+                served=served,
+                hedge_after_ms=query.hedge_after_ms,
             ):
                 collected.append(piece)
                 yield f"event: delta\ndata: {json.dumps({'text': piece}, ensure_ascii=True)}\n\n"
 
             final_text = "".join(collected).strip() or "No response."
+            served_model = served.get("model") or model
             update_memory_after_response(
                 db=db,
-                memory=compact["memory_row"],
-                merged_history=compact["merged_history"],
+                memory=compact["memory"],
                 user_prompt=query.user_prompt,
                 assistant_response=final_text,
+                model_api_key=served_model.api_key,
             )
-            _log_assistant_event(
+            log_assistant_event(
                 db=db,
                 user_id=current_user.id,
                 event_type="assistant_response_stream",
@@ -583,10 +594,17 @@ async def stream_assistant_response(
                 metadata={
                     "agentic": query.agentic_mode,
                     "project_mode": query.project_mode,
+                    "served_model": served_model.name,
+                    "hedged": bool(served.get("hedged")),
+                    "model_attempts": served.get("attempts", 1),
+                    "prompt_layout": compact["layout"],
+                    "prefix_fingerprint": prefix_fingerprint,
+                    "prefix_tokens": compact["prefix_tokens"],
                 },
             )
             db.commit()
-            yield f"event: done\ndata: {json.dumps({'response': final_text}, ensure_ascii=True)}\n\n"
+            done = {"response": final_text, "served_model": served_model.name}
+            yield f"event: done\ndata: {json.dumps(done, ensure_ascii=True)}\n\n"
         except Exception as exc:
             db.rollback()
             yield f"event: error\ndata: {json.dumps({'detail': str(exc)}, ensure_ascii=True)}\n\n"
@@ -605,49 +623,38 @@ async def build_daily_briefing(
     db: Session = Depends(get_db),
 ):
     model = _require_model_for_user(db, current_user.id, payload.model_api_key)
-    snapshot = build_planner_snapshot(
-        db=db,
-        user_id=current_user.id,
-        user_prompt="",
-        project_mode=payload.project_mode,
-        focus_project_id=payload.focus_project_id,
-    )
-
     horizon = (payload.horizon or "today").strip().lower()
-    hours = 24 if horizon == "today" else 72
-    prompt = (
-        f"{snapshot['context_block']}\n\n"
-        f"Build a concise {horizon} command-center briefing for the next {hours} hours. "
-        "Use exact task IDs and project names from the context. "
-        "Include: 1) mission statement, 2) top priorities, 3) risk alerts, "
-        "4) a timeboxed execution plan. "
-        "Be explicit about what the user should do in the next 90 minutes."
-    )
-    system = (
-        "You are the planning command center for a smart productivity app. "
-        "Your briefings must be specific, realistic, and immediately executable. "
-        "Avoid generic advice and tie all recommendations to planner entities."
-    )
+    if horizon == "today":
+        remember_briefing_model(db, current_user.id, model.api_key)
+    if not payload.refresh:
+        cache_key = planner_cache_key(
+            db, "daily_briefing", current_user, model.api_key, horizon, payload.project_mode, payload.focus_project_id
+        )
+        cached = get_cached_response(db, current_user.id, cache_key)
+        if cached is not None:
+            log_assistant_event(
+                db=db,
+                user_id=current_user.id,
+                event_type="briefing_generated",
+                source="daily_briefing",
+                status="success",
+                metadata={"horizon": horizon, "cached": True},
+            )
+            db.commit()
+            return {
+                "briefing": cached["response"],
+                "meta": {**cached["meta"], "cached": True, "generated_at": cached["created_at"].isoformat()},
+            }
+
     try:
-        response_text = run_crewai_assistant(system_prompt=system, user_prompt=prompt, model=model)
-        _log_assistant_event(
-            db=db,
-            user_id=current_user.id,
-            event_type="briefing_generated",
-            source="daily_briefing",
-            status="success",
-            metadata={"horizon": horizon},
+        return generate_daily_briefing(
+            db,
+            current_user,
+            model,
+            horizon=horizon,
+            project_mode=payload.project_mode,
+            focus_project_id=payload.focus_project_id,
         )
-        db.commit()
-        return {
-            "briefing": response_text,
-            "meta": {
-                "horizon": horizon,
-                "focused_projects": len(snapshot.get("focused_projects", [])),
-                "urgent_open_tasks": snapshot.get("metrics", {}).get("urgent_open_tasks", 0),
-                "project_mode": snapshot.get("project_mode", "auto"),
-            },
-        }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"CrewAI error: {str(exc)}")
 
@@ -659,55 +666,169 @@ async def build_recovery_plan(
     db: Session = Depends(get_db),
 ):
     model = _require_model_for_user(db, current_user.id, payload.model_api_key)
-    snapshot = build_planner_snapshot(
-        db=db,
-        user_id=current_user.id,
-        user_prompt="recovery overdue missed",
-        project_mode=payload.project_mode,
-        focus_project_id=payload.focus_project_id,
-    )
-    metrics = snapshot["metrics"]
-    risk_score = min(
-        100,
-        (metrics.get("urgent_open_tasks", 0) * 15)
-        + (max(metrics.get("open_tasks", 0) - metrics.get("done_tasks", 0), 0) * 2),
+    cache_key = planner_cache_key(
+        db, "recovery_plan", current_user, model.api_key, "week", payload.project_mode, payload.focus_project_id
     )
+    if not payload.refresh:
+        cached = get_cached_response(db, current_user.id, cache_key)
+        if cached is not None:
+            log_assistant_event(
+                db=db,
+                user_id=current_user.id,
+                event_type="recovery_generated",
+                source="recovery_plan",
+                status="success",
+                metadata={"risk_score": cached["meta"].get("risk_score"), "cached": True},
+            )
+            db.commit()
+            return {
+                "recovery_plan": cached["response"],
+                "meta": {**cached["meta"], "cached": True, "generated_at": cached["created_at"].isoformat()},
+            }
 
-    prompt = (
-        f"{snapshot['context_block']}\n\n"
-        f"Current risk score: {risk_score}/100.\n"
-        "Create a recovery plan to get the user back on track this week. "
-        "Include: what to pause, what to keep, and a day-by-day rescue plan. "
-        "Add one anti-overcommit rule and the first rescue action to do immediately."
-    )
-    system = (
-        "You are a crisis replanning specialist for personal productivity. "
-        "Prioritize clarity, constraints, and realistic execution."
+    system, prompt, meta = _recovery_plan_request(
+        db, current_user.id, payload.project_mode, payload.focus_project_id
     )
-
     try:
         response_text = run_crewai_assistant(system_prompt=system, user_prompt=prompt, model=model)
-        _log_assistant_event(
+        log_assistant_event(
             db=db,
             user_id=current_user.id,
             event_type="recovery_generated",
             source="recovery_plan",
             status="success",
-            metadata={"risk_score": risk_score},
+            metadata={"risk_score": meta["risk_score"], "cached": False},
+        )
+        store_cached_response(
+            db, current_user.id, "recovery_plan", cache_key, response_text, meta, RECOVERY_CACHE_TTL_SECONDS
         )
         db.commit()
         return {
             "recovery_plan": response_text,
-            "meta": {
-                "risk_score": risk_score,
-                "urgent_open_tasks": metrics.get("urgent_open_tasks", 0),
-                "project_mode": snapshot.get("project_mode", "auto"),
-            },
+            "meta": {**meta, "cached": False, "generated_at": datetime.utcnow().isoformat()},
         }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"CrewAI error: {str(exc)}")
 
 
+@router.post("/assistant/daily-briefing/stream")
+async def stream_daily_briefing(
+    payload: AssistantPlannerRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    model = _require_model_for_user(db, current_user.id, payload.model_api_key)
+    horizon = (payload.horizon or "today").strip().lower()
+    if horizon == "today":
+        remember_briefing_model(db, current_user.id, model.api_key)
+    cache_key = planner_cache_key(
+        db, "daily_briefing", current_user, model.api_key, horizon, payload.project_mode, payload.focus_project_id
+    )
+    cached = None if payload.refresh else get_cached_response(db, current_user.id, cache_key)
+    request = None
+    if cached is None:
+        request = daily_briefing_request(
+            db, current_user.id, horizon, payload.project_mode, payload.focus_project_id
+        )
+    return _planner_stream_response(
+        db,
+        current_user.id,
+        _hedge_models(db, current_user.id, model, payload.hedge_after_ms),
+        kind="daily_briefing",
+        cache_key=cache_key,
+        cached=cached,
+        request=request,
+        event_type="briefing_generated",
+        source="daily_briefing",
+        event_metadata={"horizon": horizon},
+        ttl_seconds=BRIEFING_CACHE_TTL_SECONDS,
+        hedge_after_ms=payload.hedge_after_ms,
+    )
+
+
+@router.post("/assistant/recovery-plan/stream")
+async def stream_recovery_plan(
+    payload: AssistantPlannerRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    model = _require_model_for_user(db, current_user.id, payload.model_api_key)
+    cache_key = planner_cache_key(
+        db, "recovery_plan", current_user, model.api_key, "week", payload.project_mode, payload.focus_project_id
+    )
+    cached = None if payload.refresh else get_cached_response(db, current_user.id, cache_key)
+    request = None
+    if cached is None:
+        request = _recovery_plan_request(db, current_user.id, payload.project_mode, payload.focus_project_id)
+    risk_score = (cached["meta"] if cached is not None else request[2]).get("risk_score")
+    return _planner_stream_response(
+        db,
+        current_user.id,
+        _hedge_models(db, current_user.id, model, payload.hedge_after_ms),
+        kind="recovery_plan",
+        cache_key=cache_key,
+        cached=cached,
+        request=request,
+        event_type="recovery_generated",
+        source="recovery_plan",
+        event_metadata={"risk_score": risk_score},
+        ttl_seconds=RECOVERY_CACHE_TTL_SECONDS,
+        hedge_after_ms=payload.hedge_after_ms,
+    )
+
+
+def _briefing_schedule_payload(schedule: Optional[BriefingSchedule], user: User) -> Dict[str, object]:
+    return {
+        "enabled": bool(schedule and schedule.enabled),
+        "local_time": (schedule.local_time if schedule else None) or DEFAULT_BRIEFING_TIME,
+        "model_api_key": schedule.model_api_key if schedule else None,
+        "project_mode": (schedule.project_mode if schedule else None) or "auto",
+        "timezone": user.timezone,
+        "last_generated_on": (
+            schedule.last_generated_on.isoformat() if schedule and schedule.last_generated_on else None
+        ),
+    }
+
+
+@router.get("/assistant/briefing-schedule")
+async def get_briefing_schedule(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    schedule = db.query(BriefingSchedule).filter(BriefingSchedule.owner == current_user.id).first()
+    return _briefing_schedule_payload(schedule, current_user)
+
+
+@router.put("/assistant/briefing-schedule")
+async def update_briefing_schedule(
+    payload: BriefingScheduleRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    try:
+        local_time = parse_local_time(payload.local_time).strftime("%H:%M")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if payload.model_api_key:
+        _require_model_for_user(db, current_user.id, payload.model_api_key)
+
+    schedule = db.query(BriefingSchedule).filter(BriefingSchedule.owner == current_user.id).first()
+    if schedule is None:
+        schedule = BriefingSchedule(owner=current_user.id)
+        db.add(schedule)
+    if schedule.local_time != local_time:
+        # A new time today should still get its pre-generated briefing.
+        schedule.last_generated_on = None
+    schedule.enabled = payload.enabled
+    schedule.local_time = local_time
+    # Without a model the schedule keeps the one it has, or learns it from the next briefing request.
+    schedule.model_api_key = payload.model_api_key or schedule.model_api_key
+    schedule.project_mode = payload.project_mode or "auto"
+    db.commit()
+    db.refresh(schedule)
+    return _briefing_schedule_payload(schedule, current_user)
+
+
 @router.get("/assistant/context", response_model=AssistantContextResponse)
 async def get_assistant_context(
     project_mode: str = "auto",
@@ -777,7 +898,7 @@ async def run_assistant_action(
             parent_task_id=None,
         )
         db.add(task)
-        _log_assistant_event(
+        log_assistant_event(
             db=db,
             user_id=current_user.id,
             event_type="action_executed",
@@ -804,7 +925,7 @@ async def run_assistant_action(
         if task.state in {"open"}:
             task.state = "todo"
         db.add(task)
-        _log_assistant_event(
+        log_assistant_event(
             db=db,
             user_id=current_user.id,
             event_type="action_executed",
@@ -823,7 +944,7 @@ async def run_assistant_action(
             raise HTTPException(status_code=400, detail="note and reminder_when are required")
         reminder = Reminder(owner_id=current_user.id, note=note, when=when.replace(tzinfo=None))
         db.add(reminder)
-        _log_assistant_event(
+        log_assistant_event(
             db=db,
             user_id=current_user.id,
             event_type="action_executed",
@@ -874,7 +995,7 @@ async def run_assistant_action(
     task.state = "doing"
     db.add(focus_activity)
     db.add(task)
-    _log_assistant_event(
+    log_assistant_event(
         db=db,
         user_id=current_user.id,
         event_type="action_executed",
@@ -898,7 +1019,7 @@ async def track_assistant_event(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    _log_assistant_event(
+    log_assistant_event(
         db=db,
         user_id=current_user.id,
         event_type=payload.event_type,
@@ -911,6 +1032,38 @@ async def track_assistant_event(
     return {"message": "event tracked"}
 
 
+@router.post("/assistant/events/batch")
+async def track_assistant_events_batch(
+    payload: AssistantEventBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    events = payload.events or []
+    if len(events) > MAX_EVENT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_EVENT_BATCH_SIZE} events can be tracked per batch",
+        )
+    if not events:
+        return {"message": "events tracked", "count": 0}
+
+    # One executemany + one commit for the whole batch instead of a round-trip per event.
+    rows = [
+        assistant_event_values(
+            user_id=current_user.id,
+            event_type=event.event_type,
+            source=event.source,
+            action_type=event.action_type,
+            status=event.status,
+            metadata=event.metadata,
+        )
+        for event in events
+    ]
+    db.execute(insert(AssistantEvent), rows)
+    db.commit()
+    return {"message": "events tracked", "count": len(rows)}
+
+
 @router.get("/assistant/effectiveness", response_model=AssistantEffectivenessResponse)
 async def get_assistant_effectiveness(
     window_days: int = 14,
@@ -919,39 +1072,31 @@ async def get_assistant_effectiveness(
 ):
     window_days = max(1, min(60, window_days))
     since = datetime.utcnow() - timedelta(days=window_days)
-    events = (
-        db.query(AssistantEvent)
-        .filter(AssistantEvent.owner == current_user.id, AssistantEvent.created_at >= since)
-        .all()
-    )
+    counts = count_assistant_events(db, current_user.id, since)
 
-    total_events = len(events)
-    suggested_actions = len([e for e in events if e.event_type == "suggested_action_clicked"])
-    action_events = [e for e in events if e.event_type in {"action_executed", "action_attempted"}]
-    action_attempts = len(action_events)
-    action_success = len([e for e in action_events if e.status == "success" or e.event_type == "action_executed"])
-    action_failed = len([e for e in action_events if e.status == "failed"])
+    total_events = sum(counts.values())
+    suggested_actions = sum(
+        count for (event_type, _, _), count in counts.items() if event_type == "suggested_action_clicked"
+    )
+    action_counts = {
+        key: count for key, count in counts.items() if key[0] in {"action_executed", "action_attempted"}
+    }
+    action_attempts = sum(action_counts.values())
+    action_success = sum(
+        count
+        for (event_type, _, status), count in action_counts.items()
+        if status == "success" or event_type == "action_executed"
+    )
+    action_failed = sum(count for (_, _, status), count in action_counts.items() if status == "failed")
     completion_rate = int(round((action_success / action_attempts) * 100)) if action_attempts else 0
 
-    top_rows = (
-        db.query(
-            AssistantEvent.action_type,
-            func.count(AssistantEvent.id).label("count"),
-        )
-        .filter(
-            AssistantEvent.owner == current_user.id,
-            AssistantEvent.created_at >= since,
-            AssistantEvent.event_type.in_(["action_executed", "action_attempted"]),
-            AssistantEvent.action_type.isnot(None),
-        )
-        .group_by(AssistantEvent.action_type)
-        .order_by(func.count(AssistantEvent.id).desc())
-        .limit(4)
-        .all()
-    )
+    per_action: Dict[str, int] = {}
+    for (_, action_type, _), count in action_counts.items():
+        if action_type:
+            per_action[action_type] = per_action.get(action_type, 0) + count
     top_actions = [
-        {"action_type": action_type, "count": int(count)}
-        for action_type, count in top_rows
+        {"action_type": action_type, "count": count}
+        for action_type, count in sorted(per_action.items(), key=lambda item: -item[1])[:4]
     ]
 
     return AssistantEffectivenessResponse(
@@ -966,6 +1111,12 @@ async def get_assistant_effectiveness(
     )
 
 
+@router.get("/assistant/runtime-stats")
+async def get_assistant_runtime_stats(current_user: User = Depends(get_current_user)):
+    """Process-level assistant runtime counters (reuse of CrewAI objects and planner snapshots)."""
+    return {"crewai_cache": crewai_cache_stats(), "snapshot_cache": snapshot_cache_stats()}
+
+
 @router.post("/assistant-memory/reset")
 async def reset_assistant_memory(
     payload: MemoryResetRequest,
@@ -976,10 +1127,11 @@ async def reset_assistant_memory(
     if mode not in {"all", "assistant", "agentic"}:
         raise HTTPException(status_code=400, detail="mode must be one of: all, assistant, agentic")
 
-    query = db.query(AssistantMemory).filter(AssistantMemory.owner == current_user.id)
-    if mode != "all":
-        query = query.filter(AssistantMemory.mode == mode)
-
-    deleted = query.delete(synchronize_session=False)
+    deleted = 0
+    for memory_model in (AssistantTurn, AssistantMemorySummary, AssistantMemory):
+        query = db.query(memory_model).filter(memory_model.owner == current_user.id)
+        if mode != "all":
+            query = query.filter(memory_model.mode == mode)
+        deleted += query.delete(synchronize_session=False)
     db.commit()
     return {"message": "Assistant memory reset", "deleted": deleted, "mode": mode}
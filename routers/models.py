@@ -55,7 +55,8 @@ def create_model(
         api_key=model.api_key,
         owner=current_user.id,
         name=model.name,
-        base_url=model.base_url
+        base_url=model.base_url,
+        context_window=model.context_window
     )
     db.add(db_model)
     db.commit()
@@ -12,10 +12,10 @@ from fastapi.responses import RedirectResponse, FileResponse, JSONResponse
 from core.auth import check_user_auth
 from core.templates import templates
 from core.timezone import convert_to_timezone
+from core.task_tree import get_subtree_task_ids, subtree_ids_select
 import os
 from models.notes import NoteAttachment
-
-UPLOAD_DIR = "uploads/notes"
+from core.file_cleanup import NOTE_UPLOAD_DIR as UPLOAD_DIR
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
@@ -53,11 +53,7 @@ def create_note(
 # Helper to get all descendant task ids
 
 def get_descendant_task_ids(task: Task, db: Session) -> List[int]:
-    ids = [task.id]
-    children = db.query(Task).filter(Task.parent_task_id == task.id).all()
-    for child in children:
-        ids.extend(get_descendant_task_ids(child, db))
-    return ids
+    return get_subtree_task_ids(db, task.id, owner=task.owner)
 
 @router.get("/task/{task_id}", response_model=List[NoteResponse])
 def get_notes_for_task(
@@ -72,7 +68,7 @@ def get_notes_for_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found or not owned by user")
     # Get all descendant task ids
-    ids = get_descendant_task_ids(task, db)
+    ids = subtree_ids_select(task.id, owner=current_user.id)
     notes = db.query(Note).filter(Note.task_id.in_(ids)).order_by(Note.when.desc()).offset(skip).limit(limit).all()
     return notes
 
@@ -87,7 +83,7 @@ def timeline(request: Request, task_id: int, page: int = 1, page_size: int = 10,
         raise HTTPException(status_code=404, detail="Task not found or not owned by user")
     user = db.query(User).filter(User.id == user_id).first()
     user_tz = user.timezone if user and user.timezone else "Asia/Tehran"
-    ids = get_descendant_task_ids(task, db)
+    ids = subtree_ids_select(task.id, owner=user_id)
     total_notes = db.query(Note).filter(Note.task_id.in_(ids)).count()
     notes_raw = db.query(Note).filter(Note.task_id.in_(ids)).order_by(Note.when.desc()).offset((page-1)*page_size).limit(page_size).all()
     notes = []
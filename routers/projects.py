@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from core.database import get_db
+from core.entity_index import invalidate_entity_index
+from core.task_delete import delete_tasks_cascade
 from models.projects import Project
 from models.user import User
 from models.keys import Key
@@ -128,7 +131,6 @@ def delete_project(
 ):
     """Delete a project (only if owned by authenticated user)"""
     from models.tasks import Task
-    from models.activity import Activity
     
     db_project = db.query(Project).filter(
         Project.id == project_id,
@@ -138,22 +140,16 @@ def delete_project(
         raise HTTPException(status_code=404, detail="Project not found")
     
     try:
-        # Get all tasks associated with this project
-        project_tasks = db.query(Task).filter(Task.proj_id == project_id).all()
-        
-        # Delete all activities associated with these tasks
-        for task in project_tasks:
-            task_activities = db.query(Activity).filter(Activity.task_id == task.id).all()
-            for activity in task_activities:
-                db.delete(activity)
-        
-        # Delete all tasks associated with this project
-        for task in project_tasks:
-            db.delete(task)
-        
-        # Delete the project
+        # Tasks, activities, notes and attachments go in a few set-based statements;
+        # attachment files are removed later by the file cleanup job.
+        delete_tasks_cascade(
+            db,
+            current_user.id,
+            select(Task.id).where(Task.proj_id == project_id, Task.owner == current_user.id),
+        )
         db.delete(db_project)
         db.commit()
+        invalidate_entity_index(current_user.id)
         
         return {"message": "Project and all associated tasks and activities deleted successfully"}
     except Exception as e:
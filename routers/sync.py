@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from core.database import get_db
+from core.delta_sync import SYNC_ENTITY_TYPES, get_changes
+from core.user import get_current_user
+from models.user import User
+from schemas.sync import SyncResponse
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[int] = Query(None, ge=0, description="Token from the previous sync; omit for a full download"),
+    entities: Optional[List[str]] = Query(None, description="Limit to tasks, projects, activities and/or reminders"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tasks, projects, activities and reminders changed since a sync token, plus deleted ids
+
+    Apply ``deleted`` and then upsert the returned rows by id; when ``full`` is true
+    the lists are complete and replace local data. Store ``token`` for the next call.
+    """
+    if entities:
+        unknown = sorted(set(entities) - set(SYNC_ENTITY_TYPES))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown sync entities: {', '.join(unknown)}")
+    return get_changes(db, current_user.id, since, entities or SYNC_ENTITY_TYPES)
@@ -1,18 +1,46 @@
-from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+import pytz
 from core.database import get_db
+from core.entity_index import invalidate_entity_index
+from core.task_delete import delete_tasks_cascade
+from core.task_graph import depends_on_transitively, get_dependency_graph, get_open_blockers
+from core.task_rollup import get_task_rollups
+from core.task_tree import TaskCycleError, creates_task_cycle
 from models.tasks import Task, EnergyLevel, TaskState
 from models.user import User
 from models.keys import Key
 from models.projects import Project
 from models.progress import Progress
-from models.activity import Activity
-from schemas.tasks import TaskCreate, TaskUpdate, TaskResponse, ENERGY_LEVEL_MAP, TASK_STATE_MAP
+from models.task_dependency import TaskDependency
+from schemas.tasks import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskRollup, BoardResponse, TaskBulkRequest, TaskBulkResponse,
+    TaskDependencyCreate, TaskDependencyResponse, DependencyGraphResponse,
+    EnergyLevel as ApiEnergyLevel,
+    TaskState as ApiTaskState, ENERGY_LEVEL_MAP, TASK_STATE_MAP
+)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+TASK_SORTS = {
+    "id": (Task.id.asc(),),
+    "deadline": (Task.deadline.is_(None), Task.deadline.asc(), Task.id.asc()),
+    "-deadline": (Task.deadline.is_(None), Task.deadline.desc(), Task.id.desc()),
+    # Eisenhower order: urgent+important first, then by nearest deadline.
+    "priority": (Task.is_urgent.desc(), Task.is_important.desc(), Task.deadline.is_(None), Task.deadline.asc(), Task.id.asc()),
+}
+
+MAX_BULK_TASK_UPDATES = 500
+# Columns that must keep a value when sent explicitly as null in a partial update.
+REQUIRED_TASK_FIELDS = {"title", "proj_id", "is_important", "is_urgent", "energy_level", "state", "progress_id"}
+
+BOARD_STATES = ["open", "todo", "doing", "done", "closed"]
+# Finished columns only grow, so they load newest-first in small pages.
+BOARD_ARCHIVE_STATES = {"done", "closed"}
+
 def validate_energy_level(value: int) -> bool:
     """Validate energy level value"""
     return value in [1, 2, 3]
@@ -21,6 +49,36 @@ def validate_task_state(value: str) -> bool:
     """Validate task state value"""
     return value in ["open", "todo", "doing", "done", "closed"]
 
+def convert_task_update_enums(update_data: dict) -> None:
+    """Map API enum values in a partial update to their database values (in place)"""
+    if 'energy_level' in update_data:
+        energy_level_value = ENERGY_LEVEL_MAP[update_data['energy_level'].value]
+        if not validate_energy_level(energy_level_value):
+            raise HTTPException(status_code=400, detail="Invalid energy level value")
+        update_data['energy_level'] = energy_level_value
+    if 'state' in update_data:
+        state_value = TASK_STATE_MAP[update_data['state'].value]
+        if not validate_task_state(state_value):
+            raise HTTPException(status_code=400, detail="Invalid task state value")
+        update_data['state'] = state_value
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Deadlines are stored as naive UTC; align aware filter values with them."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(pytz.UTC).replace(tzinfo=None)
+
+def with_rollups(tasks: List[Task], user_id: int, db: Session) -> List[TaskResponse]:
+    """Serialize tasks with their subtree rollups attached."""
+    rollups = get_task_rollups(db, user_id, [task.id for task in tasks])
+    responses = []
+    for task in tasks:
+        response = TaskResponse.model_validate(task)
+        if task.id in rollups:
+            response.rollup = TaskRollup(**rollups[task.id])
+        responses.append(response)
+    return responses
+
 def get_current_user(
     x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
     db: Session = Depends(get_db)
@@ -100,19 +158,272 @@ def create_task(
 
 @router.get("/", response_model=List[TaskResponse])
 def get_tasks(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    state: Optional[List[ApiTaskState]] = Query(None, description="Repeat to match any of several states."),
+    proj_id: Optional[List[int]] = Query(None, description="Repeat to match any of several projects."),
+    is_urgent: Optional[bool] = None,
+    is_important: Optional[bool] = None,
+    energy_level: Optional[List[ApiEnergyLevel]] = Query(None),
+    parent_task_id: Optional[int] = None,
+    top_level: Optional[bool] = Query(None, description="true: only tasks without a parent; false: only subtasks."),
+    deadline_after: Optional[datetime] = None,
+    deadline_before: Optional[datetime] = None,
+    sort: str = Query("id", description="id, deadline, -deadline or priority."),
+    include_total: bool = Query(False, description="Send the filtered count in the X-Total-Count header."),
+    include_rollup: bool = Query(False, description="Attach subtree hours, counts and progress to each task."),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all tasks for the authenticated user"""
-    tasks = db.query(Task).options(
+    """Get tasks for the authenticated user, optionally filtered and sorted on the server"""
+    if sort not in TASK_SORTS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort; use one of: {', '.join(TASK_SORTS)}")
+    query = db.query(Task).filter(Task.owner == current_user.id)
+    if state:
+        query = query.filter(Task.state.in_([TASK_STATE_MAP[item.value] for item in state]))
+    if proj_id:
+        query = query.filter(Task.proj_id.in_(proj_id))
+    if is_urgent is not None:
+        query = query.filter(Task.is_urgent.is_(is_urgent))
+    if is_important is not None:
+        query = query.filter(Task.is_important.is_(is_important))
+    if energy_level:
+        query = query.filter(Task.energy_level.in_([ENERGY_LEVEL_MAP[item.value] for item in energy_level]))
+    if parent_task_id is not None:
+        query = query.filter(Task.parent_task_id == parent_task_id)
+    if top_level is not None:
+        query = query.filter(Task.parent_task_id.is_(None) if top_level else Task.parent_task_id.isnot(None))
+    if deadline_after is not None:
+        query = query.filter(Task.deadline >= to_naive_utc(deadline_after))
+    if deadline_before is not None:
+        query = query.filter(Task.deadline <= to_naive_utc(deadline_before))
+    if include_total:
+        response.headers["X-Total-Count"] = str(query.with_entities(func.count(Task.id)).scalar() or 0)
+    tasks = query.options(
         joinedload(Task.progress)
-    ).filter(
-        Task.owner == current_user.id
-    ).offset(skip).limit(limit).all()
+    ).order_by(*TASK_SORTS[sort]).offset(skip).limit(limit).all()
+    if include_rollup:
+        return with_rollups(tasks, current_user.id, db)
     return tasks
 
+def _board_column_tasks(
+    db: Session,
+    user_id: int,
+    state: str,
+    limit: int,
+    cursor: Optional[int],
+) -> tuple[List[dict], Optional[int]]:
+    newest_first = state in BOARD_ARCHIVE_STATES
+    query = db.query(
+        Task.id,
+        Task.title,
+        Task.state,
+        Task.proj_id,
+        Project.name,
+        Project.color,
+        Task.parent_task_id,
+        Task.is_important,
+        Task.is_urgent,
+        Task.energy_level,
+        Task.deadline,
+    ).join(Project, Task.proj_id == Project.id).filter(
+        Task.owner == user_id,
+        Task.state == state,
+        Task.parent_task_id.is_(None),
+    )
+    if cursor is not None:
+        query = query.filter(Task.id < cursor if newest_first else Task.id > cursor)
+    query = query.order_by(Task.id.desc() if newest_first else Task.id.asc())
+    rows = query.limit(limit + 1).all()
+    cards = [
+        {
+            "id": row[0],
+            "title": row[1],
+            "state": row[2],
+            "proj_id": row[3],
+            "project_name": row[4],
+            "project_color": row[5],
+            "parent_task_id": row[6],
+            "is_important": row[7],
+            "is_urgent": row[8],
+            "energy_level": row[9],
+            "deadline": row[10],
+            "subtasks": [],
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = cards[-1]["id"] if len(rows) > limit and cards else None
+    return cards, next_cursor
+
+@router.get("/board", response_model=BoardResponse)
+def get_task_board(
+    limit: int = Query(100, ge=1, le=500, description="Cards per open/todo/doing column."),
+    done_limit: int = Query(20, ge=0, le=500, description="Cards per done/closed column."),
+    state: Optional[str] = Query(None, description="Load only this column (used with cursor for paging)."),
+    cursor: Optional[int] = Query(None, description="next_cursor from a previous response for the same column."),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Kanban board in one request: top-level tasks per state column with card fields only.
+
+    Done and closed columns are paged newest-first (``done_limit=0`` returns only
+    their totals); fetch further pages with ``state`` and ``cursor``. Each column
+    reports its full ``total``.
+    """
+    if state is not None and state not in BOARD_STATES:
+        raise HTTPException(status_code=400, detail="Invalid task state value")
+    if cursor is not None and state is None:
+        raise HTTPException(status_code=400, detail="cursor requires state")
+    states = [state] if state else BOARD_STATES
+
+    totals = dict(
+        db.query(Task.state, func.count(Task.id)).filter(
+            Task.owner == current_user.id,
+            Task.parent_task_id.is_(None),
+            Task.state.in_(states)
+        ).group_by(Task.state).all()
+    )
+
+    columns = []
+    cards_by_id: Dict[int, dict] = {}
+    for column_state in states:
+        column_limit = done_limit if column_state in BOARD_ARCHIVE_STATES else limit
+        if state:
+            column_limit = limit
+        cards, next_cursor = [], None
+        if column_limit and totals.get(column_state):
+            cards, next_cursor = _board_column_tasks(db, current_user.id, column_state, column_limit, cursor)
+        cards_by_id.update((card["id"], card) for card in cards)
+        columns.append({
+            "state": column_state,
+            "total": totals.get(column_state, 0),
+            "tasks": cards,
+            "next_cursor": next_cursor,
+        })
+
+    if cards_by_id:
+        subtasks = db.query(Task.id, Task.title, Task.state, Task.parent_task_id).filter(
+            Task.owner == current_user.id,
+            Task.parent_task_id.in_(list(cards_by_id))
+        ).order_by(Task.id.asc()).all()
+        for subtask_id, title, subtask_state, parent_id in subtasks:
+            cards_by_id[parent_id]["subtasks"].append({"id": subtask_id, "title": title, "state": subtask_state})
+
+    projects = []
+    if state is None:
+        projects = [
+            {"id": project_id, "name": name, "color": color}
+            for project_id, name, color in db.query(Project.id, Project.name, Project.color).filter(
+                Project.owner == current_user.id
+            ).order_by(Project.id.asc()).all()
+        ]
+    return {"projects": projects, "columns": columns}
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+def bulk_update_tasks(
+    payload: TaskBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply many partial task updates in one transaction
+
+    Ownership of the tasks and of any referenced projects, progress items and
+    parent tasks is checked with one query each. Each item gets its own result;
+    invalid items are skipped, or with ``atomic: true`` nothing is applied and
+    the valid items come back with status 409.
+    """
+    items = payload.updates
+    if len(items) > MAX_BULK_TASK_UPDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_TASK_UPDATES} updates per request")
+
+    changes = [item.dict(exclude_unset=True, exclude={"id"}) for item in items]
+
+    def owned_ids(model, column, ids) -> set:
+        ids = {value for value in ids if value is not None}
+        if not ids:
+            return set()
+        return {row[0] for row in db.query(model.id).filter(column == current_user.id, model.id.in_(ids))}
+
+    tasks = {
+        task.id: task
+        for task in db.query(Task).filter(
+            Task.owner == current_user.id,
+            Task.id.in_({item.id for item in items})
+        )
+    } if items else {}
+    project_ids = owned_ids(Project, Project.owner, (change.get("proj_id") for change in changes))
+    progress_ids = owned_ids(Progress, Progress.owner, (change.get("progress_id") for change in changes))
+    parent_ids = owned_ids(Task, Task.owner, (change.get("parent_task_id") for change in changes))
+
+    results = []
+    applied = []
+    seen_ids = set()
+    for item, update_data in zip(items, changes):
+        try:
+            if item.id in seen_ids:
+                raise HTTPException(status_code=400, detail="Task appears more than once in this request")
+            seen_ids.add(item.id)
+            db_task = tasks.get(item.id)
+            if db_task is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            null_fields = sorted(field for field, value in update_data.items() if value is None and field in REQUIRED_TASK_FIELDS)
+            if null_fields:
+                raise HTTPException(status_code=400, detail=f"Fields cannot be null: {', '.join(null_fields)}")
+            if "proj_id" in update_data and update_data["proj_id"] not in project_ids:
+                raise HTTPException(status_code=404, detail="Project not found")
+            if "progress_id" in update_data and update_data["progress_id"] not in progress_ids:
+                raise HTTPException(status_code=404, detail="Progress item not found")
+            if update_data.get("parent_task_id") is not None:
+                if update_data["parent_task_id"] not in parent_ids:
+                    raise HTTPException(status_code=404, detail="Parent task not found")
+                if creates_task_cycle(db, item.id, update_data["parent_task_id"]):
+                    raise HTTPException(status_code=400, detail="A task cannot be moved under itself or its own subtask")
+            convert_task_update_enums(update_data)
+        except HTTPException as exc:
+            results.append({"id": item.id, "ok": False, "status": exc.status_code, "detail": exc.detail})
+            continue
+        applied.append((db_task, update_data))
+        results.append({"id": item.id, "ok": True, "status": 200})
+
+    failed = [result for result in results if not result["ok"]]
+    if payload.atomic and failed:
+        for result in results:
+            if result["ok"]:
+                result.update(ok=False, status=409, detail="Cancelled by atomic batch")
+        return {"updated": 0, "failed": len(failed), "results": results}
+
+    for db_task, update_data in applied:
+        for field, value in update_data.items():
+            setattr(db_task, field, value)
+    try:
+        db.commit()
+    except TaskCycleError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="These parent changes together would create a cycle")
+
+    updated_ids = [db_task.id for db_task, _ in applied]
+    if updated_ids:
+        fresh = {
+            task.id: task
+            for task in db.query(Task).options(joinedload(Task.progress)).filter(Task.id.in_(updated_ids))
+        }
+        for result in results:
+            if result["ok"]:
+                result["task"] = fresh[result["id"]]
+    return {"updated": len(updated_ids), "failed": len(failed), "results": results}
+
+@router.get("/dependency-graph", response_model=DependencyGraphResponse)
+def get_task_dependency_graph(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Topological order, cycles, critical path and slack over the user's task dependencies
+
+    Durations are estimated remaining hours of work; start/finish times are hours from now.
+    """
+    return get_dependency_graph(db, current_user.id)
+
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: int, 
@@ -130,6 +441,98 @@ def get_task(
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
+@router.get("/{task_id}/rollup", response_model=TaskRollup)
+def get_task_rollup(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tracked hours, done/open counts and weighted progress of a task and all of its subtasks"""
+    rollup = get_task_rollups(db, current_user.id, [task_id]).get(task_id)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return rollup
+
+def dependency_summary(task_id: int, user_id: int, db: Session) -> dict:
+    depends_on = [
+        row[0] for row in db.query(TaskDependency.depends_on_id)
+        .filter(TaskDependency.owner == user_id, TaskDependency.task_id == task_id)
+        .order_by(TaskDependency.depends_on_id.asc())
+    ]
+    dependents = [
+        row[0] for row in db.query(TaskDependency.task_id)
+        .filter(TaskDependency.owner == user_id, TaskDependency.depends_on_id == task_id)
+        .order_by(TaskDependency.task_id.asc())
+    ]
+    return {
+        "task_id": task_id,
+        "depends_on": depends_on,
+        "dependents": dependents,
+        "open_blockers": get_open_blockers(db, user_id, [task_id]).get(task_id, []),
+    }
+
+@router.get("/{task_id}/dependencies", response_model=TaskDependencyResponse)
+def get_task_dependencies(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tasks this task waits on, tasks waiting on it, and which blockers are still unfinished"""
+    if db.query(Task.id).filter(Task.id == task_id, Task.owner == current_user.id).first() is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return dependency_summary(task_id, current_user.id, db)
+
+@router.post("/{task_id}/dependencies", response_model=TaskDependencyResponse)
+def add_task_dependency(
+    task_id: int,
+    dependency: TaskDependencyCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Record that a task cannot start until ``depends_on_id`` is done"""
+    owned = {
+        row[0] for row in db.query(Task.id).filter(
+            Task.id.in_([task_id, dependency.depends_on_id]),
+            Task.owner == current_user.id
+        )
+    }
+    if task_id not in owned:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if dependency.depends_on_id not in owned:
+        raise HTTPException(status_code=404, detail="Dependency task not found")
+    if dependency.depends_on_id == task_id:
+        raise HTTPException(status_code=400, detail="A task cannot depend on itself")
+
+    existing = db.query(TaskDependency.id).filter(
+        TaskDependency.task_id == task_id,
+        TaskDependency.depends_on_id == dependency.depends_on_id
+    ).first()
+    if existing is None:
+        if depends_on_transitively(db, current_user.id, dependency.depends_on_id, task_id):
+            raise HTTPException(status_code=400, detail="This dependency would create a cycle")
+        db.add(TaskDependency(owner=current_user.id, task_id=task_id, depends_on_id=dependency.depends_on_id))
+        db.commit()
+    return dependency_summary(task_id, current_user.id, db)
+
+@router.delete("/{task_id}/dependencies/{depends_on_id}", response_model=TaskDependencyResponse)
+def remove_task_dependency(
+    task_id: int,
+    depends_on_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a dependency between two tasks"""
+    db_dependency = db.query(TaskDependency).filter(
+        TaskDependency.owner == current_user.id,
+        TaskDependency.task_id == task_id,
+        TaskDependency.depends_on_id == depends_on_id
+    ).first()
+    if db_dependency is None:
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    db.delete(db_dependency)
+    db.commit()
+    return dependency_summary(task_id, current_user.id, db)
+
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: int, 
@@ -183,18 +586,11 @@ def update_task(
         ).first()
         if not parent_task:
             raise HTTPException(status_code=404, detail="Parent task not found")
+        if creates_task_cycle(db, task_id, update_data['parent_task_id']):
+            raise HTTPException(status_code=400, detail="A task cannot be moved under itself or its own subtask")
     
     # Convert and validate enum values if provided
-    if 'energy_level' in update_data:
-        energy_level_value = ENERGY_LEVEL_MAP[update_data['energy_level'].value]
-        if not validate_energy_level(energy_level_value):
-            raise HTTPException(status_code=400, detail="Invalid energy level value")
-        update_data['energy_level'] = energy_level_value
-    if 'state' in update_data:
-        state_value = TASK_STATE_MAP[update_data['state'].value]
-        if not validate_task_state(state_value):
-            raise HTTPException(status_code=400, detail="Invalid task state value")
-        update_data['state'] = state_value
+    convert_task_update_enums(update_data)
     
     for field, value in update_data.items():
         setattr(db_task, field, value)
@@ -223,8 +619,11 @@ def delete_task(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a task and all associated data (only if owned by authenticated user)"""
-    db_task = db.query(Task).filter(
+    """Delete a task and all associated data (only if owned by authenticated user)
+
+    Subtasks are kept and become top-level tasks.
+    """
+    db_task = db.query(Task.id).filter(
         Task.id == task_id,
         Task.owner == current_user.id
     ).first()
@@ -232,27 +631,13 @@ def delete_task(
         raise HTTPException(status_code=404, detail="Task not found")
 
     try:
-        # Delete all activities associated with this task
-        activities = db.query(Activity).filter(Activity.task_id == task_id).all()
-        for activity in activities:
-            db.delete(activity)
-        
-        # Get the progress record before deleting the task
-        progress_id = db_task.progress_id
-        
-        # Delete the task
-        db.delete(db_task)
-        
-        # Delete the associated progress record
-        progress = db.query(Progress).filter(Progress.id == progress_id).first()
-        if progress:
-            db.delete(progress)
-        
+        delete_tasks_cascade(db, current_user.id, select(Task.id).where(Task.id == task_id))
         db.commit()
-        return {"message": "Task and all associated data deleted successfully"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete task: {str(e)}")
+    invalidate_entity_index(current_user.id)
+    return {"message": "Task and all associated data deleted successfully"}
 
 @router.get("/project/{project_id}", response_model=List[TaskResponse])
 def get_tasks_by_project(
@@ -260,6 +645,7 @@ def get_tasks_by_project(
     skip: int = 0,
     limit: int = 100,
     all: bool = Query(False, description="If true, return all tasks for the project regardless of pagination or state."),
+    include_rollup: bool = Query(False, description="Attach subtree hours, counts and progress to each task."),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -282,4 +668,6 @@ def get_tasks_by_project(
         tasks = query.offset(skip).limit(limit).all()
     else:
         tasks = query.all()
+    if include_rollup:
+        return with_rollups(tasks, current_user.id, db)
     return tasks
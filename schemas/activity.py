@@ -1,6 +1,6 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional, Union
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional, Union
+from datetime import date, datetime, time
 from enum import Enum
 from core.timezone import convert_to_app_timezone
 
@@ -74,3 +74,44 @@ class ActivityDetailsResponse(ActivityResponse):
     task_name: str
     project_id: int
     project_name: str
+
+class AutoScheduleRequest(BaseModel):
+    start_date: date
+    end_date: date
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    work_days: List[int] = Field(default_factory=lambda: [0, 1, 2, 3, 4])  # Monday = 0
+    default_minutes: int = Field(60, ge=15, le=480)  # Block length for tasks without an entry in durations
+    min_block_minutes: int = Field(30, ge=5, le=240)
+    durations: Dict[int, int] = Field(default_factory=dict)  # task_id -> minutes
+    proj_id: Optional[int] = None
+    task_ids: Optional[List[int]] = None
+    include_planned: bool = False  # Also schedule tasks that already have an upcoming PLANNED activity
+    dry_run: bool = True
+
+class ScheduledBlock(BaseModel):
+    task_id: int
+    title: str
+    energy_level: int
+    band: int  # Energy band of the slot: 3 = morning, 2 = midday, 1 = late
+    clock_in: datetime
+    clock_out: datetime
+    late: bool
+
+class UnscheduledTask(BaseModel):
+    task_id: int
+    title: str
+    unplanned_minutes: int
+
+class AutoScheduleResponse(BaseModel):
+    dry_run: bool
+    timezone: str
+    blocks: List[ScheduledBlock]
+    unscheduled: List[UnscheduledTask]
+    candidate_tasks: int
+    scheduled_tasks: int
+    scheduled_minutes: int
+    free_minutes: int
+    late_blocks: int
+    created: int
+    elapsed_ms: float
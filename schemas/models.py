@@ -1,16 +1,20 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from core.assistant_context import MIN_MODEL_CONTEXT_WINDOW
 
 class ModelBase(BaseModel):
     name: str
     base_url: str
+    context_window: Optional[int] = None  # Tokens; None = unknown
 
 class ModelCreate(ModelBase):
     api_key: str
+    context_window: Optional[int] = Field(None, ge=MIN_MODEL_CONTEXT_WINDOW)
 
 class ModelUpdate(BaseModel):
     name: Optional[str] = None
     base_url: Optional[str] = None
+    context_window: Optional[int] = Field(None, ge=MIN_MODEL_CONTEXT_WINDOW)
 
 class ModelResponse(ModelBase):
     api_key: str
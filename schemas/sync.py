@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List
+
+from schemas.activity import ActivityResponse
+from schemas.projects import ProjectResponse
+from schemas.reminders import ReminderResponse
+from schemas.tasks import TaskResponse
+
+
+class SyncDeleted(BaseModel):
+    tasks: List[int] = []
+    projects: List[int] = []
+    activities: List[int] = []
+    reminders: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    # Send back as ?since= on the next call.
+    token: int
+    # True when the lists hold every row rather than changes; replace local data.
+    full: bool
+    tasks: List[TaskResponse] = []
+    projects: List[ProjectResponse] = []
+    activities: List[ActivityResponse] = []
+    reminders: List[ReminderResponse] = []
+    deleted: SyncDeleted
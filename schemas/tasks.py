@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional, Union
+from typing import List, Optional, Union
 from datetime import datetime
 from enum import Enum
 from schemas.progress import ProgressResponse
@@ -58,6 +58,14 @@ class TaskUpdate(BaseModel):
     progress_id: Optional[int] = None
     parent_task_id: Optional[int] = None
 
+class TaskRollup(BaseModel):
+    task_id: int
+    subtree_tasks: int
+    done_tasks: int
+    open_tasks: int
+    tracked_hours: float
+    progress_percent: float
+
 class TaskResponse(BaseModel):
     id: int
     owner: int
@@ -71,6 +79,7 @@ class TaskResponse(BaseModel):
     progress_id: int
     parent_task_id: Optional[int] = None
     progress: Optional[ProgressResponse] = None
+    rollup: Optional[TaskRollup] = None
     
     class Config:
         from_attributes = True
@@ -91,4 +100,114 @@ class TaskResponse(BaseModel):
             # Convert from database string to API enum
             state_map_reverse = {val: key for key, val in TASK_STATE_MAP.items()}
             return TaskState(state_map_reverse[v])
-        return v 
\ No newline at end of file
+        return v
+
+
+class BoardSubtask(BaseModel):
+    id: int
+    title: str
+    state: str
+
+
+class BoardCard(BaseModel):
+    id: int
+    title: str
+    state: str
+    proj_id: int
+    project_name: str
+    project_color: str
+    parent_task_id: Optional[int] = None
+    is_important: bool
+    is_urgent: bool
+    energy_level: EnergyLevel
+    deadline: Optional[datetime] = None
+    subtasks: List[BoardSubtask] = []
+
+    @field_validator('energy_level', mode='before')
+    @classmethod
+    def convert_energy_level(cls, v):
+        if isinstance(v, int):
+            energy_level_map_reverse = {val: key for key, val in ENERGY_LEVEL_MAP.items()}
+            return EnergyLevel(energy_level_map_reverse[v])
+        return v
+
+
+class BoardColumn(BaseModel):
+    state: str
+    total: int
+    tasks: List[BoardCard]
+    next_cursor: Optional[int] = None
+
+
+class BoardProject(BaseModel):
+    id: int
+    name: str
+    color: str
+
+
+class BoardResponse(BaseModel):
+    projects: List[BoardProject]
+    columns: List[BoardColumn]
+
+
+class TaskBulkItem(TaskUpdate):
+    id: int
+
+
+class TaskBulkRequest(BaseModel):
+    updates: List[TaskBulkItem]
+    # When true, any invalid item cancels the whole batch.
+    atomic: bool = False
+
+
+class TaskBulkResult(BaseModel):
+    id: int
+    ok: bool
+    status: int
+    detail: Optional[str] = None
+    task: Optional[TaskResponse] = None
+
+
+class TaskBulkResponse(BaseModel):
+    updated: int
+    failed: int
+    results: List[TaskBulkResult]
+
+
+class TaskDependencyCreate(BaseModel):
+    depends_on_id: int
+
+
+class TaskDependencyResponse(BaseModel):
+    task_id: int
+    depends_on: List[int]
+    dependents: List[int]
+    open_blockers: List[int]
+
+
+class DependencyGraphTask(BaseModel):
+    task_id: int
+    title: str
+    state: str
+    deadline: Optional[datetime] = None
+    duration_hours: float
+    depends_on: List[int]
+    blocked: bool
+    # Hours from now; None for tasks on or behind a cycle.
+    earliest_start_hours: Optional[float] = None
+    earliest_finish_hours: Optional[float] = None
+    latest_start_hours: Optional[float] = None
+    latest_finish_hours: Optional[float] = None
+    slack_hours: Optional[float] = None
+    critical: bool
+
+
+class DependencyGraphResponse(BaseModel):
+    order: List[int]
+    has_cycle: bool
+    cycle: List[int]
+    unordered: List[int]
+    critical_path: List[int]
+    critical_path_hours: float
+    finish_hours: float
+    tasks: List[DependencyGraphTask]
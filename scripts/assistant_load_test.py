@@ -0,0 +1,242 @@
+"""
+Load generator for the assistant endpoints.
+
+Drives N concurrent simulated users against a running app and reports time to
+first token (TTFT), end-to-end latency, streaming throughput and error rate.
+Pair it with scripts/mock_llm_server.py to benchmark without a real model:
+
+    python scripts/mock_llm_server.py --port 8800 &
+    python -m uvicorn main:app --port 9000 &
+    python scripts/assistant_load_test.py --app-url http://127.0.0.1:9000 \\
+        --bootstrap --mock-url http://127.0.0.1:8800/v1 --users 20 --requests 5
+
+Exits non-zero when --max-error-rate or --max-p95-ttft-ms is exceeded, so it
+can gate CI.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+ENDPOINTS = {
+    "stream": "/assistant/stream",
+    "briefing-stream": "/assistant/daily-briefing/stream",
+    "query": "/query",
+    "agentic": "/agentic-query",
+}
+PROMPTS = [
+    "What should I focus on now based on my tasks and projects?",
+    "Build my ideal schedule for tomorrow using my current tasks and reminders.",
+    "Analyze what is blocking me and suggest the 3 highest-impact next actions.",
+]
+
+
+def _payload(endpoint: str, model_api_key: str, index: int) -> Dict[str, object]:
+    prompt = PROMPTS[index % len(PROMPTS)]
+    if endpoint == "stream":
+        return {"model_api_key": model_api_key, "user_prompt": prompt, "agentic_mode": True}
+    if endpoint == "briefing-stream":
+        return {"model_api_key": model_api_key, "horizon": "today", "refresh": True}
+    if endpoint == "query":
+        return {"model_api_key": model_api_key, "system_prompt": "", "user_prompt": prompt}
+    return {"model_api_key": model_api_key, "user_prompt": prompt}
+
+
+async def _bootstrap_user(client: httpx.AsyncClient, mock_url: str, model_name: str) -> Dict[str, str]:
+    """Register a throwaway user with a model pointing at the mock server."""
+    suffix = uuid.uuid4().hex[:10]
+    username = f"loadtest_{suffix}"
+    password = uuid.uuid4().hex
+    response = await client.post(
+        "/users/register",
+        json={
+            "username": username,
+            "display_name": "Load test",
+            "email": f"{username}@example.com",
+            "password": password,
+        },
+    )
+    response.raise_for_status()
+    response = await client.post("/users/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    api_key = response.json()["api_key"]
+    model_api_key = f"loadtest-{suffix}"
+    response = await client.post(
+        "/models/",
+        headers={"X-API-Key": api_key},
+        json={"name": model_name, "base_url": mock_url, "api_key": model_api_key},
+    )
+    response.raise_for_status()
+    return {"api_key": api_key, "model_api_key": model_api_key}
+
+
+async def _one_request(
+    client: httpx.AsyncClient, endpoint: str, credentials: Dict[str, str], index: int
+) -> Dict[str, object]:
+    path = ENDPOINTS[endpoint]
+    headers = {"X-API-Key": credentials["api_key"]}
+    body = _payload(endpoint, credentials["model_api_key"], index)
+    started = time.perf_counter()
+    result: Dict[str, object] = {"ok": False, "ttft": None, "latency": None, "chars": 0, "error": None}
+    try:
+        if endpoint.endswith("stream"):
+            async with client.stream("POST", path, json=body, headers=headers) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    result["error"] = f"HTTP {response.status_code}"
+                    return result
+                event = "message"
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data = json.loads(line[5:].strip() or "{}")
+                        if event == "delta":
+                            if result["ttft"] is None:
+                                result["ttft"] = time.perf_counter() - started
+                            result["chars"] += len(data.get("text") or "")
+                        elif event == "error":
+                            result["error"] = str(data.get("detail") or "stream error")[:120]
+                            return result
+                        elif event == "done":
+                            result["ok"] = True
+        else:
+            response = await client.post(path, json=body, headers=headers)
+            if response.status_code != 200:
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+            result["ttft"] = time.perf_counter() - started
+            result["chars"] = len(str(response.json().get("response") or ""))
+            result["ok"] = True
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"[:120]
+    finally:
+        result["latency"] = time.perf_counter() - started
+    if result["ok"] and result["ttft"] is None:
+        result["ttft"] = result["latency"]
+    return result
+
+
+async def _simulated_user(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    credentials: Dict[str, str],
+    requests: int,
+    think_seconds: float,
+    results: List[Dict[str, object]],
+) -> None:
+    for index in range(requests):
+        results.append(await _one_request(client, endpoint, credentials, index))
+        if think_seconds:
+            await asyncio.sleep(think_seconds)
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.0f} ms"
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    timeout = httpx.Timeout(args.timeout, read=args.timeout)
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.app_url, timeout=timeout, limits=limits, trust_env=False) as client:
+        if args.bootstrap:
+            credentials = await asyncio.gather(
+                *[_bootstrap_user(client, args.mock_url, args.model_name) for _ in range(args.users)]
+            )
+        else:
+            credentials = [{"api_key": args.api_key, "model_api_key": args.model_api_key}] * args.users
+
+        results: List[Dict[str, object]] = []
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[
+                _simulated_user(client, args.endpoint, creds, args.requests, args.think_ms / 1000, results)
+                for creds in credentials
+            ]
+        )
+        wall = time.perf_counter() - started
+
+    ok = [r for r in results if r["ok"]]
+    ttfts = [r["ttft"] for r in ok]
+    latencies = [r["latency"] for r in ok]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r["ok"]:
+            errors[str(r["error"])] = errors.get(str(r["error"]), 0) + 1
+    return {
+        "endpoint": args.endpoint,
+        "users": args.users,
+        "requests": len(results),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else 0.0,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(ok) / wall, 2) if wall else 0.0,
+        "chars_per_second": round(sum(r["chars"] for r in ok) / wall, 1) if wall else 0.0,
+        "ttft_p50": _percentile(ttfts, 50),
+        "ttft_p95": _percentile(ttfts, 95),
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "latency_mean": statistics.mean(latencies) if latencies else None,
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="stream")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=5, help="sequential requests per user")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--api-key", help="X-API-Key of an existing user")
+    parser.add_argument("--model-api-key", help="api_key of that user's model")
+    parser.add_argument("--bootstrap", action="store_true", help="register one throwaway user per simulated user")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8800/v1", help="model base_url used with --bootstrap")
+    parser.add_argument("--model-name", default="openai/mock", help="model name used with --bootstrap")
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    parser.add_argument("--max-p95-ttft-ms", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    if not args.bootstrap and not (args.api_key and args.model_api_key):
+        parser.error("pass --bootstrap or both --api-key and --model-api-key")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['endpoint']}: {report['requests']} requests from {report['users']} users in {report['wall_seconds']} s")
+        print(f"  succeeded     {report['succeeded']} (error rate {report['error_rate']:.1%})")
+        print(f"  throughput    {report['requests_per_second']} req/s, {report['chars_per_second']} chars/s")
+        print(f"  TTFT          p50 {_ms(report['ttft_p50'])}, p95 {_ms(report['ttft_p95'])}")
+        print(f"  latency       p50 {_ms(report['latency_p50'])}, p95 {_ms(report['latency_p95'])}")
+        for error, count in sorted(report["errors"].items(), key=lambda item: -item[1])[:5]:
+            print(f"  error x{count}: {error}")
+
+    failures = []
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.1%} > {args.max_error_rate:.1%}")
+    if args.max_p95_ttft_ms is not None and (
+        report["ttft_p95"] is None or report["ttft_p95"] * 1000 > args.max_p95_ttft_ms
+    ):
+        failures.append(f"p95 TTFT {_ms(report['ttft_p95'])} > {args.max_p95_ttft_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
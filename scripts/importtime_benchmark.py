@@ -0,0 +1,87 @@
+"""
+Startup import benchmark for the web app.
+
+Runs ``python -X importtime -c "import main"`` in a scratch directory and fails
+(exit code 1) when a deferred LLM stack is imported at startup or when the
+cumulative import time of ``main`` exceeds the budget.
+
+    python scripts/importtime_benchmark.py
+    python scripts/importtime_benchmark.py --runs 5 --budget-ms 2000
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# These must only be imported on first assistant use (see core.crewai_env.load_crewai).
+DEFERRED_PACKAGES = ("crewai", "langchain", "langchain_core", "langgraph", "litellm", "openai")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_importtime() -> List[Tuple[str, int, int]]:
+    """Return (module, cumulative_us, depth) for each import of one cold start."""
+    with tempfile.TemporaryDirectory() as scratch:
+        # main.py mounts ./static and creates ./test.db relative to the cwd.
+        os.symlink(os.path.join(REPO_ROOT, "static"), os.path.join(scratch, "static"))
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT, "PYTHONDONTWRITEBYTECODE": "1"}
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=scratch,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"import main failed:\n{tail[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="cold starts to measure; the fastest is reported")
+    parser.add_argument("--budget-ms", type=float, default=2500.0, help="max cumulative import time of main")
+    parser.add_argument("--top", type=int, default=15, help="number of top-level imports to list")
+    args = parser.parse_args()
+
+    best: List[Tuple[str, int, int]] = []
+    best_total = None
+    for _ in range(max(1, args.runs)):
+        rows = run_importtime()
+        total = next((cumulative for module, cumulative, _depth in rows if module == "main"), 0)
+        if best_total is None or total < best_total:
+            best, best_total = rows, total
+
+    top_level: Dict[str, int] = {}
+    for module, cumulative, depth in best:
+        if depth == 1:
+            top_level[module] = max(top_level.get(module, 0), cumulative)
+    print(f"import main: {best_total / 1000:.1f} ms (best of {max(1, args.runs)})")
+    for module, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    failures = []
+    loaded = sorted({module for module, _c, _d in best if module.split(".")[0] in DEFERRED_PACKAGES})
+    if loaded:
+        failures.append(f"deferred packages imported at startup: {', '.join(loaded[:10])}")
+    if best_total / 1000 > args.budget_ms:
+        failures.append(f"startup import time {best_total / 1000:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
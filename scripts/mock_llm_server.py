@@ -0,0 +1,180 @@
+"""
+Offline stand-in for an LLM endpoint, for benchmarking the assistant path.
+
+Speaks OpenAI-style ``/v1/chat/completions`` and ``/v1/completions`` (SSE when
+``stream`` is true, JSON otherwise) and Ollama's ``/api/chat`` (NDJSON), with
+configurable latency, token rate and error rate.
+
+    python scripts/mock_llm_server.py --port 8800 --ttft-ms 300 --tokens-per-second 40
+
+Register a model in the app with base_url ``http://127.0.0.1:8800/v1`` and any
+name (use ``openai/<name>`` so CrewAI routes it as an OpenAI-compatible model).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Mock LLM")
+
+settings: Dict[str, float] = {
+    "ttft_ms": 250.0,
+    "tokens_per_second": 50.0,
+    "tokens": 120,
+    "jitter": 0.2,
+    "error_rate": 0.0,
+}
+
+_WORDS = (
+    "Focus on task 12 first then block ninety minutes for the Alpha report before lunch. "
+    "Move low energy admin work to the afternoon and leave a buffer for reviews. "
+    "Priorities: finish the draft, reply to the client, plan tomorrow. "
+).split()
+
+
+def _tokens(count: int) -> List[str]:
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(count)]
+
+
+def _jittered(seconds: float) -> float:
+    spread = settings["jitter"]
+    return max(0.0, seconds * random.uniform(1 - spread, 1 + spread))
+
+
+async def _maybe_fail() -> None:
+    await asyncio.sleep(_jittered(settings["ttft_ms"] / 1000))
+    if random.random() < settings["error_rate"]:
+        raise HTTPException(status_code=503, detail="mock overload")
+
+
+async def _token_stream() -> AsyncIterator[str]:
+    delay = 1.0 / max(settings["tokens_per_second"], 0.001)
+    for index, token in enumerate(_tokens(int(settings["tokens"]))):
+        if index:
+            await asyncio.sleep(_jittered(delay))
+        yield token
+
+
+def _usage(prompt: str, completion_tokens: int) -> Dict[str, int]:
+    prompt_tokens = max(1, len(prompt) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _prompt_text(body: Dict) -> str:
+    if "messages" in body:
+        return "\n".join(str(m.get("content", "")) for m in body.get("messages") or [])
+    return str(body.get("prompt", ""))
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+
+async def _openai_response(request: Request, chat: bool):
+    body = await request.json()
+    await _maybe_fail()
+    completion_id = f"mock-{uuid.uuid4().hex[:12]}"
+    model = body.get("model", "mock")
+    created = int(time.time())
+    kind = "chat.completion" if chat else "text_completion"
+
+    if not body.get("stream"):
+        text = "".join([token async for token in _token_stream()])
+        choice = {"index": 0, "finish_reason": "stop"}
+        choice.update({"message": {"role": "assistant", "content": text}} if chat else {"text": text})
+        return {
+            "id": completion_id,
+            "object": kind,
+            "created": created,
+            "model": model,
+            "choices": [choice],
+            "usage": _usage(_prompt_text(body), int(settings["tokens"])),
+        }
+
+    async def events() -> AsyncIterator[str]:
+        async for token in _token_stream():
+            choice = {"index": 0, "finish_reason": None}
+            choice.update({"delta": {"content": token}} if chat else {"text": token})
+            chunk = {"id": completion_id, "object": f"{kind}.chunk", "created": created, "model": model, "choices": [choice]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {"index": 0, "finish_reason": "stop"}
+        final.update({"delta": {}} if chat else {"text": ""})
+        chunk = {"id": completion_id, "object": f"{kind}.chunk", "created": created, "model": model, "choices": [final]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    return await _openai_response(request, chat=True)
+
+
+@app.post("/v1/completions")
+async def completions(request: Request):
+    return await _openai_response(request, chat=False)
+
+
+@app.post("/api/chat")
+async def ollama_chat(request: Request):
+    body = await request.json()
+    await _maybe_fail()
+    model = body.get("model", "mock")
+
+    def line(content: str, done: bool) -> str:
+        return json.dumps(
+            {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+        ) + "\n"
+
+    if body.get("stream") is False:
+        text = "".join([token async for token in _token_stream()])
+        return json.loads(line(text, True))
+
+    async def events() -> AsyncIterator[str]:
+        async for token in _token_stream():
+            yield line(token, False)
+        yield line("", True)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--ttft-ms", type=float, default=settings["ttft_ms"], help="delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=settings["tokens_per_second"])
+    parser.add_argument("--tokens", type=int, default=settings["tokens"], help="tokens per response")
+    parser.add_argument("--jitter", type=float, default=settings["jitter"], help="relative +/- jitter on delays")
+    parser.add_argument("--error-rate", type=float, default=settings["error_rate"], help="fraction of 503 responses")
+    args = parser.parse_args()
+    settings.update(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        tokens=args.tokens,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Rebuild the task_closure table from tasks.parent_task_id.
+
+Run from the directory that holds the app database (./test.db), e.g. after
+set-based edits to task parents or a restore from backup:
+
+    python scripts/rebuild_task_closure.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> int:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    from core.database import Base, SessionLocal, engine
+    from core.task_tree import rebuild_task_closure
+    import models.task_closure  # noqa: F401
+    import models.tasks  # noqa: F401
+
+    Base.metadata.create_all(bind=engine, tables=[models.task_closure.TaskClosure.__table__])
+    db = SessionLocal()
+    try:
+        result = rebuild_task_closure(db)
+    finally:
+        db.close()
+    print(f"tasks: {result['tasks']}  closure rows: {result['rows']}  parent cycles found: {result['cycles']}")
+    return 1 if result["cycles"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
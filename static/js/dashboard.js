@@ -68,6 +68,7 @@ let tasksCurrentPage = 0;
 let tasksPageSize = 12; // Show 6 tasks per row, 2 rows = 12 tasks
 let tasksTotalCount = 0;
 let filteredTasksData = [];
+let tasksListRequestId = 0;
 
 // Task filters
 let taskFilters = {
@@ -95,8 +96,6 @@ let activityFilters = {
     endDate: ''
 };
 
-let projectsCurrentPage = 0;
-let projectsPageSize = 20;
 let modelsCurrentPage = 0;
 let modelsPageSize = 20;
 
@@ -481,6 +480,48 @@ function loadUserInfo() {
     }
 }
 
+// Delta sync for the full task and project lists: the first call downloads
+// everything, later calls send the last token and only get changed rows and
+// deleted ids. Calls are chained so each one sees the previous token.
+let plannerSyncToken = null;
+let plannerSyncChain = Promise.resolve();
+const syncedTasks = new Map();
+const syncedProjects = new Map();
+
+function applySyncedRows(store, rows, deletedIds, full) {
+    if (full) store.clear();
+    (deletedIds || []).forEach(id => store.delete(Number(id)));
+    (rows || []).forEach(row => store.set(Number(row.id), row));
+    return Array.from(store.values()).sort((a, b) => a.id - b.id);
+}
+
+function syncPlannerData() {
+    const run = async () => {
+        const apiKey = localStorage.getItem('apiKey');
+        if (!apiKey) {
+            return null;
+        }
+        const params = new URLSearchParams();
+        params.append('entities', 'tasks');
+        params.append('entities', 'projects');
+        if (plannerSyncToken !== null) params.set('since', plannerSyncToken);
+        const response = await fetch(`/sync/?${params.toString()}`, {
+            headers: { 'X-API-Key': apiKey }
+        });
+        if (!response.ok) {
+            throw new Error(`Sync failed: ${response.status}`);
+        }
+        const data = await response.json();
+        tasksData = applySyncedRows(syncedTasks, data.tasks, data.deleted.tasks, data.full);
+        projectsData = applySyncedRows(syncedProjects, data.projects, data.deleted.projects, data.full);
+        plannerSyncToken = data.token;
+        return data;
+    };
+    const next = plannerSyncChain.then(run);
+    plannerSyncChain = next.catch(() => null);
+    return next;
+}
+
 // Fetch all tasks (no pagination)
 async function loadAllTasks() {
     try {
@@ -490,13 +531,11 @@ async function loadAllTasks() {
             window.location.href = '/login';
             return;
         }
-        const response = await fetch('/tasks/?skip=0&limit=10000', {
-            headers: { 'X-API-Key': apiKey }
-        });
-        if (response.ok) {
-            tasksData = await response.json();
+        const data = await syncPlannerData();
+        if (data) {
             // Update taskCache with all tasks
             tasksData.forEach(task => { taskCache[task.id] = task; });
+            (data.deleted.tasks || []).forEach(id => { delete taskCache[id]; });
             populateTaskSelect();
             populateParentTaskFilter();
         }
@@ -513,13 +552,11 @@ async function loadAllProjects() {
             console.error('No API key found for loading projects');
             return;
         }
-        const response = await fetch('/projects/?skip=0&limit=10000', {
-            headers: { 'X-API-Key': apiKey }
-        });
-        if (response.ok) {
-            projectsData = await response.json();
+        const data = await syncPlannerData();
+        if (data) {
             // Update projectCache with all projects
             projectsData.forEach(project => { projectCache[project.id] = project; });
+            (data.deleted.projects || []).forEach(id => { delete projectCache[id]; });
             populateProjectSelects();
             populateActivityProjectSelect();
         }
@@ -1617,24 +1654,17 @@ function modelsNextPage() {
 }
 
 // Load Projects
-async function loadProjects(page = 0) {
+async function loadProjects() {
     try {
         const apiKey = localStorage.getItem('apiKey');
         if (!apiKey) {
             console.error('No API key found for loading projects');
             return;
         }
-        console.log('Loading projects with API key:', apiKey);
-        let url = `/projects/?skip=${page * projectsPageSize}&limit=${projectsPageSize}`;
-        const response = await fetch(url, {
-            headers: {
-                'X-API-Key': apiKey
-            }
-        });
-        console.log('Projects response status:', response.status);
-        if (response.ok) {
-            projectsData = await response.json();
-            projectsCurrentPage = page;
+        // Project selects need every project; the delta sync keeps the full list current.
+        const data = await syncPlannerData();
+        if (data) {
+            projectsData.forEach(project => { projectCache[project.id] = project; });
             populateProjectSelects();
             populateActivityProjectSelect();
         }
@@ -1643,20 +1673,6 @@ async function loadProjects(page = 0) {
     }
 }
 
-function projectsPreviousPage() {
-    if (projectsCurrentPage > 0) {
-        projectsCurrentPage--;
-        loadProjects(projectsCurrentPage);
-    }
-}
-
-function projectsNextPage() {
-    if ((projectsCurrentPage + 1) * projectsPageSize < projectsData.length) {
-        projectsCurrentPage++;
-        loadProjects(projectsCurrentPage);
-    }
-}
-
 // Populate project selects in forms
 function populateProjectSelects() {
     // Populate task form project select
@@ -1884,16 +1900,36 @@ function displayProjectsList() {
     projectsListDiv.innerHTML = html;
 }
 
-// Display tasks list with pagination and filtering
-function displayTasksList() {
+// Display tasks list with pagination and filtering (filtered and paged on the server)
+async function displayTasksList() {
     const tasksListDiv = document.getElementById('tasksList');
     const tasksPaginationDiv = document.getElementById('tasksPagination');
+    const apiKey = localStorage.getItem('apiKey');
+    if (!apiKey) return;
+    
+    const requestId = ++tasksListRequestId;
+    const params = buildTaskFilterParams();
+    params.set('skip', String(tasksCurrentPage * tasksPageSize));
+    params.set('limit', String(tasksPageSize));
+    params.set('include_total', 'true');
+    let currentPageTasks = [];
+    try {
+        const response = await fetch(`/tasks/?${params.toString()}`, {
+            headers: { 'X-API-Key': apiKey }
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        currentPageTasks = await response.json();
+        tasksTotalCount = Number(response.headers.get('X-Total-Count') || currentPageTasks.length);
+    } catch (error) {
+        console.error('Error loading filtered tasks:', error);
+        return;
+    }
+    // A newer filter/page change has already been requested.
+    if (requestId !== tasksListRequestId) return;
+    currentPageTasks.forEach(task => { taskCache[task.id] = task; });
+    filteredTasksData = currentPageTasks;
     
-    // Apply all filters
-    filteredTasksData = applyTaskFiltersToData(tasksData);
-    tasksTotalCount = filteredTasksData.length;
-    
-    if (filteredTasksData.length === 0) {
+    if (tasksTotalCount === 0) {
         tasksListDiv.innerHTML = `<p class="text-muted text-center">No tasks found matching the current filters</p>`;
         tasksPaginationDiv.classList.add('d-none');
         return;
@@ -1901,8 +1937,7 @@ function displayTasksList() {
     
     // Calculate pagination
     const startIndex = tasksCurrentPage * tasksPageSize;
-    const endIndex = Math.min(startIndex + tasksPageSize, filteredTasksData.length);
-    const currentPageTasks = filteredTasksData.slice(startIndex, endIndex);
+    const endIndex = startIndex + currentPageTasks.length;
     
     // Update pagination info
     document.getElementById('tasksStartIndex').textContent = startIndex + 1;
@@ -1936,7 +1971,7 @@ function displayTasksList() {
     currentPageTasks.forEach(task => {
         const project = projectsData.find(p => Number(p.id) === Number(task.proj_id));
         const projectName = project ? project.name : 'Unknown Project';
-        const parentTask = task.parent_task_id ? tasksData.find(t => Number(t.id) === Number(task.parent_task_id)) : null;
+        const parentTask = task.parent_task_id ? (tasksData.find(t => Number(t.id) === Number(task.parent_task_id)) || taskCache[task.parent_task_id]) : null;
         const parentInfo = parentTask ? `<span class="badge rounded-pill bg-info text-dark">${parentTask.title}</span>` : '';
         const progressPercentage = task.progress && task.progress.max_value > 0 
             ? Math.round((task.progress.value / task.progress.max_value) * 100) 
@@ -1971,63 +2006,24 @@ function displayTasksList() {
 }
 
 // Task filtering and pagination functions
-function applyTaskFiltersToData(tasks) {
-    return tasks.filter(task => {
-        // State filter
-        if (taskFilters.state && task.state !== taskFilters.state) {
-            return false;
-        }
-        
-        // Project filter
-        if (taskFilters.project && Number(task.proj_id) !== Number(taskFilters.project)) {
-            return false;
-        }
-        
-        // Energy level filter
-        if (taskFilters.energy && task.energy_level !== taskFilters.energy) {
-            return false;
-        }
-        
-        // Importance filter
-        if (taskFilters.importance === 'important' && !task.is_important) {
-            return false;
-        }
-        if (taskFilters.importance === 'not_important' && task.is_important) {
-            return false;
-        }
-        
-        // Urgency filter
-        if (taskFilters.urgency === 'urgent' && !task.is_urgent) {
-            return false;
-        }
-        if (taskFilters.urgency === 'not_urgent' && task.is_urgent) {
-            return false;
-        }
-        
-        // Deadline filter
-        if (taskFilters.deadline) {
-            if (!task.deadline) return false;
-            const now = new Date();
-            const taskDeadline = new Date(task.deadline);
-            const filterDeadline = new Date(taskFilters.deadline);
-            if (taskDeadline < now || taskDeadline > filterDeadline) {
-                return false;
-            }
-        }
-        
-        // Parent task filter
-        if (taskFilters.parent) {
-            if (taskFilters.parent === 'no_parent') {
-                // Show only tasks with no parent
-                if (task.parent_task_id) return false;
-            } else {
-                // Show only tasks with specific parent
-                if (Number(task.parent_task_id) !== Number(taskFilters.parent)) return false;
-            }
-        }
-        
-        return true;
-    });
+function buildTaskFilterParams() {
+    const params = new URLSearchParams();
+    if (taskFilters.state) params.append('state', taskFilters.state);
+    if (taskFilters.project) params.append('proj_id', taskFilters.project);
+    if (taskFilters.energy) params.append('energy_level', taskFilters.energy);
+    if (taskFilters.importance) params.set('is_important', String(taskFilters.importance === 'important'));
+    if (taskFilters.urgency) params.set('is_urgent', String(taskFilters.urgency === 'urgent'));
+    if (taskFilters.deadline) {
+        // Deadlines from now until the chosen date
+        params.set('deadline_after', new Date().toISOString());
+        params.set('deadline_before', new Date(taskFilters.deadline).toISOString());
+    }
+    if (taskFilters.parent === 'no_parent') {
+        params.set('top_level', 'true');
+    } else if (taskFilters.parent) {
+        params.set('parent_task_id', taskFilters.parent);
+    }
+    return params;
 }
 
 async function applyTaskFilters() {
@@ -2043,9 +2039,7 @@ async function applyTaskFilters() {
     // Reset to first page
     tasksCurrentPage = 0;
     
-    // Always load all tasks, then filter on frontend
-    await loadAllTasks();
-    displayTasksList();
+    await displayTasksList();
 }
 
 async function clearTaskFilters() {
@@ -2072,9 +2066,7 @@ async function clearTaskFilters() {
     // Reset to first page
     tasksCurrentPage = 0;
     
-    // Load all tasks
-    await loadAllTasks();
-    displayTasksList();
+    await displayTasksList();
 }
 
 function tasksPreviousPage() {
@@ -2110,7 +2102,6 @@ function populateTaskFilters() {
     // Add event listener for project filter (only if not already added)
     if (!projectFilter.hasAttribute('data-listener-added')) {
         projectFilter.addEventListener('change', async function() {
-            await loadAllTasks();
             displayTasksList();
             populateParentTaskFilter(); // Repopulate parent task filter when project changes
         });
@@ -2178,6 +2169,7 @@ async function editModel(apiKey) {
             document.getElementById('editModelId').value = model.api_key;
             document.getElementById('editModelName').value = model.name;
             document.getElementById('editModelBaseUrl').value = model.base_url;
+            document.getElementById('editModelContextWindow').value = model.context_window || '';
             const modal = new bootstrap.Modal(document.getElementById('editModelModal'));
             modal.show();
         } else {
@@ -2194,6 +2186,8 @@ document.getElementById('updateModelBtn').addEventListener('click', async functi
     const apiKey = document.getElementById('editModelId').value;
     const name = document.getElementById('editModelName').value;
     const base_url = document.getElementById('editModelBaseUrl').value;
+    const parsedContextWindow = parseInt(document.getElementById('editModelContextWindow').value, 10);
+    const context_window = Number.isInteger(parsedContextWindow) && parsedContextWindow > 0 ? parsedContextWindow : null;
     if (!name || !base_url) {
         showToast('warning', 'Validation Error', 'Please fill in all required fields');
         return;
@@ -2206,7 +2200,7 @@ document.getElementById('updateModelBtn').addEventListener('click', async functi
                 'X-API-Key': userApiKey,
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ name, base_url })
+            body: JSON.stringify({ name, base_url, context_window })
         });
         if (response.ok) {
             const modal = bootstrap.Modal.getInstance(document.getElementById('editModelModal'));
@@ -3046,6 +3040,7 @@ document.getElementById('newModelForm').addEventListener('submit', async functio
     const name = document.getElementById('modelName').value;
     const baseUrl = document.getElementById('modelBaseUrl').value;
     const apiKey = document.getElementById('modelApiKey').value;
+    const contextWindow = parseInt(document.getElementById('modelContextWindow').value, 10);
 
     if (!name || !baseUrl || !apiKey) {
         showToast('warning', 'Validation Error', 'Please fill in all required fields');
@@ -3063,7 +3058,8 @@ document.getElementById('newModelForm').addEventListener('submit', async functio
             body: JSON.stringify({
                 name: name,
                 base_url: baseUrl,
-                api_key: apiKey
+                api_key: apiKey,
+                context_window: Number.isInteger(contextWindow) && contextWindow > 0 ? contextWindow : null
             })
         });
 